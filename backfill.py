@@ -0,0 +1,36 @@
+import argparse
+
+from injector import Injector
+
+from blueOcean.application.di import AppModule
+from blueOcean.application.usecases import BackfillOhlcvUsecase
+from blueOcean.domain.ohlcv import IOhlcvRepository
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backfill one symbol's OHLCV history in parallel shards"
+    )
+    parser.add_argument("exchange")
+    parser.add_argument("symbol")
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--recheck",
+        action="store_true",
+        help="forget ranges recorded as unavailable and ask the exchange again",
+    )
+    args = parser.parse_args()
+
+    injector = Injector([AppModule()])
+    if args.recheck:
+        injector.get(IOhlcvRepository).clear_unavailable(args.exchange, args.symbol)
+    usecase = injector.get(BackfillOhlcvUsecase)
+    shards = usecase.execute(
+        args.exchange,
+        args.symbol,
+        shards=args.shards,
+        concurrency=args.concurrency,
+    )
+    pending = [s for s in shards if not s.done]
+    if pending:
+        print(f"{len(pending)} shards unfinished; rerun to resume")
@@ -0,0 +1,50 @@
+import argparse
+import multiprocessing
+
+from injector import Injector
+
+from blueOcean.application.backtests import BacktestExecutor
+from blueOcean.application.di import AppModule
+
+STRATEGY_MODULES = ("blueOcean.core.strategies",)
+
+
+def _run(workers: int | None, timeout: float | None):
+    executor = Injector([AppModule()]).get(BacktestExecutor)
+    try:
+        executor.run_forever(workers, timeout, STRATEGY_MODULES)
+    except KeyboardInterrupt:
+        pass
+
+
+def start_executor(
+    workers: int | None = None,
+    timeout: float | None = None,
+) -> multiprocessing.Process:
+    """未実行のコンテキストを拾ってバックテストを回す実行器を別プロセスで起動する"""
+    process = multiprocessing.Process(
+        target=_run, args=(workers, timeout), daemon=False
+    )
+    process.start()
+    return process
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run launched backtest contexts")
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument(
+        "--timeout", type=float, default=None, help="seconds per context"
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="run pending contexts and exit"
+    )
+    args = parser.parse_args()
+
+    if args.once:
+        executor = Injector([AppModule()]).get(BacktestExecutor)
+        for context_id, status in executor.run_once(
+            args.workers, args.timeout, STRATEGY_MODULES
+        ).items():
+            print(f"{context_id}\t{status.name}")
+    else:
+        _run(args.workers, args.timeout)
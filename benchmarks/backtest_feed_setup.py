@@ -0,0 +1,75 @@
+"""Cerebro が足を preload するまでの時間
+
+同じ列を ``bt.feeds.PandasData`` と ``OhlcvColumnsFeed`` (足ごとの読み込みとまとめての流し込み) で
+読み込み、Line に載るまでの時間を比べる。
+
+    python -m benchmarks.backtest_feed_setup --bars 5000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from blueOcean.application.feeds import OhlcvColumnsFeed
+from blueOcean.domain.ohlcv import OhlcvColumns, Timeframe
+
+
+def _columns(bars: int) -> OhlcvColumns:
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(size=bars))
+    time = np.datetime64("2015-01-01T00:00", "us") + np.arange(bars) * np.timedelta64(
+        1, "m"
+    )
+    return OhlcvColumns(time, close, close + 1, close - 1, close, rng.random(bars))
+
+
+def _measure(label: str, data: bt.feed.DataBase, bulk: bool = True):
+    bt.Cerebro().adddata(data)
+    started = time.perf_counter()
+    # Cerebro が run の中で行う準備と同じ
+    data._start()
+    if bulk:
+        data.preload()
+    else:
+        bt.feed.DataBase.preload(data)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {elapsed:>8.3f}s {data.buflen():>10} bars")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    columns = _columns(args.bars)
+    frame = pd.DataFrame(
+        {name: getattr(columns, name) for name in OhlcvColumns.NAMES[1:]},
+        index=pd.DatetimeIndex(columns.time),
+    )
+
+    _measure(
+        "PandasData",
+        bt.feeds.PandasData(
+            dataname=frame,
+            timeframe=bt.TimeFrame.Minutes,
+            compression=1,
+            openinterest=None,
+        ),
+    )
+    _measure(
+        "OhlcvColumnsFeed (rows)",
+        OhlcvColumnsFeed.of(columns, Timeframe.ONE_MINUTE),
+        bulk=False,
+    )
+    _measure(
+        "OhlcvColumnsFeed (bulk)", OhlcvColumnsFeed.of(columns, Timeframe.ONE_MINUTE)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""バックテストワーカーが足を読むときのプロセスごとのメモリ
+
+同じ 1m 履歴を、ワーカーごとに ``find_columns`` で読む場合と、
+``SharedOhlcvPlane`` で 1 度だけ共有メモリに載せて各ワーカーが割り当てる場合で比べる。
+ワーカーごとの私有メモリ (RssAnon) の増分と共有メモリ (RssShmem) を表示する。
+
+    python -m benchmarks.backtest_shared_memory --months 24 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmarks.ohlcv_stream_memory import SOURCE, SYMBOL, _prepare
+from blueOcean.domain.ohlcv import Timeframe
+from blueOcean.infra.database.repositories import OhlcvRepository
+from blueOcean.infra.shared import SharedOhlcvHandle, SharedOhlcvPlane, attached
+
+
+def _memory_mib() -> dict[str, float]:
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return {key: int(fields[key].split()[0]) / 1024 for key in ("RssAnon", "RssShmem")}
+
+
+def _read_own(base_dir: str) -> tuple[float, float, float]:
+    before = _memory_mib()
+    columns = OhlcvRepository(base_path=base_dir).find_columns(SYMBOL, SOURCE)
+    total = float(np.sum(columns.close))
+    after = _memory_mib()
+    # 同じワーカーに 2 件目が回ってこないよう、全員がそろうまで持っておく
+    time.sleep(1)
+    return total, after["RssAnon"] - before["RssAnon"], after["RssShmem"]
+
+
+def _read_shared(handle: SharedOhlcvHandle) -> tuple[float, float, float]:
+    before = _memory_mib()
+    with attached(handle) as columns:
+        total = float(np.sum(columns.close) + np.sum(columns.open))
+        after = _memory_mib()
+        del columns
+    time.sleep(1)
+    return total, after["RssAnon"] - before["RssAnon"], after["RssShmem"]
+
+
+def _report(mode: str, results: list[tuple[float, float, float]], elapsed: float):
+    private = [r[1] for r in results]
+    shared = max(r[2] for r in results)
+    print(
+        f"{mode:<10} {elapsed:>6.2f}s private +{np.mean(private):>7.1f} MiB/worker "
+        f"(total +{np.sum(private):>8.1f} MiB) shared {shared:>7.1f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        _prepare(base_dir, args.months)
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(args.workers) as executor:
+            results = list(executor.map(_read_own, [base_dir] * args.workers))
+        _report("repository", results, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with (
+            SharedOhlcvPlane(OhlcvRepository(base_path=base_dir)) as plane,
+            ProcessPoolExecutor(args.workers) as executor,
+        ):
+            handle = plane.acquire(SOURCE, SYMBOL, Timeframe.ONE_MINUTE)
+            results = list(executor.map(_read_shared, [handle] * args.workers))
+        _report("shared", results, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
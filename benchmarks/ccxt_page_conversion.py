@@ -0,0 +1,66 @@
+"""ccxt のページを保存できる形にするまでの CPU 時間計測
+
+``fetch_ohlcv`` が返す ``list[list]`` (1000 本) を、以前の
+DataFrame -> ``Ohlcv`` -> ``Ohlcv.to_dataframe`` -> Arrow の経路と
+``to_record_batch`` で変換し、1 ページあたりの時間を比較する。
+
+    python -m benchmarks.ccxt_page_conversion --pages 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from blueOcean.domain.ohlcv import Ohlcv
+from blueOcean.infra.fetchers import to_record_batch
+
+PAGE_SIZE = 1000
+COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+
+def _page(index: int) -> list[list]:
+    start = 1_704_067_200_000 + index * PAGE_SIZE * 60_000
+    prices = 100 + np.cumsum(np.random.default_rng(index).normal(size=PAGE_SIZE))
+    return [
+        [start + i * 60_000, float(p), float(p) + 1, float(p) - 1, float(p), 1.0]
+        for i, p in enumerate(prices)
+    ]
+
+
+def _legacy(rows: list[list]) -> pa.Table:
+    """変更前の CcxtOhlcvFetcher + OhlcvRepository.save の変換"""
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df["time"] = pd.to_datetime(df["time"], unit="ms", utc=True)
+    ohlcvs = Ohlcv.from_dataframe(df)
+    df = Ohlcv.to_dataframe(ohlcvs).sort_index()
+    return pa.Table.from_pandas(df.reset_index()[COLUMNS], preserve_index=False)
+
+
+def _measure(label: str, pages: list[list[list]], convert):
+    started = time.process_time()
+    for page in pages:
+        convert(page)
+    elapsed = time.process_time() - started
+    print(
+        f"{label:<14} {len(pages):>5} pages {elapsed:>7.3f}s CPU "
+        f"{elapsed / len(pages) * 1000:>8.3f} ms/page"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+
+    pages = [_page(i) for i in range(args.pages)]
+    _measure("dataframe", pages, _legacy)
+    _measure("record-batch", pages, to_record_batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""OHLCV バックフィルの書き込みスループット計測
+
+``CcxtOhlcvFetcher`` と同じ 1000 本単位のページを ``OhlcvRepository.save`` に流し、
+以前の「月ファイルを読み直して全書き換え」方式と rows/s を比較する。
+append-only では取り込み後に後回しにした集約の作成と圧縮 (``compact``) の時間も出す。
+
+    python -m benchmarks.ohlcv_backfill --months 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from blueOcean.domain.ohlcv import Ohlcv
+from blueOcean.infra.database.repositories import OhlcvRepository
+
+PAGE_SIZE = 1000
+
+
+def _pages(months: int) -> list[list[Ohlcv]]:
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    rows = months * 30 * 24 * 60
+    prices = 100 + np.cumsum(np.random.default_rng(0).normal(size=rows))
+    ohlcvs = [
+        Ohlcv(
+            time=start + timedelta(minutes=i),
+            open=float(p),
+            high=float(p) + 1,
+            low=float(p) - 1,
+            close=float(p),
+            volume=1.0,
+        )
+        for i, p in enumerate(prices)
+    ]
+    return [ohlcvs[i : i + PAGE_SIZE] for i in range(0, rows, PAGE_SIZE)]
+
+
+def _legacy_save(base_dir: Path, ohlcv: list[Ohlcv], source: str, symbol: str):
+    """変更前の OhlcvRepository.save (月ファイルの read-modify-rewrite)"""
+    df = Ohlcv.to_dataframe(ohlcv).sort_index()
+    df["year_month"] = df.index.strftime("%Y-%m")
+    for ym, chunk in df.groupby("year_month"):
+        out_dir = Path(base_dir, source, symbol.replace("/", "_"))
+        out_dir.mkdir(parents=True, exist_ok=True)
+        filename = Path(out_dir, f"{ym}.parquet")
+        chunk = chunk.drop(columns=["year_month"])
+        chunk["time"] = chunk.index
+        chunk = chunk[["time", "open", "high", "low", "close", "volume"]]
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if filename.exists():
+            old = pq.read_table(filename).to_pandas()
+            merged = (
+                pd.concat([old, chunk], ignore_index=True)
+                .drop_duplicates(subset=["time"])
+                .sort_values("time")
+            )
+            table = pa.Table.from_pandas(merged, preserve_index=False)
+        pq.write_table(table, filename)
+
+
+def _measure(label: str, pages: list[list[Ohlcv]], save) -> None:
+    rows = sum(len(p) for p in pages)
+    started = time.perf_counter()
+    for page in pages:
+        save(page, "bench", "BTC/USDT")
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<12} {rows:>9} rows {elapsed:>8.2f}s {rows / elapsed:>12,.0f} rows/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=6)
+    args = parser.parse_args()
+
+    pages = _pages(args.months)
+    with tempfile.TemporaryDirectory() as legacy_dir:
+        _measure(
+            "rewrite",
+            pages,
+            lambda page, source, symbol: _legacy_save(
+                Path(legacy_dir), page, source, symbol
+            ),
+        )
+    with tempfile.TemporaryDirectory() as append_dir:
+        repo = OhlcvRepository(base_path=append_dir)
+        _measure("append-only", pages, repo.save)
+        started = time.perf_counter()
+        repo.compact("bench", "BTC/USDT")
+        print(f"{'compact':<12} {time.perf_counter() - started:>23.2f}s")
+
+
+if __name__ == "__main__":
+    main()
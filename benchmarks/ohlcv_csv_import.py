@@ -0,0 +1,63 @@
+"""ヒストリカル CSV の一括取り込みの計測
+
+1 年分の 1m 足を Binance の月次 ZIP と同じ形 (12 ファイル) で作り、
+``OhlcvCsvImporter`` で取り込むまでの時間を測る。
+
+    python -m benchmarks.ohlcv_csv_import --months 12
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import zipfile
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+
+from blueOcean.infra.database.repositories import OhlcvRepository
+from blueOcean.infra.importers import LAYOUTS, OhlcvCsvImporter
+
+
+def _write_month(path: Path, year: int, month: int):
+    start = datetime(year, month, 1, tzinfo=UTC)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=UTC)
+    times = np.arange(
+        int(start.timestamp() * 1000), int(end.timestamp() * 1000), 60_000
+    )
+    prices = 100 + np.cumsum(np.random.default_rng(month).normal(size=len(times)))
+    text = "\n".join(
+        f"{t},{p:.2f},{p + 1:.2f},{p - 1:.2f},{p:.2f},1,0,0,0,0,0,0"
+        for t, p in zip(times.tolist(), prices.tolist())
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(path.with_suffix(".csv").name, text)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = [tmp / f"BTCUSDT-1m-2024-{m:02}.zip" for m in range(1, args.months + 1)]
+        for month, path in enumerate(paths, start=1):
+            _write_month(path, 2024, month)
+
+        importer = OhlcvCsvImporter(
+            OhlcvRepository(base_path=str(tmp / "data")), args.workers
+        )
+        started = time.perf_counter()
+        imported = importer.execute(
+            paths, "binance", "BTC/USDT", LAYOUTS["binance-klines"]
+        )
+        elapsed = time.perf_counter() - started
+        print(f"{imported} bars from {len(paths)} archives in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
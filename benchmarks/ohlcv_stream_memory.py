@@ -0,0 +1,107 @@
+"""OHLCV 読み込みのピーク RSS 計測
+
+同じ 1m 履歴を ``find_table`` (全件をまとめて取得) と ``iter_batches`` (月ごとに
+ストリーミング) で読み、それぞれ別プロセスで最大 RSS を測る。
+
+    python -m benchmarks.ohlcv_stream_memory --months 24
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from blueOcean.infra.database.repositories import OhlcvRepository
+from blueOcean.infra.stores import ParquetPartitionStore
+
+SOURCE = "bench"
+SYMBOL = "BTC/USDT"
+
+
+def _prepare(base_dir: str, months: int):
+    store = ParquetPartitionStore(Path(base_dir, SOURCE, SYMBOL.replace("/", "_")))
+    rng = np.random.default_rng(0)
+    for start in pd.date_range("2020-01-01", periods=months, freq="MS", tz="UTC"):
+        time_index = pd.date_range(
+            start, start + pd.offsets.MonthBegin(), freq="1min", inclusive="left"
+        )
+        prices = 100 + np.cumsum(rng.normal(size=len(time_index)))
+        store.append(
+            pa.table(
+                {
+                    "time": time_index,
+                    "open": prices,
+                    "high": prices + 1,
+                    "low": prices - 1,
+                    "close": prices,
+                    "volume": np.ones(len(time_index)),
+                }
+            )
+        )
+
+
+def _run(base_dir: str, mode: str, batch_size: int):
+    repo = OhlcvRepository(base_path=base_dir)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    rows = 0
+    total = 0.0
+    if mode == "table":
+        table = repo.find_table(SYMBOL, SOURCE)
+        rows = table.num_rows
+        total = float(np.sum(table.column("close").to_numpy()))
+    else:
+        for batch in repo.iter_batches(SYMBOL, SOURCE, batch_size=batch_size):
+            rows += batch.num_rows
+            total += float(np.sum(batch.column("close").to_numpy()))
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        f"{mode:<8} {rows:>10} rows {elapsed:>7.2f}s "
+        f"peak RSS {peak / 1024:>8.1f} MiB (+{(peak - baseline) / 1024:.1f} MiB)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--batch-size", type=int, default=65536)
+    parser.add_argument("--mode", choices=["table", "stream"])
+    parser.add_argument("--data")
+    args = parser.parse_args()
+
+    if args.mode:
+        _run(args.data, args.mode, args.batch_size)
+        return
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        _prepare(base_dir, args.months)
+        # ru_maxrss はプロセス単位なので、計測ごとに別プロセスで読む
+        for mode in ("table", "stream"):
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.ohlcv_stream_memory",
+                    "--mode",
+                    mode,
+                    "--data",
+                    base_dir,
+                    "--batch-size",
+                    str(args.batch_size),
+                ],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
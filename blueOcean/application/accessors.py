@@ -12,6 +12,12 @@ class IContextRuntimeDirectoryAccessor(metaclass=ABCMeta):
     def metrics(self) -> pd.DataFrame:
         raise NotImplementedError()
 
+    @property
+    @abstractmethod
+    def summary(self) -> dict[str, float] | None:
+        """実行が終わったときに書き出した集計値。まだ無ければ None"""
+        raise NotImplementedError()
+
     @abstractmethod
     def get_or_create_directory(self) -> Path:
         raise NotImplementedError()
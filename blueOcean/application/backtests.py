@@ -0,0 +1,508 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Iterable
+
+import backtrader as bt
+import pandas as pd
+from injector import inject
+
+from blueOcean.application.analyzers import StreamingAnalyzer
+from blueOcean.application.feeds import OhlcvColumnsFeed
+from blueOcean.application.usecases import AdvanceWalkForwardUsecase
+from blueOcean.application.vectorized import (
+    SignalStrategy,
+    VectorizedResult,
+    run_vectorized,
+)
+from blueOcean.domain.context import (
+    Context,
+    ContextId,
+    ContextStatus,
+    IContextRepository,
+)
+from blueOcean.domain.ohlcv import IOhlcvRepository, OhlcvColumns, Timeframe
+from blueOcean.domain.strategy import IStrategySnapshotRepository, StrategyArgs
+from blueOcean.infra.accessors import LocalContextRuntimeDirectoryAccessor
+from blueOcean.infra.caches import BacktestResultCache
+from blueOcean.infra.logging import logger
+from blueOcean.infra.shared import SharedOhlcvHandle, SharedOhlcvPlane, attached
+from blueOcean.shared.registries import StrategyRegistry
+
+# 結果の書き出し方を変えたら上げ、以前のキャッシュを使わないようにする
+_RESULT_VERSION = 1
+
+
+class BacktestTimeout(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BacktestRun:
+    """ワーカープロセスに渡す 1 コンテキスト分の実行内容 (pickle できる値だけを持つ)"""
+
+    context_id: str
+    strategy_name: str
+    strategy_args: StrategyArgs = field(default_factory=dict)
+    source: str = field(default="")
+    symbol: str = field(default="")
+    timeframe: Timeframe = field(default=Timeframe.ONE_MINUTE)
+    start_at: datetime | None = field(default=None)
+    end_at: datetime | None = field(default=None)
+    # 親プロセスが共有メモリに載せた足
+    data: SharedOhlcvHandle | None = field(default=None)
+    # 結果のキャッシュのキー。作れない場合は None
+    fingerprint: str | None = field(default=None)
+
+    @classmethod
+    def of(cls, context: Context, strategy_name: str) -> BacktestRun:
+        return cls(
+            context_id=context.id.value,
+            strategy_name=strategy_name,
+            strategy_args=dict(context.strategy_args),
+            source=context.source,
+            symbol=context.symbol,
+            timeframe=context.timeframe,
+            start_at=_bound(context.start_at),
+            end_at=_bound(context.end_at),
+        )
+
+
+def run_backtest(run: BacktestRun, columns: OhlcvColumns):
+    """1 コンテキストを実行し、指標を実行ディレクトリに書き出す"""
+    strategy_cls = StrategyRegistry.resolve(run.strategy_name)
+    if len(columns) == 0:
+        raise ValueError(f"No OHLCV for {run.source} {run.symbol}")
+
+    run_dir = _run_dir(run)
+    # やり直した場合に前回の指標へ追記しない
+    (run_dir / "metrics.csv").unlink(missing_ok=True)
+    (run_dir / "summary.json").unlink(missing_ok=True)
+
+    if issubclass(strategy_cls, SignalStrategy):
+        # シグナルを配列で出せる戦略はイベントループを回さずに計算する
+        result = run_vectorized(strategy_cls, columns, run.strategy_args)
+        _write_time_returns(run_dir, result)
+        _save_summary(
+            run_dir,
+            final_value=result.final_value,
+            total_return=result.final_value / result.starting_cash - 1,
+            max_drawdown=result.max_drawdown,
+            trades=result.trades,
+        )
+        return
+
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(OhlcvColumnsFeed.of(columns, run.timeframe))
+    cerebro.addstrategy(strategy_cls, **run.strategy_args)
+    cerebro.addanalyzer(bt.analyzers.TimeReturn, _name="time_return")
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
+    cerebro.addanalyzer(StreamingAnalyzer, path=str(run_dir))
+    strategy = cerebro.run()[0]
+    _write_summary(run_dir, cerebro.broker, strategy)
+
+
+def _fingerprint(run: BacktestRun, data_fingerprint: str) -> str | None:
+    strategy_cls = StrategyRegistry.resolve(run.strategy_name)
+    page_data = StrategyRegistry.page_data_of(strategy_cls)
+    try:
+        source = page_data.source if page_data else inspect.getsource(strategy_cls)
+    except OSError:
+        source = ""
+    # ソースが取れない戦略は変更を検知できないので毎回実行する
+    if not source:
+        return None
+    payload = {
+        "version": _RESULT_VERSION,
+        "strategy": source,
+        # 既定値のままの引数を省略した場合も同じ実行とみなす
+        "args": dict(StrategyRegistry.params_of(strategy_cls)) | run.strategy_args,
+        "data": data_fingerprint,
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _write_summary(run_dir: Path, broker: bt.BrokerBase, strategy: bt.Strategy):
+    drawdown = strategy.analyzers.drawdown.get_analysis()
+    trades = strategy.analyzers.trades.get_analysis()
+    _save_summary(
+        run_dir,
+        final_value=broker.getvalue(),
+        total_return=broker.getvalue() / broker.startingcash - 1,
+        max_drawdown=drawdown.get("max", {}).get("drawdown", 0.0),
+        trades=trades.get("total", {}).get("closed", 0),
+    )
+
+
+def _write_time_returns(run_dir: Path, result: VectorizedResult):
+    # StreamingAnalyzer と同じ形式で、TimeReturn の行だけを書く
+    timestamps = pd.DatetimeIndex(result.time).astype(str)
+    pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "analyzer": "time_return",
+            "key": timestamps,
+            "value": result.returns,
+        }
+    ).to_csv(run_dir / "metrics.csv", index=False)
+
+
+def _save_summary(run_dir: Path, **summary: float):
+    # 実行中に Web から読まれても書きかけを見せない
+    tmp = run_dir / "summary.json.tmp"
+    tmp.write_text(json.dumps(summary), "utf-8")
+    tmp.replace(run_dir / "summary.json")
+
+
+def _init_process(strategy_modules: tuple[str, ...]):
+    # spawn で起動した場合は戦略の登録からやり直す必要がある
+    for module in strategy_modules:
+        importlib.import_module(module)
+
+
+def _run_in_process(run: BacktestRun, timeout: float | None):
+    if timeout and hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with attached(run.data) as columns:
+            run_backtest(run, columns)
+    finally:
+        if timeout and hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _raise_timeout(signum, frame):
+    raise BacktestTimeout()
+
+
+class BacktestExecutor:
+    """未実行のコンテキストを取り出し、プロセスプールで 1 つずつ Cerebro を回す
+
+    Cerebro は GIL を手放さないので、コア数だけプロセスを並べて並列にする。
+    足はこのプロセスが期間ごとに 1 度だけ読んで共有メモリに置き、各ワーカーはコピーせずに読む。
+    戦略のソース・引数・足が以前の実行と同じなら、保存済みの結果を使って実行しない。
+    コンテキストの状態の読み書きはこのプロセスからだけ行う。
+    コンテキストが終わるたびに、学習期間の揃ったウォークフォワードの窓へ検証期間を追加する。
+    ワーカーが落ちてプールが使えなくなったら作り直し、実行中だったコンテキストは取り直させる。
+    """
+
+    POLL_INTERVAL = 1.0
+    HEARTBEAT_INTERVAL = 30.0
+    # 使われていない共有ブロックをこれ以上は持ち越さない
+    SHARED_CAPACITY = 4 << 30
+
+    @inject
+    def __init__(
+        self,
+        context_repository: IContextRepository,
+        snapshot_repository: IStrategySnapshotRepository,
+        ohlcv_repository: IOhlcvRepository,
+        result_cache: BacktestResultCache | None = None,
+        advance_walk_forward_usecase: AdvanceWalkForwardUsecase | None = None,
+    ):
+        self._context_repository = context_repository
+        self._snapshot_repository = snapshot_repository
+        self._ohlcv_repository = ohlcv_repository
+        self._result_cache = result_cache
+        self._advance_walk_forward_usecase = advance_walk_forward_usecase
+        # 実行中のコンテキストをどの実行器が持っているかの記録に使う
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._heartbeat_at = 0.0
+        self._broken = False
+        # プールが壊れた後、落とした実行を見分けるために 1 つずつ回す残りの数
+        self._isolated = 0
+
+    def run_once(
+        self,
+        workers: int | None = None,
+        timeout: float | None = None,
+        strategy_modules: Iterable[str] = (),
+    ) -> dict[str, ContextStatus]:
+        """未実行のコンテキストをすべて実行し、コンテキスト ID ごとの結果を返す
+
+        実行中に追加されたウォークフォワードの検証期間も、無くなるまで続けて実行する。
+        """
+        _init_process(tuple(strategy_modules))
+        results = {}
+        with self._plane() as plane:
+            executor = self._pool(workers, strategy_modules)
+            try:
+                while True:
+                    if self._broken:
+                        executor = self._renew(executor, workers, strategy_modules)
+                    limit = 1 if self._isolated else None
+                    running, finished = self._launch(executor, plane, limit, timeout)
+                    if not running and not finished and not self._broken:
+                        break
+                    while wait(running, timeout=self.POLL_INTERVAL).not_done:
+                        self._heartbeat()
+                    results |= finished | self._collect(plane, running)
+                    self._advance()
+            finally:
+                executor.shutdown()
+        return results
+
+    def run_forever(
+        self,
+        workers: int | None = None,
+        timeout: float | None = None,
+        strategy_modules: Iterable[str] = (),
+        stop: threading.Event | None = None,
+    ):
+        stop = stop or threading.Event()
+        workers = workers or os.cpu_count() or 1
+        # fingerprint に戦略のソースを使うので、このプロセスでも登録しておく
+        _init_process(tuple(strategy_modules))
+        running: dict[Future, BacktestRun] = {}
+        with self._plane() as plane:
+            executor = self._pool(workers, strategy_modules)
+            try:
+                while not stop.is_set():
+                    if self._broken:
+                        executor = self._renew(executor, workers, strategy_modules)
+                    # 空いているワーカーの分だけ取り、残りは他の実行器にも取れるようにしておく
+                    capacity = 1 if self._isolated else workers
+                    launched, finished = self._launch(
+                        executor, plane, capacity - len(running), timeout
+                    )
+                    running |= launched
+                    if running:
+                        wait(
+                            running,
+                            timeout=self.POLL_INTERVAL,
+                            return_when=FIRST_COMPLETED,
+                        )
+                    else:
+                        stop.wait(self.POLL_INTERVAL)
+                    self._heartbeat()
+                    if finished | self._collect(plane, running):
+                        self._advance()
+                while wait(running, timeout=self.POLL_INTERVAL).not_done:
+                    self._heartbeat()
+                if self._collect(plane, running):
+                    self._advance()
+            finally:
+                executor.shutdown()
+
+    def _plane(self) -> SharedOhlcvPlane:
+        return SharedOhlcvPlane(self._ohlcv_repository, self.SHARED_CAPACITY)
+
+    def _pool(
+        self, workers: int | None, strategy_modules: Iterable[str]
+    ) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_process,
+            initargs=(tuple(strategy_modules),),
+        )
+
+    def _renew(
+        self,
+        executor: ProcessPoolExecutor,
+        workers: int | None,
+        strategy_modules: Iterable[str],
+    ) -> ProcessPoolExecutor:
+        logger.warning("Backtest worker pool broken, starting a new one")
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._broken = False
+        return self._pool(workers, strategy_modules)
+
+    def _heartbeat(self):
+        now = time.monotonic()
+        if now - self._heartbeat_at < self.HEARTBEAT_INTERVAL:
+            return
+        self._heartbeat_at = now
+        try:
+            self._context_repository.heartbeat(self.name)
+        except Exception as e:
+            logger.error(f"Failed to record backtest heartbeat: {e}")
+
+    def _launch(
+        self,
+        executor: ProcessPoolExecutor,
+        plane: SharedOhlcvPlane,
+        limit: int | None,
+        timeout: float | None,
+    ) -> tuple[dict[Future, BacktestRun], dict[str, ContextStatus]]:
+        """投入した実行と、投入せずに終わったコンテキスト (キャッシュ済みか失敗) の結果を返す"""
+        if limit is not None and limit <= 0:
+            return {}, {}
+        contexts = self._context_repository.claim(limit, self.name)
+        snapshots = {
+            s.id: s
+            for s in self._snapshot_repository.find_by_ids(
+                *{c.strategy_snapshot_id for c in contexts}
+            )
+        }
+        running, finished, runs = {}, {}, []
+        for context in contexts:
+            # 1 つのコンテキストの誤りで、一緒に取った残りを実行中のまま残さない
+            try:
+                run = BacktestRun.of(
+                    context, snapshots[context.strategy_snapshot_id].name
+                )
+                run = dataclasses.replace(run, fingerprint=self._fingerprint(run))
+                if self._restore(run):
+                    logger.info(f"Backtest cached {run.context_id} {run.strategy_name}")
+                    status = ContextStatus.SUCCEEDED
+                    self._context_repository.update_status(context.id, status)
+                    finished[run.context_id] = status
+                    continue
+            except Exception as e:
+                finished[context.id.value] = self._fail(context.id.value, e)
+                continue
+            runs.append(run)
+
+        spans = self._acquire_spans(plane, runs)
+        try:
+            for run in runs:
+                if self._broken:
+                    # 壊れたプールには投入できないので、作り直してから取り直させる
+                    self._release(run, finished)
+                    continue
+                data = None
+                try:
+                    data = plane.acquire(
+                        run.source, run.symbol, run.timeframe, run.start_at, run.end_at
+                    )
+                    run = dataclasses.replace(run, data=data)
+                    logger.info(f"Backtest start {run.context_id} {run.strategy_name}")
+                    future = executor.submit(_run_in_process, run, timeout)
+                except Exception as e:
+                    if data is not None:
+                        plane.release(data)
+                    if isinstance(e, BrokenProcessPool):
+                        self._broken = True
+                        self._release(run, finished)
+                    else:
+                        finished[run.context_id] = self._fail(run.context_id, e)
+                    continue
+                running[future] = run
+        finally:
+            # 各実行がブロックを参照しているので、まとめて読んだ分はここで手放してよい
+            for span in spans:
+                plane.release(span)
+        return running, finished
+
+    def _acquire_spans(
+        self, plane: SharedOhlcvPlane, runs: list[BacktestRun]
+    ) -> list[SharedOhlcvHandle]:
+        """同じ銘柄の期間違いの実行 (ウォークフォワードの窓など) の足を、全期間まとめて 1 度だけ読む"""
+        series: dict[tuple, list[BacktestRun]] = {}
+        for run in runs:
+            if run.start_at is not None and run.end_at is not None:
+                series.setdefault((run.source, run.symbol, run.timeframe), []).append(
+                    run
+                )
+        spans = []
+        for (source, symbol, timeframe), group in series.items():
+            start_at = min(run.start_at for run in group)
+            end_at = max(run.end_at for run in group)
+            if all((r.start_at, r.end_at) == (start_at, end_at) for r in group):
+                continue
+            try:
+                spans.append(plane.acquire(source, symbol, timeframe, start_at, end_at))
+            except Exception as e:
+                # 実行ごとに読み直すだけなので止めない
+                logger.warning(f"Failed to share {source} {symbol}: {e!r}")
+        return spans
+
+    def _advance(self):
+        if self._advance_walk_forward_usecase is None:
+            return
+        try:
+            self._advance_walk_forward_usecase.execute_all()
+        except Exception as e:
+            # 次にコンテキストが終わったときに進め直せるので、実行器は止めない
+            logger.error(f"Failed to advance walk-forward: {e}")
+
+    def _fail(self, context_id: str, error: Exception) -> ContextStatus:
+        logger.error(f"Backtest failed {context_id}: {error!r}")
+        self._context_repository.update_status(
+            ContextId(value=context_id), ContextStatus.FAILED
+        )
+        return ContextStatus.FAILED
+
+    def _release(self, run: BacktestRun, results: dict[str, ContextStatus]):
+        """ワーカーが落ちて終わらなかった実行を取り直させる。諦めたものだけ結果に入れる"""
+        status = self._context_repository.release(ContextId(value=run.context_id))
+        logger.warning(f"Backtest worker lost {run.context_id}: {status.name}")
+        if status == ContextStatus.PENDING:
+            self._isolated += 1
+        else:
+            results[run.context_id] = status
+
+    def _fingerprint(self, run: BacktestRun) -> str | None:
+        if self._result_cache is None:
+            return None
+        data_fingerprint = self._ohlcv_repository.fingerprint(
+            run.symbol, run.source, run.timeframe, run.start_at, run.end_at
+        )
+        return _fingerprint(run, data_fingerprint)
+
+    def _restore(self, run: BacktestRun) -> bool:
+        if self._result_cache is None or run.fingerprint is None:
+            return False
+        return self._result_cache.restore(run.fingerprint, _run_dir(run))
+
+    def _collect(
+        self, plane: SharedOhlcvPlane, running: dict[Future, BacktestRun]
+    ) -> dict[str, ContextStatus]:
+        results = {}
+        for future, run in list(running.items()):
+            if not future.done():
+                continue
+            del running[future]
+            plane.release(run.data)
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                # どの実行がワーカーを落としたかは分からないので、実行中だったものはすべて取り直す
+                self._broken = True
+                self._release(run, results)
+                continue
+            self._isolated = max(self._isolated - 1, 0)
+            if error is None:
+                status = ContextStatus.SUCCEEDED
+                if self._result_cache is not None and run.fingerprint is not None:
+                    self._result_cache.store(run.fingerprint, _run_dir(run))
+            elif isinstance(error, BacktestTimeout):
+                logger.error(f"Backtest timed out {run.context_id}")
+                status = ContextStatus.TIMED_OUT
+            else:
+                logger.error(f"Backtest failed {run.context_id}: {error!r}")
+                status = ContextStatus.FAILED
+            self._context_repository.update_status(
+                ContextId(value=run.context_id), status
+            )
+            results[run.context_id] = status
+        return results
+
+
+def _run_dir(run: BacktestRun) -> Path:
+    return LocalContextRuntimeDirectoryAccessor(
+        ContextId(value=run.context_id)
+    ).get_or_create_directory()
+
+
+def _bound(value: datetime) -> datetime | None:
+    # 期間の指定なしは datetime.min / max で表される
+    if value in (datetime.min, datetime.max):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
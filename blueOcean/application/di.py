@@ -1,26 +1,45 @@
 from injector import InstanceProvider, Module, provider, singleton
 from peewee import SqliteDatabase
 
-from blueOcean.application.accessors import IExchangeSymbolAccessor
-from blueOcean.application.factories import IOhlcvFetcherFactory
+from blueOcean.application.accessors import (
+    IContextRuntimeDirectoryAccessor,
+    IExchangeSymbolAccessor,
+)
+from blueOcean.application.factories import IOhlcvFetcherFactory, IOhlcvStreamFactory
 from blueOcean.application.services import (
     BacktestExchangeService,
     CcxtExchangeService,
     IExchangeService,
 )
+from blueOcean.domain.backfill import IBackfillCheckpointRepository
 from blueOcean.domain.context import IContextRepository
+from blueOcean.domain.job import IOhlcvFetchJobQueue
 from blueOcean.domain.ohlcv import IOhlcvRepository
 from blueOcean.domain.session import ISessionRepository
 from blueOcean.domain.strategy import IStrategySnapshotRepository
-from blueOcean.infra.accessors import ExchangeSymbolDirectoryAccessor
+from blueOcean.domain.walkforward import IWalkForwardRepository
+from blueOcean.domain.watchlist import IWatchlistRepository
+from blueOcean.infra.accessors import (
+    ExchangeSymbolDirectoryAccessor,
+    LocalContextRuntimeDirectoryAccessor,
+)
+from blueOcean.infra.caches import (
+    BacktestResultCache,
+    ExchangeMarketCache,
+    OhlcvQueryCache,
+)
 from blueOcean.infra.database.entities import entities, proxy
 from blueOcean.infra.database.repositories import (
+    BackfillCheckpointRepository,
     ContextRepository,
+    OhlcvFetchJobQueue,
     OhlcvRepository,
     SessionRepository,
     StrategySnapshotRepository,
+    WalkForwardRepository,
+    WatchlistRepository,
 )
-from blueOcean.infra.factories import OhlcvFetcherFactory
+from blueOcean.infra.factories import OhlcvFetcherFactory, OhlcvStreamFactory
 
 
 class AppDatabaseModule(Module):
@@ -31,6 +50,9 @@ class AppDatabaseModule(Module):
             "./data/blueOcean.sqlite3",
             pragmas={
                 "foreign_keys": True,
+                # ワーカープロセスと Web プロセスが同じファイルを読み書きする
+                "journal_mode": "wal",
+                "busy_timeout": 10_000,
             },
         )
         proxy.initialize(db)
@@ -47,6 +69,29 @@ class AppModule(Module):
         binder.bind(IStrategySnapshotRepository, to=StrategySnapshotRepository)
         binder.bind(IOhlcvRepository, to=OhlcvRepository)
         binder.bind(IOhlcvFetcherFactory, to=OhlcvFetcherFactory)
+        binder.bind(IBackfillCheckpointRepository, to=BackfillCheckpointRepository)
+        binder.bind(IOhlcvFetchJobQueue, to=OhlcvFetchJobQueue)
+        binder.bind(IOhlcvStreamFactory, to=OhlcvStreamFactory)
+        binder.bind(IWatchlistRepository, to=WatchlistRepository)
+        binder.bind(IWalkForwardRepository, to=WalkForwardRepository)
+        binder.bind(
+            IContextRuntimeDirectoryAccessor, to=LocalContextRuntimeDirectoryAccessor
+        )
+
+    @singleton
+    @provider
+    def ohlcv_query_cache(self) -> OhlcvQueryCache:
+        return OhlcvQueryCache(disk_dir="./.cache/ohlcv")
+
+    @singleton
+    @provider
+    def backtest_result_cache(self) -> BacktestResultCache:
+        return BacktestResultCache(disk_dir="./.cache/backtests")
+
+    @singleton
+    @provider
+    def exchange_market_cache(self) -> ExchangeMarketCache:
+        return ExchangeMarketCache(disk_dir="./.cache/markets")
 
 
 class FetchModule(Module):
@@ -30,6 +30,7 @@ class ContextInfo:
     start_at: datetime
     end_at: datetime
     strategy_args: dict[str, object]
+    status: str = field(default="PENDING")
 
 
 @dataclass(frozen=True)
@@ -38,3 +39,102 @@ class TimeReturnPoint:
     analyzer: str
     key: str
     value: float
+
+
+@dataclass(frozen=True)
+class OhlcvCompletenessInfo:
+    source: str
+    symbol: str
+    first_at: datetime | None
+    last_at: datetime | None
+    expected: int
+    present: int
+    missing: int
+    unavailable: int
+    ratio: float
+    gaps: list[DatetimeRange]
+
+
+@dataclass(frozen=True)
+class OhlcvFetchJobInfo:
+    job_id: str
+    exchange: str
+    symbol: str
+    status: str
+    attempts: int
+    error: str | None
+    created_at: datetime | None
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+@dataclass(frozen=True)
+class WatchedSymbolInfo:
+    exchange: str
+    symbol: str
+    priority: int
+    interval_seconds: float
+    latest_at: datetime | None
+    # 現在時刻と最後に保存した足の差。まだ 1 本も無ければ None
+    lag_seconds: float | None
+    next_run_at: datetime | None
+    failures: int
+    last_error: str | None
+
+
+@dataclass(frozen=True)
+class BacktestResultInfo:
+    context_id: str
+    status: str
+    strategy_args: dict[str, object]
+    # 実行が終わるまでは None
+    final_value: float | None = field(default=None)
+    total_return: float | None = field(default=None)
+    max_drawdown: float | None = field(default=None)
+    trades: int | None = field(default=None)
+
+
+@dataclass(frozen=True)
+class WalkForwardWindowInfo:
+    index: int
+    in_sample: DatetimeRange
+    out_of_sample: DatetimeRange
+    in_sample_finished: int
+    in_sample_total: int
+    # 学習期間が終わるまでは None
+    best_args: dict[str, object] | None = field(default=None)
+    # 学習期間がすべて失敗して検証しない窓は "SKIPPED"
+    out_of_sample_status: str | None = field(default=None)
+    out_of_sample_return: float | None = field(default=None)
+
+
+@dataclass(frozen=True)
+class WalkForwardInfo:
+    session_id: str
+    rank_by: str
+    windows: list[WalkForwardWindowInfo]
+    # 終わった検証期間の TimeReturn を窓の順につないだもの
+    time_returns: list[TimeReturnPoint]
+
+
+@dataclass(frozen=True)
+class ConfidenceBandInfo:
+    metric: str
+    # 計算できなかった値は None
+    observed: float | None
+    low: float | None
+    median: float | None
+    high: float | None
+
+
+@dataclass(frozen=True)
+class RobustnessInfo:
+    context_id: str
+    method: str
+    # 再標本化したリターンの単位 ("daily" か "trades")
+    series: str
+    samples: int
+    paths: int
+    confidence: float
+    # 標本が足りなければ空
+    bands: list[ConfidenceBandInfo]
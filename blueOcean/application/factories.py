@@ -1,9 +1,19 @@
 from abc import ABCMeta, abstractmethod
 
-from blueOcean.domain.ohlcv import OhlcvFetcher
+from blueOcean.domain.ohlcv import AsyncOhlcvFetcher, OhlcvFetcher, OhlcvStream
 
 
 class IOhlcvFetcherFactory(metaclass=ABCMeta):
     @abstractmethod
     def create(self, exchange_name: str) -> OhlcvFetcher:
         raise NotImplementedError()
+
+    @abstractmethod
+    def create_async(self, exchange_name: str) -> AsyncOhlcvFetcher:
+        raise NotImplementedError()
+
+
+class IOhlcvStreamFactory(metaclass=ABCMeta):
+    @abstractmethod
+    def create(self, exchange_name: str) -> OhlcvStream:
+        raise NotImplementedError()
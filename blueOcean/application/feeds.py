@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import backtrader as bt
+import numpy as np
+from backtrader.linebuffer import LineBuffer
+
+from blueOcean.domain.ohlcv import OhlcvColumns, Timeframe
+
+# backtrader の日付数値 (0001-01-01 起点の日数) での 1970-01-01
+_EPOCH_NUM = bt.date2num(datetime(1970, 1, 1))
+_DAY_US = 86_400_000_000
+
+
+class OhlcvColumnsFeed(bt.feed.DataBase):
+    """``OhlcvColumns`` の配列を読む軽量なフィード
+
+    pandas を経由しないので、共有メモリ上の列もコピーせずにそのまま読める。
+    preload では列をまとめて Line に流し込み、足ごとの ``_load`` を回さない。
+    """
+
+    params = (("columns", None),)
+
+    @classmethod
+    def of(cls, columns: OhlcvColumns, timeframe: Timeframe, **kwargs):
+        return cls(
+            columns=columns,
+            timeframe=timeframe.to_backtrade(),
+            compression=1 if timeframe == Timeframe.ONE_DAY else int(timeframe),
+            **kwargs,
+        )
+
+    def start(self):
+        super().start()
+        columns: OhlcvColumns = self.p.columns
+        self._time = columns.time.astype("datetime64[us]", copy=False).view(np.int64)
+        self._values = [
+            columns.open,
+            columns.high,
+            columns.low,
+            columns.close,
+            columns.volume,
+        ]
+        self._index = 0
+
+    def preload(self):
+        # フィルタやタイムゾーン変換は足ごとに掛ける必要があるので、通常の読み込みに任せる
+        if self._filters or self._ffilters or self._tzinput or not self._unbounded():
+            return super().preload()
+
+        nums = _EPOCH_NUM + self._time / _DAY_US
+        values = self._values
+        keep = (nums >= self.fromdate) & (nums <= self.todate)
+        if not keep.all():
+            nums = nums[keep]
+            values = [v[keep] for v in values]
+        lines = self.lines
+        for line, array in (
+            (lines.datetime, nums),
+            (lines.open, values[0]),
+            (lines.high, values[1]),
+            (lines.low, values[2]),
+            (lines.close, values[3]),
+            (lines.volume, values[4]),
+            (lines.openinterest, np.zeros(len(nums))),
+        ):
+            line.array.frombytes(
+                np.ascontiguousarray(array, dtype=np.float64).view(np.uint8)
+            )
+        self._index = len(self._time)
+        self.home()
+
+    def _unbounded(self) -> bool:
+        # exactbars で長さに上限がある Line は array ではなく deque を持つ
+        return all(line.mode == LineBuffer.UnBounded for line in self.lines)
+
+    def _load(self):
+        i = self._index
+        if i >= len(self._time):
+            return False
+        self.lines.datetime[0] = _EPOCH_NUM + self._time[i] / _DAY_US
+        self.lines.open[0] = self._values[0][i]
+        self.lines.high[0] = self._values[1][i]
+        self.lines.low[0] = self._values[2][i]
+        self.lines.close[0] = self._values[3][i]
+        self.lines.volume[0] = self._values[4][i]
+        self.lines.openinterest[0] = 0.0
+        self._index = i + 1
+        return True
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal
+
+import numpy as np
+
+ResampleMethod = Literal["bootstrap", "shuffle"]
+
+METRICS = ("sharpe", "max_drawdown", "cagr")
+
+# 1 バッチの経路の数と要素数 (経路数 x 長さ) の上限。
+# メモリを数十 MB に抑えつつ、並列に回せるだけのバッチに分ける
+_BATCH_PATHS = 2_000
+_BATCH_ELEMENTS = 1 << 22
+
+
+def path_metrics(paths: np.ndarray, periods_per_year: float) -> dict[str, np.ndarray]:
+    """リターンの経路 (経路数 x 期間) ごとに Sharpe、最大ドローダウン、CAGR を計算する
+
+    最大ドローダウンは割合 (0.1 = 10%) で返す。ばらつきの無い経路の Sharpe は NaN になる。
+    """
+    paths = np.atleast_2d(paths)
+    length = paths.shape[1]
+    equity = np.cumprod(1.0 + paths, axis=1)
+    # 開始時点の資産 1.0 も高値に含める
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    std = paths.std(axis=1, ddof=1) if length > 1 else np.full(len(paths), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(
+            std > 0, paths.mean(axis=1) / std * np.sqrt(periods_per_year), np.nan
+        )
+        cagr = np.maximum(equity[:, -1], 0.0) ** (periods_per_year / length) - 1.0
+    return {
+        "sharpe": sharpe,
+        "max_drawdown": np.max(1.0 - equity / peak, axis=1),
+        "cagr": cagr,
+    }
+
+
+def resample(
+    values: np.ndarray,
+    count: int,
+    rng: np.random.Generator,
+    method: ResampleMethod = "bootstrap",
+    block_size: int = 1,
+) -> np.ndarray:
+    """``values`` から長さの同じ経路を ``count`` 本作る
+
+    ``bootstrap`` は ``block_size`` 本ずつの連続したブロックを復元抽出してつなぐ (移動ブロック法)。
+    ``shuffle`` は順番だけを並べ替えるので、合計は変わらずドローダウンだけがばらつく。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    length = len(values)
+    if method == "shuffle":
+        return rng.permuted(np.broadcast_to(values, (count, length)), axis=1)
+    if method != "bootstrap":
+        raise ValueError(f"Unsupported resample method: {method}")
+    block_size = min(max(block_size, 1), length)
+    blocks = -(-length // block_size)
+    starts = rng.integers(0, length - block_size + 1, size=(count, blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)).reshape(count, -1)
+    return values[indices[:, :length]]
+
+
+def simulate(
+    values: np.ndarray,
+    periods_per_year: float,
+    paths: int = 10_000,
+    method: ResampleMethod = "bootstrap",
+    block_size: int = 1,
+    seed: int | None = None,
+    workers: int | None = None,
+) -> dict[str, np.ndarray]:
+    """``paths`` 本の経路を作り、指標ごとの分布を返す
+
+    経路はバッチにまとめて配列で計算し、バッチはプロセスに分けて並列に回す。
+    ``seed`` が同じなら ``workers`` によらず同じ分布になる。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        raise ValueError("Need at least 2 returns to resample")
+    # バッチの分け方をワーカー数に依らせないことで、乱数の系列を固定する
+    batch = max(min(_BATCH_ELEMENTS // len(values), _BATCH_PATHS), 1)
+    sizes = [min(batch, paths - start) for start in range(0, paths, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [
+        (values, periods_per_year, size, method, block_size, s)
+        for size, s in zip(sizes, seeds)
+    ]
+
+    workers = min(workers or os.cpu_count() or 1, len(args))
+    if workers <= 1:
+        results = [_simulate_batch(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_simulate_batch, *zip(*args)))
+    return {name: np.concatenate([r[name] for r in results]) for name in METRICS}
+
+
+def confidence_band(
+    samples: np.ndarray, confidence: float = 0.9
+) -> tuple[float, float, float]:
+    """両側 ``confidence`` の区間の下端、中央値、上端。NaN は除く"""
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1")
+    tail = (1 - confidence) / 2 * 100
+    samples = samples[~np.isnan(samples)]
+    if not len(samples):
+        return (np.nan, np.nan, np.nan)
+    low, median, high = np.percentile(samples, [tail, 50, 100 - tail])
+    return (float(low), float(median), float(high))
+
+
+def _simulate_batch(
+    values: np.ndarray,
+    periods_per_year: float,
+    count: int,
+    method: ResampleMethod,
+    block_size: int,
+    seed: np.random.SeedSequence,
+) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return path_metrics(
+        resample(values, count, rng, method, block_size), periods_per_year
+    )
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import threading
 from abc import ABCMeta, abstractmethod
+from typing import Iterable
 
 import ccxt
+import pyarrow as pa
 from injector import inject
 
 from blueOcean.application.accessors import IExchangeSymbolAccessor
+from blueOcean.application.factories import IOhlcvStreamFactory
+from blueOcean.domain.ohlcv import IOhlcvRepository, Ohlcv, OhlcvStream
+from blueOcean.infra.caches import ExchangeMarketCache
+from blueOcean.infra.logging import logger
 
 
 class IExchangeService(metaclass=ABCMeta):
@@ -19,16 +27,17 @@ class IExchangeService(metaclass=ABCMeta):
 
 
 class CcxtExchangeService(IExchangeService):
+    @inject
+    def __init__(self, markets: ExchangeMarketCache):
+        self._markets = markets
+
     def fetchable_exchanges(self) -> list[str]:
         return list(ccxt.exchanges)
 
     def symbols_for(self, exchange_name: str) -> list[str]:
-        exchange_cls = getattr(ccxt, exchange_name, None)
-        if exchange_cls is None:
+        if getattr(ccxt, exchange_name, None) is None:
             return []
-        exchange = exchange_cls()
-        markets = exchange.load_markets()
-        return sorted(markets.keys())
+        return self._markets.symbols(exchange_name)
 
 
 class BacktestExchangeService(IExchangeService):
@@ -41,3 +50,221 @@ class BacktestExchangeService(IExchangeService):
 
     def symbols_for(self, exchange_name: str) -> list[str]:
         return sorted(self._accessor.symbols_for(exchange_name))
+
+
+class OhlcvCompactionService:
+    """保存済み OHLCV のフラグメントを月ごとにまとめる
+
+    ``run_once`` で 1 回だけ、``start`` でバックグラウンドスレッドから定期的に実行する。
+    """
+
+    @inject
+    def __init__(
+        self,
+        repository: IOhlcvRepository,
+        accessor: IExchangeSymbolAccessor,
+    ):
+        self._repository = repository
+        self._accessor = accessor
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self, source: str | None = None, symbol: str | None = None) -> int:
+        compacted = 0
+        for exchange in [source] if source else self._accessor.exchanges:
+            symbols = [symbol] if symbol else self._accessor.symbols_for(exchange)
+            for s in symbols:
+                try:
+                    compacted += self._repository.compact(exchange, s)
+                except Exception as e:
+                    logger.warning(f"Compaction failed {exchange} {s}: {e}")
+        return compacted
+
+    def start(self, interval_seconds: float = 600):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(interval_seconds,),
+            name="ohlcv-compaction",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self, interval_seconds: float):
+        while not self._stop.is_set():
+            compacted = self.run_once()
+            logger.info(f"Compaction finished ({compacted} partitions)")
+            self._stop.wait(interval_seconds)
+
+
+class OhlcvStreamIngester:
+    """購読した足をメモリに溜め、確定した足を小分けにストアへ追記する
+
+    確定した足は ``FLUSH_ROWS`` 本溜まるか ``FLUSH_INTERVAL`` 秒ごとに ``save_batch`` する。
+    形成中の足と未保存の確定足は ``latest`` / ``tail`` で読めるほか、``PUBLISH_INTERVAL`` 秒ごとに
+    ``publish_partial`` して、ストアの読み手 (Web やバックテスト) の結果にも混ぜる。
+    """
+
+    FLUSH_INTERVAL = 5.0
+    FLUSH_ROWS = 1000
+    PUBLISH_INTERVAL = 1.0
+
+    @inject
+    def __init__(
+        self,
+        stream_factory: IOhlcvStreamFactory,
+        repository: IOhlcvRepository,
+    ):
+        self._stream_factory = stream_factory
+        self._repository = repository
+        self._lock = threading.Lock()
+        self._partials: dict[tuple[str, str], Ohlcv] = {}
+        self._closed: dict[tuple[str, str], list[Ohlcv]] = {}
+        # 保存中の足。書き終わるまでは読み手から見えるように残す
+        self._flushing: dict[tuple[str, str], list[Ohlcv]] = {}
+        # 前回の publish から足が変わったシリーズ
+        self._dirty: set[tuple[str, str]] = set()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop: asyncio.Event | None = None
+
+    def latest(self, source: str, symbol: str) -> Ohlcv | None:
+        """形成中の足"""
+        with self._lock:
+            return self._partials.get((source, symbol))
+
+    def tail(self, source: str, symbol: str) -> pa.Table:
+        """ストアにまだ無い確定足と形成中の足"""
+        key = (source, symbol)
+        with self._lock:
+            bars = self._flushing.get(key, []) + self._closed.get(key, [])
+            if key in self._partials:
+                bars.append(self._partials[key])
+        return Ohlcv.to_arrow(bars)
+
+    def start(self, exchange_name: str, symbols: Iterable[str]):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self.run(exchange_name, symbols)),
+            name="ohlcv-stream",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        if self._loop and self._stop:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread:
+            self._thread.join(timeout)
+
+    async def run(self, exchange_name: str, symbols: Iterable[str]):
+        """全シンボルの購読が終わるか ``stop`` されるまで取り込む"""
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        stream = self._stream_factory.create(exchange_name)
+        watchers = [
+            asyncio.create_task(self._watch(stream, exchange_name, symbol))
+            for symbol in symbols
+        ]
+        flusher = asyncio.create_task(self._flush_periodically())
+        stopped = asyncio.create_task(self._stop.wait())
+        try:
+            await asyncio.wait(
+                [asyncio.gather(*watchers), stopped],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            for task in [*watchers, flusher, stopped]:
+                task.cancel()
+            await asyncio.gather(*watchers, flusher, stopped, return_exceptions=True)
+            await asyncio.to_thread(self.flush)
+            # 止めた後も形成中の足が読み手に残り続けないよう消しておく
+            await asyncio.to_thread(self._unpublish)
+            await stream.close()
+
+    async def _watch(self, stream: OhlcvStream, source: str, symbol: str):
+        key = (source, symbol)
+        async for bar in stream.watch(symbol):
+            with self._lock:
+                partial = self._partials.get(key)
+                if partial is not None:
+                    if bar.time < partial.time:
+                        continue
+                    if bar.time > partial.time:
+                        self._closed.setdefault(key, []).append(partial)
+                self._partials[key] = bar
+                self._dirty.add(key)
+
+    async def _flush_periodically(self):
+        elapsed = published = 0.0
+        step = min(self.FLUSH_INTERVAL, self.PUBLISH_INTERVAL, 0.1)
+        while True:
+            await asyncio.sleep(step)
+            elapsed += step
+            published += step
+            if elapsed >= self.FLUSH_INTERVAL or self._closed_rows() >= self.FLUSH_ROWS:
+                await asyncio.to_thread(self.flush)
+                elapsed = 0.0
+            if published >= self.PUBLISH_INTERVAL:
+                await asyncio.to_thread(self.publish)
+                published = 0.0
+
+    def publish(self) -> int:
+        """前回から変わったシリーズの未保存の足をストアの読み手に見せ、そのシリーズ数を返す"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        published = 0
+        for source, symbol in dirty:
+            try:
+                self._repository.publish_partial(
+                    self.tail(source, symbol), source, symbol
+                )
+                published += 1
+            except Exception as e:
+                logger.warning(f"Stream publish failed, retry later: {e}")
+                with self._lock:
+                    self._dirty.add((source, symbol))
+        return published
+
+    def _unpublish(self):
+        with self._lock:
+            keys = list(self._partials)
+            self._dirty.clear()
+        for source, symbol in keys:
+            try:
+                self._repository.publish_partial(Ohlcv.to_arrow([]), source, symbol)
+            except Exception as e:
+                logger.warning(f"Stream unpublish failed: {e}")
+
+    def _closed_rows(self) -> int:
+        with self._lock:
+            return sum(len(bars) for bars in self._closed.values())
+
+    def flush(self) -> int:
+        """溜まっている確定足を保存し、保存した本数を返す"""
+        with self._lock:
+            self._flushing, self._closed = self._closed, {}
+        saved = 0
+        try:
+            for (source, symbol), bars in self._flushing.items():
+                self._repository.save_batch(Ohlcv.to_arrow(bars), source, symbol)
+                saved += len(bars)
+        except Exception as e:
+            logger.warning(f"Stream flush failed, retry later: {e}")
+            with self._lock:
+                # 失敗した分は次回に回す。その間に確定した足より前に戻す
+                for key, bars in self._flushing.items():
+                    self._closed[key] = bars + self._closed.get(key, [])
+        with self._lock:
+            # 保存し終えた足を publish し直して、_latest.json から外す
+            self._dirty.update(self._flushing)
+            self._flushing = {}
+        return saved
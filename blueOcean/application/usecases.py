@@ -1,16 +1,68 @@
 from __future__ import annotations
 
-from datetime import datetime
+import asyncio
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from typing import Iterable, get_args
 
-from injector import inject
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from injector import AssistedBuilder, inject
 
-from blueOcean.application.dto import ContextInfo, SessionInfo
+from blueOcean.application.accessors import IContextRuntimeDirectoryAccessor
+from blueOcean.application.dto import (
+    BacktestResultInfo,
+    ConfidenceBandInfo,
+    ContextInfo,
+    DatetimeRange,
+    OhlcvCompletenessInfo,
+    OhlcvFetchJobInfo,
+    RobustnessInfo,
+    SessionInfo,
+    TimeReturnPoint,
+    WalkForwardInfo,
+    WalkForwardWindowInfo,
+    WatchedSymbolInfo,
+)
 from blueOcean.application.factories import IOhlcvFetcherFactory
+from blueOcean.application.robustness import (
+    METRICS,
+    ResampleMethod,
+    confidence_band,
+    path_metrics,
+    simulate,
+)
 from blueOcean.application.services import IExchangeService
-from blueOcean.domain.context import Context, IContextRepository
+from blueOcean.domain.backfill import (
+    BackfillShard,
+    IBackfillCheckpointRepository,
+    plan_shards,
+)
+from blueOcean.domain.context import (
+    Context,
+    ContextId,
+    ContextStatus,
+    IContextRepository,
+)
+from blueOcean.domain.job import IOhlcvFetchJobQueue, JobId, OhlcvFetchJob
 from blueOcean.domain.ohlcv import IOhlcvRepository, Timeframe
 from blueOcean.domain.session import ISessionRepository, Session, SessionId
-from blueOcean.domain.strategy import IStrategySnapshotRepository, StrategySnapshot
+from blueOcean.domain.strategy import (
+    IStrategySnapshotRepository,
+    ParameterType,
+    StrategySnapshot,
+    expand_grid,
+)
+from blueOcean.domain.walkforward import (
+    IWalkForwardRepository,
+    WalkForward,
+    WalkForwardWindow,
+    split_windows,
+)
+from blueOcean.domain.watchlist import IWatchlistRepository, WatchedSymbol
+from blueOcean.infra.logging import logger
+from blueOcean.shared.registries import StrategyRegistry
 
 
 class FetchOhlcvUsecase:
@@ -23,15 +75,386 @@ class FetchOhlcvUsecase:
         self._fetcher_factory = fetcher_factory
         self._ohlcv_repository = ohlcv_repository
 
-    def execute(self, exchange_name: str, symbol: str):
+    def execute(
+        self,
+        exchange_name: str,
+        symbol: str,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ):
+        """足りない区間を取得する。1m 以外は取引所の足を直接取得し、別シリーズに保存する"""
         # TODO: スレッドに逃がすべきな印象
-        latest_at = self._ohlcv_repository.get_latest_timestamp(
-            exchange_name, symbol
-        )
         fetcher = self._fetcher_factory.create(exchange_name)
+        until_at = _current_bar(timeframe)
+        for start_at, end_at in self._ohlcv_repository.find_gaps(
+            exchange_name, symbol, fetcher.longest_since, until_at, timeframe
+        ):
+            requested_at = start_at
+            for batch in fetcher.fetch_range(symbol, start_at, end_at, timeframe):
+                if batch.num_rows:
+                    self._ohlcv_repository.save_batch(
+                        batch, exchange_name, symbol, timeframe
+                    )
+                _mark_skipped(
+                    self._ohlcv_repository,
+                    exchange_name,
+                    symbol,
+                    requested_at,
+                    end_at,
+                    batch,
+                    timeframe,
+                )
+                if batch.num_rows:
+                    requested_at = _last_time(batch) + timeframe.to_timedelta()
+
+    def execute_many(
+        self,
+        exchange_name: str,
+        symbols: Iterable[str],
+        concurrency: int = 8,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ) -> list[str]:
+        """同じ取引所の複数シンボルを並行に取得し、取得に失敗したシンボルを返す
+
+        取得は ``concurrency`` シンボルずつ並行に行い、保存は別タスクで順に行うので
+        ページの取得と書き込みが重なる。
+        """
+        return asyncio.run(
+            self._execute_many(exchange_name, list(symbols), concurrency, timeframe)
+        )
+
+    async def _execute_many(
+        self,
+        exchange_name: str,
+        symbols: list[str],
+        concurrency: int,
+        timeframe: Timeframe,
+    ) -> list[str]:
+        fetcher = self._fetcher_factory.create_async(exchange_name)
+        until_at = _current_bar(timeframe)
+        # 書き込みが詰まったら取得側を待たせる
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        semaphore = asyncio.Semaphore(concurrency)
+        failed: list[str] = []
+
+        async def fetch(symbol: str):
+            async with semaphore:
+                try:
+                    gaps = await asyncio.to_thread(
+                        self._ohlcv_repository.find_gaps,
+                        exchange_name,
+                        symbol,
+                        fetcher.longest_since,
+                        until_at,
+                        timeframe,
+                    )
+                    for start_at, end_at in gaps:
+                        requested_at = start_at
+                        async for batch in fetcher.fetch_range(
+                            symbol, start_at, end_at, timeframe
+                        ):
+                            if batch.num_rows:
+                                await queue.put(
+                                    partial(
+                                        self._ohlcv_repository.save_batch,
+                                        batch,
+                                        exchange_name,
+                                        symbol,
+                                        timeframe,
+                                    )
+                                )
+                            await queue.put(
+                                partial(
+                                    _mark_skipped,
+                                    self._ohlcv_repository,
+                                    exchange_name,
+                                    symbol,
+                                    requested_at,
+                                    end_at,
+                                    batch,
+                                    timeframe,
+                                )
+                            )
+                            if batch.num_rows:
+                                requested_at = (
+                                    _last_time(batch) + timeframe.to_timedelta()
+                                )
+                except Exception as e:
+                    logger.error(f"Failed to fetch {exchange_name} {symbol}: {e}")
+                    failed.append(symbol)
+
+        async def write():
+            # 区間の記録は同じキューに積み、その区間の保存が終わった後に行う
+            while (job := await queue.get()) is not None:
+                await asyncio.to_thread(job)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(write())
+                await asyncio.gather(*(fetch(s) for s in symbols))
+                await queue.put(None)
+        finally:
+            await fetcher.close()
+        return failed
+
+
+class BackfillOhlcvUsecase:
+    """1 シンボルの履歴を期間で分割し、並行に取得する
+
+    分割した区間 (shard) ごとに保存済みの位置を記録するので、途中で落ちても
+    次回は各区間の続きから再開する。
+    """
+
+    @inject
+    def __init__(
+        self,
+        fetcher_factory: IOhlcvFetcherFactory,
+        ohlcv_repository: IOhlcvRepository,
+        checkpoint_repository: IBackfillCheckpointRepository,
+    ):
+        self._fetcher_factory = fetcher_factory
+        self._ohlcv_repository = ohlcv_repository
+        self._checkpoint_repository = checkpoint_repository
+
+    def execute(
+        self,
+        exchange_name: str,
+        symbol: str,
+        shards: int = 8,
+        concurrency: int = 4,
+        until_at: datetime | None = None,
+    ) -> list[BackfillShard]:
+        return asyncio.run(
+            self._execute(exchange_name, symbol, shards, concurrency, until_at)
+        )
+
+    async def _execute(
+        self,
+        exchange_name: str,
+        symbol: str,
+        shards: int,
+        concurrency: int,
+        until_at: datetime | None,
+    ) -> list[BackfillShard]:
+        fetcher = self._fetcher_factory.create_async(exchange_name)
+        try:
+            plan = self._plan(fetcher, exchange_name, symbol, shards, until_at)
+            pending = [s for s in plan if not s.done]
+            if pending:
+                logger.info(
+                    f"Backfill {exchange_name} {symbol}: "
+                    f"{len(pending)}/{len(plan)} shards pending"
+                )
+                plan = await self._run(fetcher, pending, concurrency)
+        finally:
+            await fetcher.close()
+
+        if all(s.done for s in plan):
+            self._checkpoint_repository.delete_by_symbol(exchange_name, symbol)
+        return plan
+
+    def _plan(
+        self,
+        fetcher,
+        exchange_name: str,
+        symbol: str,
+        shards: int,
+        until_at: datetime | None,
+    ) -> list[BackfillShard]:
+        saved = self._checkpoint_repository.find_by_symbol(exchange_name, symbol)
+        if saved:
+            return saved
+        end_at = until_at or _current_minute()
+        # 取得済み・取得不能と分かっている区間を除いた穴だけを、長さに応じて分割する
+        gaps = self._ohlcv_repository.find_gaps(
+            exchange_name, symbol, fetcher.longest_since, end_at
+        )
+        total = sum((e - s for s, e in gaps), timedelta())
+        plan = []
+        for gap_start, gap_end in gaps:
+            count = max(1, round(shards * ((gap_end - gap_start) / total)))
+            plan.extend(plan_shards(exchange_name, symbol, gap_start, gap_end, count))
+        self._checkpoint_repository.save(*plan)
+        return plan
+
+    async def _run(
+        self,
+        fetcher,
+        shards: list[BackfillShard],
+        concurrency: int,
+    ) -> list[BackfillShard]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        semaphore = asyncio.Semaphore(concurrency)
+        state = {s.start_at: s for s in shards}
+
+        async def fetch(shard: BackfillShard):
+            async with semaphore:
+                try:
+                    async for batch in fetcher.fetch_range(
+                        shard.symbol, shard.resume_at, shard.end_at
+                    ):
+                        await queue.put((shard.start_at, batch))
+                except Exception as e:
+                    logger.error(
+                        f"Backfill shard failed {shard.source} {shard.symbol} "
+                        f"{shard.start_at}~{shard.end_at}: {e}"
+                    )
+                    return
+                await queue.put((shard.start_at, None))
+
+        async def write():
+            # 保存が終わってからチェックポイントを進める
+            while (item := await queue.get()) is not None:
+                key, batch = item
+                shard = state[key]
+                if batch is None:
+                    shard = shard.complete()
+                else:
+                    if batch.num_rows:
+                        await asyncio.to_thread(
+                            self._ohlcv_repository.save_batch,
+                            batch,
+                            shard.source,
+                            shard.symbol,
+                        )
+                    await asyncio.to_thread(
+                        _mark_skipped,
+                        self._ohlcv_repository,
+                        shard.source,
+                        shard.symbol,
+                        shard.resume_at,
+                        shard.end_at,
+                        batch,
+                    )
+                    if batch.num_rows:
+                        shard = shard.advance(_last_time(batch))
+                state[key] = shard
+                self._checkpoint_repository.save(shard)
+
+        async with asyncio.TaskGroup() as group:
+            group.create_task(write())
+            await asyncio.gather(*(fetch(s) for s in shards))
+            await queue.put(None)
+
+        return sorted(
+            self._checkpoint_repository.find_by_symbol(
+                shards[0].source, shards[0].symbol
+            ),
+            key=lambda s: s.start_at,
+        )
+
+
+class FetchOhlcvCompletenessUsecase:
+    @inject
+    def __init__(self, ohlcv_repository: IOhlcvRepository):
+        self._ohlcv_repository = ohlcv_repository
+
+    def execute(self, exchange_name: str, *symbols: str) -> list[OhlcvCompletenessInfo]:
+        result = []
+        for symbol in symbols:
+            c = self._ohlcv_repository.get_completeness(exchange_name, symbol)
+            result.append(
+                OhlcvCompletenessInfo(
+                    source=c.source,
+                    symbol=c.symbol,
+                    first_at=c.first_at,
+                    last_at=c.last_at,
+                    expected=c.expected,
+                    present=c.present,
+                    missing=c.missing,
+                    unavailable=c.unavailable,
+                    ratio=c.ratio,
+                    gaps=[DatetimeRange(start, end) for start, end in c.gaps],
+                )
+            )
+        return result
+
+
+class EnqueueOhlcvFetchUsecase:
+    @inject
+    def __init__(self, job_queue: IOhlcvFetchJobQueue):
+        self._job_queue = job_queue
+
+    def execute(self, exchange_name: str, symbol: str) -> OhlcvFetchJobInfo:
+        return _to_job_info(self._job_queue.enqueue(exchange_name, symbol))
+
+
+class FetchOhlcvFetchJobsUsecase:
+    @inject
+    def __init__(self, job_queue: IOhlcvFetchJobQueue):
+        self._job_queue = job_queue
+
+    def execute(self, *job_ids: str) -> list[OhlcvFetchJobInfo]:
+        if len(job_ids) == 0:
+            jobs = self._job_queue.find_recent()
+        else:
+            found = (self._job_queue.find_by_id(JobId(value=v)) for v in job_ids)
+            jobs = [job for job in found if job is not None]
+        return [_to_job_info(job) for job in jobs]
+
+
+class WatchSymbolsUsecase:
+    @inject
+    def __init__(self, watchlist: IWatchlistRepository):
+        self._watchlist = watchlist
 
-        for batch in fetcher.fetch_ohlcv(symbol, latest_at):
-            self._ohlcv_repository.save(batch, exchange_name, symbol)
+    def execute(
+        self,
+        exchange_name: str,
+        *symbols: str,
+        priority: int = 0,
+        interval: timedelta = timedelta(minutes=5),
+    ):
+        self._watchlist.save(
+            *(
+                WatchedSymbol(exchange_name, s, priority=priority, interval=interval)
+                for s in symbols
+            )
+        )
+
+
+class UnwatchSymbolsUsecase:
+    @inject
+    def __init__(self, watchlist: IWatchlistRepository):
+        self._watchlist = watchlist
+
+    def execute(self, exchange_name: str, *symbols: str):
+        for symbol in symbols:
+            self._watchlist.delete(exchange_name, symbol)
+
+
+class FetchWatchlistUsecase:
+    @inject
+    def __init__(
+        self,
+        watchlist: IWatchlistRepository,
+        ohlcv_repository: IOhlcvRepository,
+    ):
+        self._watchlist = watchlist
+        self._ohlcv_repository = ohlcv_repository
+
+    def execute(self) -> list[WatchedSymbolInfo]:
+        now = datetime.now(UTC)
+        result = []
+        for w in self._watchlist.find_all():
+            latest_at = self._ohlcv_repository.get_latest_timestamp(
+                w.exchange, w.symbol
+            )
+            result.append(
+                WatchedSymbolInfo(
+                    exchange=w.exchange,
+                    symbol=w.symbol,
+                    priority=w.priority,
+                    interval_seconds=w.interval.total_seconds(),
+                    latest_at=latest_at,
+                    lag_seconds=(
+                        (now - latest_at).total_seconds() if latest_at else None
+                    ),
+                    next_run_at=w.next_run_at,
+                    failures=w.failures,
+                    last_error=w.last_error,
+                )
+            )
+        return result
 
 
 class FetchExchangeSymbolsUsecase:
@@ -88,6 +511,7 @@ class FetchSessionContextsUsecase:
                 start_at=c.start_at,
                 end_at=c.end_at,
                 strategy_args=c.strategy_args,
+                status=c.status.name,
             )
             for c in contexts
         ]
@@ -129,9 +553,578 @@ class LaunchBacktestSessionUsecase:
             start_at=start_at,
             end_at=end_at,
         )
-        self._context_repository.save(context)
-
         session = Session(name=session_name or "")
         self._session_repository.save(session)
+        self._context_repository.save_in_session(session.id, context)
+
+        return session.id.value
+
+
+class LaunchParameterSweepUsecase:
+    """パラメータの候補値の組み合わせごとにコンテキストを作り、1 つのセッションにまとめる
+
+    実行は ``BacktestExecutor`` が未実行のコンテキストとして拾って並列に回す。
+    """
+
+    MAX_RUNS = 20_000
+
+    @inject
+    def __init__(
+        self,
+        session_repository: ISessionRepository,
+        context_repository: IContextRepository,
+        snapshot_repository: IStrategySnapshotRepository,
+    ):
+        self._session_repository = session_repository
+        self._context_repository = context_repository
+        self._snapshot_repository = snapshot_repository
+
+    def execute(
+        self,
+        *,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe,
+        strategy_name: str,
+        grid: dict[str, list[ParameterType]],
+        start_at: datetime,
+        end_at: datetime,
+        session_name: str | None = None,
+    ) -> str:
+        combinations = expand_grid(StrategyRegistry.params_of(strategy_name), grid)
+        if len(combinations) > self.MAX_RUNS:
+            raise ValueError(
+                f"Too many combinations: {len(combinations)} > {self.MAX_RUNS}"
+            )
+        snapshot = StrategySnapshot(name=strategy_name)
+        self._snapshot_repository.save(snapshot)
+
+        session = Session(name=session_name or f"{strategy_name} sweep")
+        self._session_repository.save(session)
+        self._context_repository.save_in_session(
+            session.id,
+            *[
+                Context(
+                    strategy_snapshot_id=snapshot.id,
+                    strategy_args=args,
+                    source=source,
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    start_at=start_at,
+                    end_at=end_at,
+                )
+                for args in combinations
+            ],
+        )
+        logger.info(f"Launched {len(combinations)} contexts in {session.id.value}")
+        return session.id.value
+
+
+class FetchBacktestResultsUsecase:
+    """セッション内のコンテキストの結果を ``rank_by`` の良い順に並べる
+
+    終わっていないコンテキストは後ろに回すので、実行が進むたびに呼べば順位表が埋まっていく。
+    """
+
+    RANK_KEYS = ("total_return", "final_value", "max_drawdown", "trades")
+
+    @inject
+    def __init__(
+        self,
+        repository: IContextRepository,
+        accessor_builder: AssistedBuilder[IContextRuntimeDirectoryAccessor],
+    ):
+        self._repository = repository
+        self._accessor_builder = accessor_builder
+
+    def execute(
+        self, session_id: str, rank_by: str = "total_return"
+    ) -> list[BacktestResultInfo]:
+        contexts = self._repository.find_by_session_id(SessionId(value=session_id))
+        return _ranked(
+            [_result_info(context, self._accessor_builder) for context in contexts],
+            rank_by,
+        )
 
+
+class LaunchWalkForwardUsecase:
+    """期間を学習期間と検証期間の窓に分け、全窓の学習期間のスイープを 1 つのセッションにまとめる
+
+    学習期間のコンテキストは窓をまたいで ``BacktestExecutor`` がまとめて並列に回す。
+    検証期間は ``AdvanceWalkForwardUsecase`` が学習の終わった窓から追加する。
+    """
+
+    @inject
+    def __init__(
+        self,
+        session_repository: ISessionRepository,
+        context_repository: IContextRepository,
+        snapshot_repository: IStrategySnapshotRepository,
+        walk_forward_repository: IWalkForwardRepository,
+    ):
+        self._session_repository = session_repository
+        self._context_repository = context_repository
+        self._snapshot_repository = snapshot_repository
+        self._walk_forward_repository = walk_forward_repository
+
+    def execute(
+        self,
+        *,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe,
+        strategy_name: str,
+        grid: dict[str, list[ParameterType]],
+        start_at: datetime,
+        end_at: datetime,
+        in_sample: timedelta,
+        out_of_sample: timedelta,
+        anchored: bool = False,
+        rank_by: str = "total_return",
+        session_name: str | None = None,
+    ) -> str:
+        if rank_by not in FetchBacktestResultsUsecase.RANK_KEYS:
+            raise ValueError(f"Unsupported rank key: {rank_by}")
+        windows = split_windows(start_at, end_at, in_sample, out_of_sample, anchored)
+        combinations = expand_grid(StrategyRegistry.params_of(strategy_name), grid)
+        runs = len(windows) * len(combinations)
+        if runs > LaunchParameterSweepUsecase.MAX_RUNS:
+            raise ValueError(
+                f"Too many runs: {runs} > {LaunchParameterSweepUsecase.MAX_RUNS}"
+            )
+        snapshot = StrategySnapshot(name=strategy_name)
+        self._snapshot_repository.save(snapshot)
+
+        contexts = []
+        for window in windows:
+            for args in combinations:
+                context = Context(
+                    strategy_snapshot_id=snapshot.id,
+                    strategy_args=args,
+                    source=source,
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    start_at=window.in_sample_start_at,
+                    end_at=window.in_sample_end_at - _LAST_INSTANT,
+                )
+                window.in_sample_context_ids.append(context.id)
+                contexts.append(context)
+
+        session = Session(name=session_name or f"{strategy_name} walk-forward")
+        self._session_repository.save(session)
+        self._context_repository.save_in_session(session.id, *contexts)
+        self._walk_forward_repository.save(
+            WalkForward(session_id=session.id, rank_by=rank_by, windows=windows)
+        )
+        logger.info(
+            f"Launched walk-forward {session.id.value}: "
+            f"{len(windows)} windows x {len(combinations)} combinations"
+        )
         return session.id.value
+
+
+class AdvanceWalkForwardUsecase:
+    """学習期間のコンテキストがすべて終わった窓について、最良のパラメータで検証期間を追加する
+
+    学習期間がすべて失敗した窓は、検証しない窓として記録する。
+    何度呼んでもよく、進められる窓が無ければ何もしない。``BacktestExecutor`` が
+    コンテキストを終えるたびに呼ぶ。
+    """
+
+    @inject
+    def __init__(
+        self,
+        context_repository: IContextRepository,
+        walk_forward_repository: IWalkForwardRepository,
+        accessor_builder: AssistedBuilder[IContextRuntimeDirectoryAccessor],
+    ):
+        self._context_repository = context_repository
+        self._walk_forward_repository = walk_forward_repository
+        self._accessor_builder = accessor_builder
+
+    def execute(self, session_id: str) -> int:
+        """追加した検証期間のコンテキストの数を返す"""
+        walk_forward = self._walk_forward_repository.find_by_session_id(
+            SessionId(value=session_id)
+        )
+        if walk_forward is None:
+            return 0
+        return self._advance(walk_forward)
+
+    def execute_all(self) -> int:
+        """検証期間の決まっていない窓を持つすべてのウォークフォワードを進める"""
+        return sum(
+            self._advance(walk_forward)
+            for walk_forward in self._walk_forward_repository.find_unsettled()
+        )
+
+    def _advance(self, walk_forward: WalkForward) -> int:
+        launched = 0
+        for window in walk_forward.windows:
+            if window.settled:
+                continue
+            contexts = self._context_repository.find_by_ids(
+                *window.in_sample_context_ids
+            )
+            if not contexts or any(not _finished(c) for c in contexts):
+                continue
+            context = self._out_of_sample_context(
+                window, contexts, walk_forward.rank_by
+            )
+            if context is None:
+                # 学習期間がすべて失敗した窓は検証しない
+                if self._walk_forward_repository.skip(
+                    walk_forward.session_id, window.index
+                ):
+                    logger.warning(
+                        f"Skipped walk-forward window {window.index} "
+                        f"in {walk_forward.session_id.value}"
+                    )
+                continue
+            if self._walk_forward_repository.assign_out_of_sample(
+                walk_forward.session_id, window.index, context
+            ):
+                launched += 1
+        if launched:
+            logger.info(
+                f"Launched {launched} out-of-sample contexts "
+                f"in {walk_forward.session_id.value}"
+            )
+        return launched
+
+    def _out_of_sample_context(
+        self, window: WalkForwardWindow, contexts: list[Context], rank_by: str
+    ) -> Context | None:
+        best = _ranked(
+            [_result_info(c, self._accessor_builder) for c in contexts], rank_by
+        )[0]
+        if getattr(best, rank_by) is None:
+            return None
+        template = contexts[0]
+        return Context(
+            strategy_snapshot_id=template.strategy_snapshot_id,
+            strategy_args=best.strategy_args,
+            source=template.source,
+            symbol=template.symbol,
+            timeframe=template.timeframe,
+            start_at=window.out_of_sample_start_at,
+            end_at=window.out_of_sample_end_at - _LAST_INSTANT,
+        )
+
+
+class FetchWalkForwardUsecase:
+    """窓ごとの進み具合と、検証期間の TimeReturn をつないだ系列を返す"""
+
+    @inject
+    def __init__(
+        self,
+        context_repository: IContextRepository,
+        walk_forward_repository: IWalkForwardRepository,
+        accessor_builder: AssistedBuilder[IContextRuntimeDirectoryAccessor],
+    ):
+        self._context_repository = context_repository
+        self._walk_forward_repository = walk_forward_repository
+        self._accessor_builder = accessor_builder
+
+    def execute(self, session_id: str) -> WalkForwardInfo | None:
+        walk_forward = self._walk_forward_repository.find_by_session_id(
+            SessionId(value=session_id)
+        )
+        if walk_forward is None:
+            return None
+        contexts = {
+            c.id: c
+            for c in self._context_repository.find_by_session_id(
+                walk_forward.session_id
+            )
+        }
+        windows, time_returns = [], []
+        for window in walk_forward.windows:
+            in_sample = [
+                contexts[id] for id in window.in_sample_context_ids if id in contexts
+            ]
+            out_of_sample = contexts.get(window.out_of_sample_context_id)
+            result = (
+                _result_info(out_of_sample, self._accessor_builder)
+                if out_of_sample
+                else None
+            )
+            if out_of_sample and out_of_sample.status == ContextStatus.SUCCEEDED:
+                time_returns.extend(self._time_returns(out_of_sample.id))
+            status = result.status if result else None
+            if window.skipped:
+                status = "SKIPPED"
+            windows.append(
+                WalkForwardWindowInfo(
+                    index=window.index,
+                    in_sample=DatetimeRange(
+                        window.in_sample_start_at, window.in_sample_end_at
+                    ),
+                    out_of_sample=DatetimeRange(
+                        window.out_of_sample_start_at, window.out_of_sample_end_at
+                    ),
+                    in_sample_finished=sum(_finished(c) for c in in_sample),
+                    in_sample_total=len(window.in_sample_context_ids),
+                    best_args=out_of_sample.strategy_args if out_of_sample else None,
+                    out_of_sample_status=status,
+                    out_of_sample_return=result.total_return if result else None,
+                )
+            )
+        return WalkForwardInfo(
+            session_id=session_id,
+            rank_by=walk_forward.rank_by,
+            windows=windows,
+            time_returns=time_returns,
+        )
+
+    def _time_returns(self, context_id: ContextId) -> list[TimeReturnPoint]:
+        metrics = self._accessor_builder.build(id=context_id).metrics
+        rows = metrics[metrics["analyzer"] == "time_return"]
+        return [
+            TimeReturnPoint(
+                timestamp=datetime.fromisoformat(row.timestamp),
+                analyzer=row.analyzer,
+                key=str(row.key),
+                value=float(row.value),
+            )
+            for row in rows.itertuples()
+        ]
+
+
+class AnalyzeRobustnessUsecase:
+    """完了したコンテキストのリターンを再標本化し、Sharpe・最大ドローダウン・CAGR の信頼区間を返す
+
+    ``bootstrap`` は足ごとのリターンを日次にまとめてから復元抽出する。
+    ``shuffle`` は売買ごとのリターンの順番を入れ替える。売買の記録が無い実行では日次のリターンを使う。
+    """
+
+    MAX_PATHS = 100_000
+
+    @inject
+    def __init__(
+        self,
+        context_repository: IContextRepository,
+        accessor_builder: AssistedBuilder[IContextRuntimeDirectoryAccessor],
+    ):
+        self._context_repository = context_repository
+        self._accessor_builder = accessor_builder
+
+    def execute(
+        self,
+        session_id: str,
+        context_id: str,
+        *,
+        method: ResampleMethod = "bootstrap",
+        paths: int = 10_000,
+        confidence: float = 0.9,
+        block_size: int = 1,
+        seed: int | None = None,
+        workers: int | None = None,
+    ) -> RobustnessInfo | None:
+        """セッションに無いか、成功していないコンテキストには None を返す"""
+        if method not in get_args(ResampleMethod):
+            raise ValueError(f"Unsupported resample method: {method}")
+        if not 0 < paths <= self.MAX_PATHS:
+            raise ValueError(f"Paths must be between 1 and {self.MAX_PATHS}")
+        context = next(
+            (
+                c
+                for c in self._context_repository.find_by_session_id(
+                    SessionId(value=session_id)
+                )
+                if c.id.value == context_id
+            ),
+            None,
+        )
+        if context is None or context.status != ContextStatus.SUCCEEDED:
+            return None
+        accessor = self._accessor_builder.build(id=context.id)
+        metrics = accessor.metrics
+        time_returns = _time_return_series(metrics)
+
+        series, values = "daily", _daily_returns(time_returns)
+        if method == "shuffle":
+            trades = _trade_returns(metrics, time_returns, accessor.summary)
+            if len(trades) >= 2:
+                series, values = "trades", trades
+        if len(values) < 2:
+            return RobustnessInfo(
+                context_id=context_id,
+                method=method,
+                series=series,
+                samples=len(values),
+                paths=paths,
+                confidence=confidence,
+                bands=[],
+            )
+
+        periods_per_year = _periods_per_year(values)
+        observed = path_metrics(values.to_numpy(), periods_per_year)
+        samples = simulate(
+            values.to_numpy(),
+            periods_per_year,
+            paths=paths,
+            method=method,
+            block_size=block_size,
+            seed=seed,
+            workers=workers,
+        )
+        bands = []
+        for metric in METRICS:
+            low, median, high = confidence_band(samples[metric], confidence)
+            bands.append(
+                ConfidenceBandInfo(
+                    metric=metric,
+                    observed=_finite(observed[metric][0]),
+                    low=_finite(low),
+                    median=_finite(median),
+                    high=_finite(high),
+                )
+            )
+        return RobustnessInfo(
+            context_id=context_id,
+            method=method,
+            series=series,
+            samples=len(values),
+            paths=paths,
+            confidence=confidence,
+            bands=bands,
+        )
+
+
+def _time_return_series(metrics: pd.DataFrame) -> pd.Series:
+    rows = metrics[metrics["analyzer"] == "time_return"]
+    return pd.Series(
+        rows["value"].astype(float).to_numpy(),
+        index=pd.to_datetime(rows["timestamp"]),
+    )
+
+
+def _daily_returns(time_returns: pd.Series) -> pd.Series:
+    # 足の本数によらず数秒で終わるよう、日ごとに複利でまとめてから再標本化する
+    grouped = (1.0 + time_returns).groupby(time_returns.index.floor("D"))
+    return grouped.prod() - 1.0
+
+
+def _trade_returns(
+    metrics: pd.DataFrame, time_returns: pd.Series, summary: dict[str, float] | None
+) -> pd.Series:
+    """TradeAnalyzer の累計損益の増えた足ごとに、その直前の資産に対する損益の割合を返す
+
+    同じ足で閉じた売買は 1 件にまとまる。
+    """
+    rows = metrics[
+        (metrics["analyzer"] == "trades") & (metrics["key"] == "pnl.net.total")
+    ]
+    if rows.empty or not summary or time_returns.empty:
+        return pd.Series(dtype=float)
+    pnl = pd.Series(
+        rows["value"].astype(float).to_numpy(), index=pd.to_datetime(rows["timestamp"])
+    )
+    pnl = pnl[~pnl.index.duplicated(keep="last")]
+    closed = pnl.diff().fillna(pnl.iloc[0])
+    closed = closed[closed != 0]
+
+    starting_cash = summary["final_value"] / (1.0 + summary["total_return"])
+    equity = starting_cash * (1.0 + time_returns).cumprod()
+    before = equity.shift(1).fillna(starting_cash)
+    before = before[~before.index.duplicated(keep="last")]
+    return closed / before.reindex(closed.index)
+
+
+def _periods_per_year(values: pd.Series) -> float:
+    # 暗号資産は休みなく取引されるので、暦日で年あたりの本数に直す
+    span = values.index[-1] - values.index[0] + pd.Timedelta(days=1)
+    return len(values) / (span / pd.Timedelta(days=365))
+
+
+def _finite(value: float) -> float | None:
+    return float(value) if np.isfinite(value) else None
+
+
+# コンテキストの終わりは足を含むので、次の期間の最初の足を含めないよう 1 マイクロ秒手前にする
+_LAST_INSTANT = timedelta(microseconds=1)
+
+
+def _finished(context: Context) -> bool:
+    return context.status not in (ContextStatus.PENDING, ContextStatus.RUNNING)
+
+
+def _result_info(
+    context: Context,
+    accessor_builder: AssistedBuilder[IContextRuntimeDirectoryAccessor],
+) -> BacktestResultInfo:
+    summary = None
+    if context.status == ContextStatus.SUCCEEDED:
+        summary = accessor_builder.build(id=context.id).summary
+    return BacktestResultInfo(
+        context_id=context.id.value,
+        status=context.status.name,
+        strategy_args=context.strategy_args,
+        **(summary or {}),
+    )
+
+
+def _ranked(
+    results: list[BacktestResultInfo], rank_by: str
+) -> list[BacktestResultInfo]:
+    if rank_by not in FetchBacktestResultsUsecase.RANK_KEYS:
+        raise ValueError(f"Unsupported rank key: {rank_by}")
+    # ドローダウンだけは小さいほど良い
+    sign = 1 if rank_by == "max_drawdown" else -1
+    return sorted(
+        results,
+        key=lambda r: (
+            getattr(r, rank_by) is None,
+            sign * (getattr(r, rank_by) or 0),
+        ),
+    )
+
+
+def _to_job_info(job: OhlcvFetchJob) -> OhlcvFetchJobInfo:
+    return OhlcvFetchJobInfo(
+        job_id=job.id.value,
+        exchange=job.exchange,
+        symbol=job.symbol,
+        status=job.status.name,
+        attempts=job.attempts,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _current_minute() -> datetime:
+    # 確定していない現在の足は取得しない
+    return datetime.now(UTC).replace(second=0, microsecond=0)
+
+
+def _current_bar(timeframe: Timeframe) -> datetime:
+    step = timeframe.to_timedelta()
+    epoch = datetime(1970, 1, 1, tzinfo=UTC)
+    return epoch + (_current_minute() - epoch) // step * step
+
+
+def _last_time(batch: pa.RecordBatch) -> datetime:
+    return batch.column("time")[-1].as_py()
+
+
+def _mark_skipped(
+    repository: IOhlcvRepository,
+    source: str,
+    symbol: str,
+    requested_at: datetime,
+    end_at: datetime,
+    batch: pa.RecordBatch,
+    timeframe: Timeframe = Timeframe.ONE_MINUTE,
+):
+    """ページの先頭が要求した時刻より後なら、その間は取引所にも足が無いので記録する
+
+    取引所は since 以降で最初にある足からページを返す。空のバッチは次の足が ``end_at``
+    以降にしか無いという知らせなので、残りを全部記録する。何も返さなかった取得や
+    途中で打ち切られた取得からは何も分からないので記録しない。
+    """
+    first_at = batch.column("time")[0].as_py() if batch.num_rows else end_at
+    if first_at > requested_at:
+        repository.mark_unavailable(source, symbol, requested_at, first_at, timeframe)
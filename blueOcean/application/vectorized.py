@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+
+import backtrader as bt
+import numpy as np
+
+from blueOcean.application.feeds import _DAY_US, _EPOCH_NUM
+from blueOcean.domain.ohlcv import OhlcvColumns
+
+
+@dataclass(frozen=True)
+class Signals:
+    """足ごとの売買シグナル
+
+    ``entries[i]`` はノーポジションなら ``size`` だけ買い、``exits[i]`` は保有中なら手仕舞う。
+    どちらも i 本目の終値で判断し、次の足の始値で約定する。
+    """
+
+    entries: np.ndarray
+    exits: np.ndarray
+    size: float | np.ndarray = field(default=1.0)
+
+
+class SignalStrategy(bt.Strategy):
+    """``signals`` を実装すると、Cerebro とベクトル化エンジンのどちらでも同じ売買をする
+
+    Cerebro では ``start`` で全足分のシグナルを先に計算し、``next`` はそれをなぞるだけ。
+    足を先読みするので ``preload`` が有効な Cerebro でしか動かない。
+    """
+
+    @classmethod
+    def signals(cls, columns: OhlcvColumns, params: Any) -> Signals:
+        raise NotImplementedError()
+
+    def start(self):
+        if len(self.data.close.array) == 0:
+            raise RuntimeError(f"{type(self).__name__} needs a preloaded feed")
+        self._signals = self.signals(_columns_of(self.data), self.p)
+        self._sizes = np.broadcast_to(
+            np.asarray(self._signals.size, dtype=np.float64),
+            len(self._signals.entries),
+        )
+
+    def next(self):
+        i = len(self) - 1
+        if not self.position:
+            if self._signals.entries[i]:
+                self.buy(size=float(self._sizes[i]))
+        elif self._signals.exits[i]:
+            self.close()
+
+
+@dataclass(frozen=True)
+class VectorizedResult:
+    time: np.ndarray
+    value: np.ndarray
+    # 足ごとの資産の変化率。backtrader の TimeReturn (足の時間軸) と同じ値
+    returns: np.ndarray
+    trades: int
+    starting_cash: float
+
+    @property
+    def final_value(self) -> float:
+        return float(self.value[-1]) if len(self.value) else self.starting_cash
+
+    @property
+    def max_drawdown(self) -> float:
+        """DrawDown アナライザと同じく % で返す"""
+        if not len(self.value):
+            return 0.0
+        peak = np.maximum.accumulate(np.maximum(self.value, self.starting_cash))
+        return float(np.max((1.0 - self.value / peak) * 100.0))
+
+
+def run_vectorized(
+    strategy_cls: type[SignalStrategy],
+    columns: OhlcvColumns,
+    strategy_args: dict[str, Any] | None = None,
+    cash: float = 10_000.0,
+    commission: float = 0.0,
+) -> VectorizedResult:
+    """``SignalStrategy`` をイベントループなしで約定・資産推移まで計算する
+
+    Cerebro の既定のブローカー (成行は次の足の始値で約定、手数料は約定代金に対する率) に合わせる。
+    資金不足による注文の拒否は再現しない。
+    """
+    params = SimpleNamespace(
+        **(strategy_cls.params._getpairs() | (strategy_args or {}))
+    )
+    signals = strategy_cls.signals(columns, params)
+    n = len(columns)
+    sizes = np.broadcast_to(np.asarray(signals.size, dtype=np.float64), n)
+
+    fills, fill_sizes = _fills(
+        np.asarray(signals.entries, dtype=bool),
+        np.asarray(signals.exits, dtype=bool),
+        sizes,
+    )
+    opens = columns.open
+    position_delta = np.zeros(n)
+    cash_flow = np.zeros(n)
+    np.add.at(position_delta, fills, fill_sizes)
+    notional = fill_sizes * opens[fills]
+    np.add.at(cash_flow, fills, -notional - np.abs(notional) * commission)
+
+    value = cash + np.cumsum(cash_flow) + np.cumsum(position_delta) * columns.close
+    previous = np.concatenate([[cash], value[:-1]])
+    return VectorizedResult(
+        time=columns.time,
+        value=value,
+        returns=value / previous - 1.0,
+        # 手仕舞いまで終えた売買の数
+        trades=int(np.count_nonzero(fill_sizes < 0)),
+        starting_cash=cash,
+    )
+
+
+def _fills(
+    entries: np.ndarray, exits: np.ndarray, sizes: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """約定する足と数量 (買いは正、売りは負) を返す
+
+    ポジションの有無で次に効くシグナルが変わるので、シグナルのある足だけを順にたどる。
+    """
+    n = len(entries)
+    bars, quantities = [], []
+    held = 0.0
+    for i in np.flatnonzero(entries | exits):
+        # 最後の足のシグナルは約定する足が無い
+        if i + 1 >= n:
+            break
+        if not held and entries[i]:
+            held = sizes[i]
+            bars.append(i + 1)
+            quantities.append(held)
+        elif held and exits[i]:
+            bars.append(i + 1)
+            quantities.append(-held)
+            held = 0.0
+    return np.asarray(bars, dtype=np.int64), np.asarray(quantities, dtype=np.float64)
+
+
+def _columns_of(data: bt.feed.DataBase) -> OhlcvColumns:
+    nums = np.frombuffer(data.datetime.array, dtype=np.float64)
+    time = np.round((nums - _EPOCH_NUM) * _DAY_US).astype("datetime64[us]")
+    return OhlcvColumns(
+        time,
+        *(
+            np.frombuffer(getattr(data, name).array, dtype=np.float64)
+            for name in OhlcvColumns.NAMES[1:]
+        ),
+    )
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import UTC, datetime
+
+from injector import inject
+
+from blueOcean.application.usecases import FetchOhlcvUsecase
+from blueOcean.domain.job import IOhlcvFetchJobQueue, OhlcvFetchJob
+from blueOcean.domain.ohlcv import IOhlcvRepository
+from blueOcean.domain.watchlist import IWatchlistRepository, WatchedSymbol
+from blueOcean.infra.logging import logger
+
+
+class OhlcvFetchJobWorker:
+    """キューから OHLCV 取得ジョブを 1 件ずつ取り出して実行する
+
+    取得は別スレッドで走らせ、その間このスレッドが定期的にハートビートを打つ。
+    キューへのアクセスは常にこのスレッドから行う。
+    """
+
+    POLL_INTERVAL = 1.0
+    HEARTBEAT_INTERVAL = 30.0
+
+    @inject
+    def __init__(
+        self,
+        job_queue: IOhlcvFetchJobQueue,
+        fetch_usecase: FetchOhlcvUsecase,
+    ):
+        self._job_queue = job_queue
+        self._fetch_usecase = fetch_usecase
+
+    def run_once(
+        self,
+        worker: str,
+        caps: dict[str, int] | None = None,
+        default_cap: int = 1,
+    ) -> OhlcvFetchJob | None:
+        """ジョブを 1 件実行して終了後の状態を返す。待ちジョブが無ければ None"""
+        job = self._job_queue.claim(worker, caps, default_cap)
+        if job is None:
+            return None
+        logger.info(f"{worker}: start {job.exchange} {job.symbol} ({job.id.value})")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                self._fetch_usecase.execute, job.exchange, job.symbol
+            )
+            while not wait([future], timeout=self.HEARTBEAT_INTERVAL).done:
+                self._job_queue.heartbeat(job.id)
+        if (error := future.exception()) is not None:
+            logger.error(f"{worker}: failed {job.exchange} {job.symbol}: {error!r}")
+            self._job_queue.fail(job.id, str(error) or repr(error))
+        else:
+            self._job_queue.complete(job.id)
+        return self._job_queue.find_by_id(job.id)
+
+    def run_forever(
+        self,
+        worker: str,
+        caps: dict[str, int] | None = None,
+        default_cap: int = 1,
+        stop: threading.Event | None = None,
+    ):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if self.run_once(worker, caps, default_cap) is None:
+                stop.wait(self.POLL_INTERVAL)
+
+
+class WatchlistSyncDaemon:
+    """ウォッチリストの差分同期を取引所ごとに並行して回す
+
+    取引所ごとに同時に 1 バッチだけ走らせ、バッチ内は ``execute_many`` で並行に取得する。
+    ウォッチリストの読み書きはこのスレッドからだけ行う。
+    """
+
+    POLL_INTERVAL = 1.0
+    BATCH_SIZE = 32
+    CONCURRENCY = 8
+
+    @inject
+    def __init__(
+        self,
+        watchlist: IWatchlistRepository,
+        fetch_usecase: FetchOhlcvUsecase,
+        ohlcv_repository: IOhlcvRepository,
+    ):
+        self._watchlist = watchlist
+        self._fetch_usecase = fetch_usecase
+        self._ohlcv_repository = ohlcv_repository
+
+    def sync_once(self) -> list[WatchedSymbol]:
+        """時刻を過ぎたシンボルを 1 巡だけ同期し、更新後の状態を返す"""
+        running: dict[str, tuple[Future, list[WatchedSymbol]]] = {}
+        with ThreadPoolExecutor() as executor:
+            self._launch(executor, running)
+            wait([future for future, _ in running.values()])
+            return self._collect(running)
+
+    def run_forever(self, stop: threading.Event | None = None):
+        stop = stop or threading.Event()
+        running: dict[str, tuple[Future, list[WatchedSymbol]]] = {}
+        with ThreadPoolExecutor() as executor:
+            while not stop.is_set():
+                self._launch(executor, running)
+                if running:
+                    wait(
+                        [future for future, _ in running.values()],
+                        timeout=self.POLL_INTERVAL,
+                        return_when=FIRST_COMPLETED,
+                    )
+                else:
+                    stop.wait(self.POLL_INTERVAL)
+                self._collect(running)
+            # 走っているバッチは結果を残してから終わる
+            wait([future for future, _ in running.values()])
+            self._collect(running)
+
+    def _launch(
+        self,
+        executor: ThreadPoolExecutor,
+        running: dict[str, tuple[Future, list[WatchedSymbol]]],
+    ):
+        batches: dict[str, list[WatchedSymbol]] = {}
+        for watched in self._watchlist.find_due(datetime.now(UTC)):
+            if watched.exchange in running:
+                continue
+            batch = batches.setdefault(watched.exchange, [])
+            if len(batch) < self.BATCH_SIZE:
+                batch.append(watched)
+        for exchange, batch in batches.items():
+            future = executor.submit(
+                self._fetch_usecase.execute_many,
+                exchange,
+                [w.symbol for w in batch],
+                self.CONCURRENCY,
+            )
+            running[exchange] = (future, batch)
+
+    def _collect(
+        self, running: dict[str, tuple[Future, list[WatchedSymbol]]]
+    ) -> list[WatchedSymbol]:
+        now = datetime.now(UTC)
+        updated = []
+        for exchange, (future, batch) in list(running.items()):
+            if not future.done():
+                continue
+            del running[exchange]
+            if (error := future.exception()) is not None:
+                failed, message = {w.symbol for w in batch}, str(error) or repr(error)
+            else:
+                failed, message = set(future.result()), "fetch failed"
+            # 1 つのシンボルの記録に失敗してもデーモンは止めない。保存できなかった分は次の周回でやり直す
+            try:
+                results = [
+                    w.failed(now, message) if w.symbol in failed else w.succeeded(now)
+                    for w in batch
+                ]
+                self._watchlist.save(*results)
+            except Exception as e:
+                logger.error(f"Failed to record {exchange} sync results: {e}")
+                continue
+            for watched in results:
+                try:
+                    self._log_lag(watched, now)
+                except Exception as e:
+                    logger.error(f"Failed to check {watched.symbol} lag: {e}")
+            updated += results
+        return updated
+
+    def _log_lag(self, watched: WatchedSymbol, now: datetime):
+        latest_at = self._ohlcv_repository.get_latest_timestamp(
+            watched.exchange, watched.symbol
+        )
+        lag = now - latest_at if latest_at else None
+        message = f"{watched.exchange} {watched.symbol} lag={lag}"
+        if watched.failures:
+            logger.warning(f"{message} failures={watched.failures}")
+        elif lag is None or lag > watched.interval * 2:
+            logger.warning(f"{message} (falling behind)")
+        else:
+            logger.info(message)
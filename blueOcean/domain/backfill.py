@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+
+
+@dataclass(frozen=True)
+class BackfillShard:
+    """バックフィル対象の期間 [start_at, end_at) の 1 区間
+
+    ``cursor_at`` は保存済みの最後の足の時刻。再開時はその次の足から取得する。
+    """
+
+    source: str
+    symbol: str
+    start_at: datetime
+    end_at: datetime
+    cursor_at: datetime | None = field(default=None)
+    done: bool = field(default=False)
+
+    @property
+    def resume_at(self) -> datetime:
+        if self.cursor_at is None:
+            return self.start_at
+        return self.cursor_at + timedelta(minutes=1)
+
+    def advance(self, cursor_at: datetime) -> BackfillShard:
+        return replace(self, cursor_at=cursor_at)
+
+    def complete(self) -> BackfillShard:
+        return replace(self, done=True)
+
+
+def plan_shards(
+    source: str,
+    symbol: str,
+    start_at: datetime,
+    end_at: datetime,
+    shards: int,
+    align: timedelta = timedelta(minutes=1000),
+) -> list[BackfillShard]:
+    """[start_at, end_at) を最大 ``shards`` 個の連続した区間に分ける
+
+    区間の境界は ``align`` (1 ページ分) の倍数にそろえ、ページの途中で区切らない。
+    """
+    if start_at >= end_at or shards < 1:
+        return []
+    pages = -(-(end_at - start_at) // align)
+    pages_per_shard = -(-pages // shards)
+    span = align * pages_per_shard
+    result = []
+    shard_start = start_at
+    while shard_start < end_at:
+        shard_end = min(shard_start + span, end_at)
+        result.append(BackfillShard(source, symbol, shard_start, shard_end))
+        shard_start = shard_end
+    return result
+
+
+# region interfaces
+
+
+class IBackfillCheckpointRepository(metaclass=ABCMeta):
+    @abstractmethod
+    def find_by_symbol(self, source: str, symbol: str) -> list[BackfillShard]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def save(self, *shards: BackfillShard):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete_by_symbol(self, source: str, symbol: str):
+        raise NotImplementedError()
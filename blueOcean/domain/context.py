@@ -3,6 +3,7 @@ from __future__ import annotations
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass, field
 from datetime import datetime
+from enum import IntEnum
 
 from cuid2 import Cuid
 
@@ -24,6 +25,7 @@ class Context:
 
     start_at: datetime = field(default=datetime.min)
     end_at: datetime = field(default=datetime.max)
+    status: ContextStatus = field(default_factory=lambda: ContextStatus.PENDING)
 
 
 # region value_objects
@@ -34,6 +36,14 @@ class ContextId:
     value: str = field(default_factory=Cuid().generate)
 
 
+class ContextStatus(IntEnum):
+    PENDING = 0
+    RUNNING = 1
+    SUCCEEDED = 2
+    FAILED = 3
+    TIMED_OUT = 4
+
+
 # region interfaces
 
 
@@ -53,3 +63,37 @@ class IContextRepository(metaclass=ABCMeta):
     @abstractmethod
     def save(self, context: Context) -> Context:
         raise NotImplementedError()
+
+    @abstractmethod
+    def save_in_session(
+        self, session_id: SessionId, *contexts: Context
+    ) -> list[Context]:
+        """新しいコンテキストをまとめて保存し、セッションに紐づける"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def claim(
+        self, limit: int | None = None, executor: str | None = None
+    ) -> list[Context]:
+        """未実行のコンテキストを古い順に最大 ``limit`` 件 (None なら全件) 取り、実行中にして返す
+
+        取る前に、ハートビートの途絶えた実行器が持っていたコンテキストを未実行に戻す。
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def heartbeat(self, executor: str):
+        """``executor`` が実行中のコンテキストを、まだ動いているものとして記録する"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def release(self, id: ContextId) -> ContextStatus:
+        """実行中のコンテキストを未実行に戻し、戻した後の状態を返す
+
+        取り直した回数が上限に達していれば、未実行には戻さず失敗にする。
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update_status(self, id: ContextId, status: ContextStatus):
+        raise NotImplementedError()
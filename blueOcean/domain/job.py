@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import IntEnum
+
+from cuid2 import Cuid
+
+
+@dataclass(frozen=True)
+class OhlcvFetchJob:
+    id: JobId = field(default_factory=lambda: JobId())
+    exchange: str = field(default="")
+    symbol: str = field(default="")
+    status: JobStatus = field(default_factory=lambda: JobStatus.QUEUED)
+    attempts: int = field(default=0)
+    error: str | None = field(default=None)
+    worker: str | None = field(default=None)
+    created_at: datetime | None = field(default=None)
+    started_at: datetime | None = field(default=None)
+    finished_at: datetime | None = field(default=None)
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+# region value_objects
+
+
+@dataclass(frozen=True)
+class JobId:
+    value: str = field(default_factory=Cuid().generate)
+
+
+class JobStatus(IntEnum):
+    QUEUED = 0
+    RUNNING = 1
+    SUCCEEDED = 2
+    FAILED = 3
+
+
+# region interfaces
+
+
+class IOhlcvFetchJobQueue(metaclass=ABCMeta):
+    @abstractmethod
+    def enqueue(self, exchange: str, symbol: str) -> OhlcvFetchJob:
+        """(exchange, symbol) の未完了ジョブがあればそれを、無ければ新しく積んで返す"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def claim(
+        self,
+        worker: str,
+        caps: dict[str, int] | None = None,
+        default_cap: int = 1,
+    ) -> OhlcvFetchJob | None:
+        """取引所ごとの同時実行数の上限内で、最も古い待ちジョブを実行中にして返す"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def heartbeat(self, id: JobId):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def complete(self, id: JobId):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def fail(self, id: JobId, error: str):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def find_by_id(self, id: JobId) -> OhlcvFetchJob | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def find_recent(self, limit: int = 50) -> list[OhlcvFetchJob]:
+        raise NotImplementedError()
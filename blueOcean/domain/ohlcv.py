@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
 from dataclasses import asdict, dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import IntEnum
-from typing import Generator
+from typing import AsyncIterator, Generator, Iterator
 
 import backtrader as bt
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
 
 @dataclass
@@ -30,6 +32,61 @@ class Ohlcv:
     def from_dataframe(cls, df: pd.DataFrame) -> list[Ohlcv]:
         return [cls(**row) for row in df.reset_index(drop=True).to_dict("records")]
 
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> list[Ohlcv]:
+        columns = [table.column(name).to_pylist() for name in OhlcvColumns.NAMES]
+        return [cls(*row) for row in zip(*columns)]
+
+    @classmethod
+    def to_arrow(cls, ohlcvs: list[Ohlcv]) -> pa.Table:
+        return pa.table(
+            [[getattr(c, name) for c in ohlcvs] for name in OhlcvColumns.NAMES],
+            schema=OhlcvColumns.SCHEMA,
+        )
+
+
+@dataclass(frozen=True)
+class OhlcvColumns:
+    """OHLCV を列ごとの連続した NumPy 配列として持つ
+
+    time は UTC の datetime64。Arrow の結果から作る場合は可能な限りゼロコピーで参照する。
+    """
+
+    NAMES = ("time", "open", "high", "low", "close", "volume")
+    SCHEMA = pa.schema(
+        [("time", pa.timestamp("us", tz="UTC"))]
+        + [(name, pa.float64()) for name in NAMES[1:]]
+    )
+
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> OhlcvColumns:
+        # チャンクが複数ある場合のみ 1 回だけ結合コピーが発生する
+        table = table.select(list(cls.NAMES)).combine_chunks()
+        arrays = {}
+        for name in cls.NAMES:
+            column = table.column(name)
+            if column.num_chunks == 0:
+                arrays[name] = column.to_numpy()
+                continue
+            arrays[name] = column.chunk(0).to_numpy(zero_copy_only=False)
+        return cls(**arrays)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {name: getattr(self, name) for name in self.NAMES[1:]},
+            index=pd.DatetimeIndex(self.time, name="time", tz="UTC"),
+        )
+
 
 class Timeframe(IntEnum):
     ONE_MINUTE = 1
@@ -50,6 +107,16 @@ class Timeframe(IntEnum):
     def to_duck(self) -> str:
         return f"'{int(self)} minutes'"
 
+    def to_ccxt(self) -> str:
+        if self % 1440 == 0:
+            return f"{int(self) // 1440}d"
+        if self % 60 == 0:
+            return f"{int(self) // 60}h"
+        return f"{int(self)}m"
+
+    def to_timedelta(self) -> timedelta:
+        return timedelta(minutes=int(self))
+
     def to_backtrade(self) -> bt.TimeFrame:
         match self:
             case Timeframe.ONE_DAY:
@@ -58,13 +125,65 @@ class Timeframe(IntEnum):
                 return bt.TimeFrame.Minutes
 
 
+@dataclass(frozen=True)
+class OhlcvCompleteness:
+    """保存済み 1m 足の欠け具合 (最初の足から最後の足までの範囲で数える)"""
+
+    source: str
+    symbol: str
+    first_at: datetime | None
+    last_at: datetime | None
+    expected: int
+    present: int
+    # 取引所に問い合わせても足が無かった分
+    unavailable: int
+    gaps: list[tuple[datetime, datetime]]
+
+    @property
+    def missing(self) -> int:
+        return self.expected - self.present - self.unavailable
+
+    @property
+    def ratio(self) -> float:
+        return self.present / self.expected if self.expected else 0.0
+
+
 class IOhlcvRepository(metaclass=ABCMeta):
     @abstractmethod
     def save(self, ohlcv: list[Ohlcv], source: str, symbol: str):
         raise NotImplementedError()
 
     @abstractmethod
-    def get_latest_timestamp(self, source: str, symbol: str) -> datetime | None:
+    def save_batch(
+        self,
+        batch: pa.RecordBatch | pa.Table,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ):
+        """``OhlcvColumns.SCHEMA`` の列を持つ Arrow データをそのまま保存する
+
+        1m 以外は取引所から直接取得した足として、1m とは別のシリーズに保存する。
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def publish_partial(
+        self, batch: pa.RecordBatch | pa.Table, source: str, symbol: str
+    ):
+        """取り込み中でまだ保存していない 1m 足 (形成中の足を含む) を読み手に見せる
+
+        ``find_table`` などの結果には、保存済みの足より後のものだけが混ざる。空なら消す。
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_latest_timestamp(
+        self,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ) -> datetime | None:
         raise NotImplementedError()
 
     @abstractmethod
@@ -78,6 +197,102 @@ class IOhlcvRepository(metaclass=ABCMeta):
     ) -> list[Ohlcv]:
         raise NotImplementedError()
 
+    @abstractmethod
+    def find_table(
+        self,
+        symbol: str,
+        source: str,
+        interval: Timeframe = Timeframe.ONE_MINUTE,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> pa.Table:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def fingerprint(
+        self,
+        symbol: str,
+        source: str,
+        interval: Timeframe = Timeframe.ONE_MINUTE,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> str:
+        """``find_table`` が読むパーティションの一覧から作るハッシュ。足が変われば変わる"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def iter_batches(
+        self,
+        symbol: str,
+        source: str,
+        interval: Timeframe = Timeframe.ONE_MINUTE,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        batch_size: int = 65536,
+    ) -> Iterator[pa.RecordBatch]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def compact(
+        self, source: str, symbol: str, row_group_size: int | None = None
+    ) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_coverage(self, source: str, symbol: str) -> list[tuple[datetime, datetime]]:
+        """足がそろっている連続区間 [start, end) の一覧"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def find_gaps(
+        self,
+        source: str,
+        symbol: str,
+        start_at: datetime,
+        end_at: datetime,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ) -> list[tuple[datetime, datetime]]:
+        """[start_at, end_at) のうち、まだ取得していない区間の一覧"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def mark_unavailable(
+        self,
+        source: str,
+        symbol: str,
+        start_at: datetime,
+        end_at: datetime,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ):
+        """取引所に足が無かった区間として記録し、以後 ``find_gaps`` から外す"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def clear_unavailable(
+        self,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ):
+        """取得不能の記録を消し、次の取得で取引所に問い合わせ直させる"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_completeness(self, source: str, symbol: str) -> OhlcvCompleteness:
+        raise NotImplementedError()
+
+    def find_columns(
+        self,
+        symbol: str,
+        source: str,
+        interval: Timeframe = Timeframe.ONE_MINUTE,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> OhlcvColumns:
+        return OhlcvColumns.from_arrow(
+            self.find_table(symbol, source, interval, start_date, end_date)
+        )
+
 
 class OhlcvFetcher(metaclass=ABCMeta):
     @property
@@ -94,8 +309,109 @@ class OhlcvFetcher(metaclass=ABCMeta):
         _since_at = since_at or self.longest_since
         yield from self._fetch_ohlcv_process(symbol, _since_at)
 
+    def fetch_range(
+        self,
+        symbol: str,
+        start_at: datetime,
+        end_at: datetime,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ) -> Generator[pa.RecordBatch]:
+        """[start_at, end_at) の ``timeframe`` 足を古い順に取得する
+
+        取引所の次の足が ``end_at`` 以降にしか無いと分かったときは、最後に空のバッチを返す。
+        """
+        yield from self._fetch_range_process(symbol, start_at, end_at, timeframe)
+
+    @abstractmethod
+    def _fetch_ohlcv_process(
+        self, symbol: str, since_at: datetime
+    ) -> Generator[pa.RecordBatch]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _fetch_range_process(
+        self,
+        symbol: str,
+        start_at: datetime,
+        end_at: datetime,
+        timeframe: Timeframe,
+    ) -> Generator[pa.RecordBatch]:
+        raise NotImplementedError()
+
+
+class AsyncOhlcvFetcher(metaclass=ABCMeta):
+    """``OhlcvFetcher`` の asyncio 版
+
+    1 つのインスタンスで複数シンボルを並行に取得できること。
+    """
+
+    @property
+    @abstractmethod
+    def source(self) -> str:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def longest_since(self) -> datetime:
+        raise NotImplementedError()
+
+    async def fetch_ohlcv(
+        self, symbol: str, since_at: datetime | None = None
+    ) -> AsyncIterator[pa.RecordBatch]:
+        _since_at = since_at or self.longest_since
+        async for batch in self._fetch_ohlcv_process(symbol, _since_at):
+            yield batch
+
+    async def fetch_range(
+        self,
+        symbol: str,
+        start_at: datetime,
+        end_at: datetime,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ) -> AsyncIterator[pa.RecordBatch]:
+        """[start_at, end_at) の ``timeframe`` 足を古い順に取得する
+
+        取引所の次の足が ``end_at`` 以降にしか無いと分かったときは、最後に空のバッチを返す。
+        """
+        async for batch in self._fetch_range_process(
+            symbol, start_at, end_at, timeframe
+        ):
+            yield batch
+
+    async def close(self):
+        pass
+
     @abstractmethod
     def _fetch_ohlcv_process(
         self, symbol: str, since_at: datetime
-    ) -> Generator[list[Ohlcv]]:
+    ) -> AsyncIterator[pa.RecordBatch]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _fetch_range_process(
+        self,
+        symbol: str,
+        start_at: datetime,
+        end_at: datetime,
+        timeframe: Timeframe,
+    ) -> AsyncIterator[pa.RecordBatch]:
+        raise NotImplementedError()
+
+
+class OhlcvStream(metaclass=ABCMeta):
+    """1m 足の更新を購読する
+
+    ``watch`` は形成中の足を更新のたびに返す。時刻が進んだら前の足は確定とみなす。
+    """
+
+    @property
+    @abstractmethod
+    def source(self) -> str:
         raise NotImplementedError()
+
+    @abstractmethod
+    def watch(self, symbol: str) -> AsyncIterator[Ohlcv]:
+        raise NotImplementedError()
+
+    async def close(self):
+        pass
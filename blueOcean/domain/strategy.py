@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass, field
-from typing import TypeVar
+from itertools import product
+from typing import Iterable, TypeVar
 
 import backtrader as bt
 from cuid2 import Cuid
@@ -30,6 +31,47 @@ class Parameter:
     default: ParameterType | None = None
 
 
+def expand_grid(
+    defaults: Iterable[tuple[str, ParameterType]],
+    values: dict[str, list[ParameterType]],
+) -> list[StrategyArgs]:
+    """パラメータごとの候補値の直積を展開する
+
+    候補値は既定値の型にそろえてから重複を除くので、``5`` と ``5.0`` のように
+    同じ引数になる組み合わせは 1 つにまとまる。指定の無いパラメータは既定値のまま。
+    候補値を空で渡したパラメータがあれば、組み合わせが作れないので ValueError にする。
+    """
+    defaults = dict(defaults)
+    unknown = set(values) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+    empty = [name for name, candidates in values.items() if not candidates]
+    if empty:
+        raise ValueError(f"No values for parameters: {sorted(empty)}")
+    axes = []
+    for name, default in defaults.items():
+        candidates = values.get(name, [default])
+        coerced = [_coerce(value, default) for value in candidates]
+        axes.append([(name, value) for value in dict.fromkeys(coerced)])
+    return [dict(combination) for combination in product(*axes)]
+
+
+def _coerce(value: ParameterType, default: ParameterType | None) -> ParameterType:
+    # bool は int の派生なので先に見る
+    if isinstance(default, bool):
+        if isinstance(value, str):
+            return value.strip().lower() in {"1", "true", "on", "yes"}
+        return bool(value)
+    if isinstance(default, int):
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f"Not an integer: {value}")
+        return int(number)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+
 # region interfaces
 
 
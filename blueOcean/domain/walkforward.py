@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from blueOcean.domain.context import Context, ContextId
+from blueOcean.domain.session import SessionId
+
+
+@dataclass
+class WalkForwardWindow:
+    """学習期間 [in_sample_start_at, in_sample_end_at) と、その直後の検証期間"""
+
+    index: int
+    in_sample_start_at: datetime
+    in_sample_end_at: datetime
+    out_of_sample_start_at: datetime
+    out_of_sample_end_at: datetime
+    # 学習期間でパラメータの組み合わせごとに回すコンテキスト
+    in_sample_context_ids: list[ContextId] = field(default_factory=list)
+    # 学習期間の最良のパラメータで検証期間を回すコンテキスト。学習が終わるまでは None
+    out_of_sample_context_id: ContextId | None = field(default=None)
+    # 学習期間がすべて失敗し、検証しないと決まった窓
+    skipped: bool = field(default=False)
+
+    @property
+    def settled(self) -> bool:
+        """検証期間が追加されたか、検証しないと決まったか"""
+        return self.skipped or self.out_of_sample_context_id is not None
+
+
+@dataclass
+class WalkForward:
+    session_id: SessionId
+    rank_by: str = field(default="total_return")
+    windows: list[WalkForwardWindow] = field(default_factory=list)
+
+
+def split_windows(
+    start_at: datetime,
+    end_at: datetime,
+    in_sample: timedelta,
+    out_of_sample: timedelta,
+    anchored: bool = False,
+) -> list[WalkForwardWindow]:
+    """[start_at, end_at) を学習期間と検証期間の組に分ける
+
+    検証期間は重ならずに隙間なく並び、最後の検証期間は ``end_at`` で切り詰める。
+    ``anchored`` なら学習期間の始まりを ``start_at`` に固定し、窓ごとに伸ばしていく。
+    """
+    if in_sample <= timedelta(0) or out_of_sample <= timedelta(0):
+        raise ValueError("Window lengths must be positive")
+    windows = []
+    out_of_sample_start_at = start_at + in_sample
+    while out_of_sample_start_at < end_at:
+        windows.append(
+            WalkForwardWindow(
+                index=len(windows),
+                in_sample_start_at=(
+                    start_at if anchored else out_of_sample_start_at - in_sample
+                ),
+                in_sample_end_at=out_of_sample_start_at,
+                out_of_sample_start_at=out_of_sample_start_at,
+                out_of_sample_end_at=min(
+                    out_of_sample_start_at + out_of_sample, end_at
+                ),
+            )
+        )
+        out_of_sample_start_at += out_of_sample
+    if not windows:
+        raise ValueError("Range is shorter than the in-sample window")
+    return windows
+
+
+# region interfaces
+
+
+class IWalkForwardRepository(metaclass=ABCMeta):
+    @abstractmethod
+    def find_by_session_id(self, session_id: SessionId) -> WalkForward | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def find_unsettled(self) -> list[WalkForward]:
+        """検証期間がまだ決まっていない窓を持つウォークフォワードを返す"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def save(self, walk_forward: WalkForward) -> WalkForward:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def assign_out_of_sample(
+        self, session_id: SessionId, index: int, context: Context
+    ) -> bool:
+        """検証期間がまだ決まっていなければ、コンテキストをセッションに加えて紐づけ True を返す
+
+        紐づけとコンテキストの保存は 1 トランザクションで行う。
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def skip(self, session_id: SessionId, index: int) -> bool:
+        """検証期間がまだ決まっていなければ、検証しない窓として記録し True を返す"""
+        raise NotImplementedError()
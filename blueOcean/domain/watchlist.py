@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import math
+import random
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+
+
+@dataclass(frozen=True)
+class WatchedSymbol:
+    """定期的に同期するシンボル
+
+    ``priority`` が大きいものから同期する。成功したら ``interval`` を ±``JITTER`` ずらして
+    次回を決め、失敗が続くと ``MAX_BACKOFF`` まで間隔を倍々に延ばす。
+    """
+
+    JITTER = 0.1
+    MAX_BACKOFF = timedelta(hours=6)
+
+    exchange: str
+    symbol: str
+    priority: int = field(default=0)
+    interval: timedelta = field(default=timedelta(minutes=5))
+    next_run_at: datetime | None = field(default=None)
+    last_synced_at: datetime | None = field(default=None)
+    failures: int = field(default=0)
+    last_error: str | None = field(default=None)
+
+    def is_due(self, now: datetime) -> bool:
+        return self.next_run_at is None or self.next_run_at <= now
+
+    def succeeded(self, now: datetime) -> WatchedSymbol:
+        jitter = 1 + random.uniform(-self.JITTER, self.JITTER)
+        return replace(
+            self,
+            next_run_at=now + self.interval * jitter,
+            last_synced_at=now,
+            failures=0,
+            last_error=None,
+        )
+
+    def failed(self, now: datetime, error: str) -> WatchedSymbol:
+        # 失敗が続いても timedelta が溢れないよう、上限に届く回数で指数を打ち切る
+        exponent = min(self.failures + 1, self._max_exponent())
+        backoff = min(self.interval * 2**exponent, self.MAX_BACKOFF)
+        jitter = 1 + random.uniform(0, self.JITTER)
+        return replace(
+            self,
+            next_run_at=now + backoff * jitter,
+            failures=self.failures + 1,
+            last_error=error,
+        )
+
+    def _max_exponent(self) -> int:
+        if self.interval <= timedelta(0):
+            return 0
+        return max(math.ceil(math.log2(self.MAX_BACKOFF / self.interval)), 0)
+
+
+# region interfaces
+
+
+class IWatchlistRepository(metaclass=ABCMeta):
+    @abstractmethod
+    def find_all(self) -> list[WatchedSymbol]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def find_due(self, now: datetime) -> list[WatchedSymbol]:
+        """同期の時刻を過ぎたものを優先度の高い順に返す"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def save(self, *symbols: WatchedSymbol):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete(self, exchange: str, symbol: str):
+        raise NotImplementedError()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 
 from injector import inject
@@ -21,6 +22,13 @@ class LocalContextRuntimeDirectoryAccessor(IContextRuntimeDirectoryAccessor):
     def metrics(self):
         return pd.read_csv(self.get_or_create_directory() / "metrics.csv")
 
+    @property
+    def summary(self):
+        path = self.get_or_create_directory() / "summary.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text("utf-8"))
+
     def get_or_create_directory(self) -> Path:
         # TODO: ベースディレクトリは設定で変更可能にする
         run_dir = Path("./out") / self._id.value
@@ -0,0 +1,518 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import ccxt
+import ccxt.async_support
+import ccxt.pro
+import pyarrow as pa
+
+from blueOcean.infra.logging import logger
+from blueOcean.infra.stores import PartitionEntry, as_utc
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    disk_hits: int
+    evictions: int
+    invalidations: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+
+@dataclass(frozen=True)
+class _CacheKey:
+    source: str
+    symbol: str
+    timeframe: int
+    start_at: datetime | None
+    end_at: datetime | None
+
+    def overlaps(self, start_at: datetime, end_at: datetime) -> bool:
+        if self.end_at is not None and as_utc(self.end_at) < start_at:
+            return False
+        if self.start_at is not None and as_utc(self.start_at) >= end_at:
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class _CacheEntry:
+    fingerprint: str
+    table: pa.Table
+    nbytes: int
+
+
+class OhlcvQueryCache:
+    """``OhlcvRepository.find_table`` の結果キャッシュ
+
+    メモリ上はバイト数で上限を決める LRU。各エントリは読んだパーティションの
+    fingerprint を持ち、別プロセスの書き込みや圧縮でパーティションが変わった場合も
+    取り出し時に不一致として捨てる。``disk_dir`` を指定すると fingerprint をキーに
+    Arrow IPC ファイルとしても保存し、プロセスを再起動してもヒットする。
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024**2,
+        disk_dir: str | Path | None = None,
+        max_disk_bytes: int = 4 * 1024**3,
+    ):
+        self._max_bytes = max_bytes
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._max_disk_bytes = max_disk_bytes
+        self._entries: OrderedDict[_CacheKey, _CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._disk_hits = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def fingerprint(
+        source: str,
+        symbol: str,
+        timeframe: int,
+        start_at: datetime | None,
+        end_at: datetime | None,
+        partitions: list[PartitionEntry],
+        partial: list[list] | None = None,
+    ) -> str:
+        payload = {
+            "query": [
+                source,
+                symbol,
+                int(timeframe),
+                start_at.isoformat() if start_at else None,
+                end_at.isoformat() if end_at else None,
+            ],
+            "partitions": sorted([p.path, p.rows, p.bytes] for p in partitions),
+        }
+        if partial:
+            # 取り込み中の足は保存されないまま更新されるので、値そのものを含める
+            payload["partial"] = partial
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(
+        self,
+        source: str,
+        symbol: str,
+        timeframe: int,
+        start_at: datetime | None,
+        end_at: datetime | None,
+        fingerprint: str,
+    ) -> pa.Table | None:
+        key = _CacheKey(source, symbol, int(timeframe), start_at, end_at)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.fingerprint == fingerprint:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry.table
+            if entry is not None:
+                self._remove(key)
+
+        table = self._read_disk(fingerprint)
+        with self._lock:
+            if table is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._insert(key, _CacheEntry(fingerprint, table, table.nbytes))
+        return table
+
+    def put(
+        self,
+        source: str,
+        symbol: str,
+        timeframe: int,
+        start_at: datetime | None,
+        end_at: datetime | None,
+        fingerprint: str,
+        table: pa.Table,
+    ):
+        key = _CacheKey(source, symbol, int(timeframe), start_at, end_at)
+        with self._lock:
+            self._insert(key, _CacheEntry(fingerprint, table, table.nbytes))
+        self._write_disk(fingerprint, table)
+
+    def invalidate(
+        self, source: str, symbol: str, start_at: datetime, end_at: datetime
+    ):
+        """[start_at, end_at) と重なる (source, symbol) のエントリを捨てる"""
+        start_at, end_at = as_utc(start_at), as_utc(end_at)
+        with self._lock:
+            for key in list(self._entries):
+                if key.source != source or key.symbol != symbol:
+                    continue
+                if key.overlaps(start_at, end_at):
+                    self._remove(key)
+                    self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                disk_hits=self._disk_hits,
+                evictions=self._evictions,
+                invalidations=self._invalidations,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self._max_bytes,
+            )
+
+    def _insert(self, key: _CacheKey, entry: _CacheEntry):
+        if key in self._entries:
+            self._remove(key)
+        if entry.nbytes > self._max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.nbytes
+        while self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._evictions += 1
+
+    def _remove(self, key: _CacheKey):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+
+    def _read_disk(self, fingerprint: str) -> pa.Table | None:
+        if self._disk_dir is None:
+            return None
+        path = Path(self._disk_dir, f"{fingerprint}.arrow")
+        try:
+            with pa.memory_map(str(path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        os.utime(path)
+        return table
+
+    def _write_disk(self, fingerprint: str, table: pa.Table):
+        if self._disk_dir is None:
+            return
+        self._disk_dir.mkdir(parents=True, exist_ok=True)
+        path = Path(self._disk_dir, f"{fingerprint}.arrow")
+        if path.exists():
+            return
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with pa.OSFile(str(tmp), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Failed to write OHLCV cache {path}: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        files = []
+        for path in self._disk_dir.glob("*.arrow"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self._max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class BacktestResultCache:
+    """バックテストの実行結果 (指標と要約) を fingerprint をキーにディスクへ保存する
+
+    fingerprint は戦略のソース・引数・読んだパーティションから作るので、どれかが
+    変われば別のエントリになる。古いエントリは ``max_disk_bytes`` を超えた分だけ
+    最後に使った順で消す。
+    """
+
+    FILES = ("metrics.csv", "summary.json")
+
+    def __init__(self, disk_dir: str | Path, max_disk_bytes: int = 1024**3):
+        self._disk_dir = Path(disk_dir)
+        self._max_disk_bytes = max_disk_bytes
+
+    def restore(self, fingerprint: str, run_dir: Path) -> bool:
+        """エントリがあれば実行ディレクトリに書き出して True を返す"""
+        entry = Path(self._disk_dir, fingerprint)
+        # summary.json は実行が最後まで終わったときだけ書かれる
+        if not Path(entry, "summary.json").exists():
+            return False
+        try:
+            for name in self.FILES:
+                if Path(entry, name).exists():
+                    shutil.copyfile(Path(entry, name), Path(run_dir, name))
+        except FileNotFoundError:
+            # 読んでいる間に容量超過で消された
+            return False
+        os.utime(entry)
+        return True
+
+    def store(self, fingerprint: str, run_dir: Path):
+        entry = Path(self._disk_dir, fingerprint)
+        if entry.exists() or not Path(run_dir, "summary.json").exists():
+            return
+        tmp = Path(self._disk_dir, f"{fingerprint}.{threading.get_ident()}.tmp")
+        try:
+            tmp.mkdir(parents=True, exist_ok=True)
+            for name in self.FILES:
+                if Path(run_dir, name).exists():
+                    shutil.copyfile(Path(run_dir, name), Path(tmp, name))
+            os.replace(tmp, entry)
+        except OSError as e:
+            logger.warning(f"Failed to write backtest cache {entry}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        entries = []
+        for path in self._disk_dir.iterdir():
+            if path.suffix == ".tmp" or not path.is_dir():
+                continue
+            try:
+                size = sum(f.stat().st_size for f in path.iterdir())
+                entries.append((path.stat().st_mtime, size, path))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self._max_disk_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+@dataclass(frozen=True)
+class _MarketSnapshot:
+    markets: dict
+    currencies: dict
+    loaded_at: float
+    # 生レスポンス (info) を持っているか。ディスクから読んだものは持たない
+    complete: bool = True
+
+
+class ExchangeMarketCache:
+    """``load_markets`` の結果のキャッシュと、それを設定した取引所インスタンスの生成
+
+    メモリ上では ``ttl_seconds`` の間そのまま返し、期限切れ後は古い値を返しつつ
+    バックグラウンドスレッドで読み直す。``disk_dir`` を指定すると生レスポンス (info)
+    を除いた zlib 圧縮の JSON としても保存し、起動直後でもシンボルの一覧はネットワークに出ずに返す。
+    インスタンスにもディスクの markets (info は空) をそのまま設定して起動直後に待たせず、
+    info を含む markets は最初にインスタンスを作ったときにバックグラウンドで読み直す。
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 6 * 60 * 60,
+        disk_dir: str | Path | None = None,
+        exchange_factory: Callable[[str], ccxt.Exchange] | None = None,
+    ):
+        self._ttl = ttl_seconds
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._exchange_factory = exchange_factory or _create_exchange
+        self._snapshots: dict[str, _MarketSnapshot] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+        self._loading: dict[str, threading.Lock] = {}
+
+    def exchange(self, exchange_name: str) -> ccxt.Exchange:
+        """markets を設定済みの同期インスタンス
+
+        ccxt のインスタンスはスレッドセーフではないので、呼び出し元ごとに新しく作る。
+        """
+        snapshot = self._exchange_snapshot(exchange_name)
+        exchange = self._exchange_factory(exchange_name)
+        exchange.set_markets(snapshot.markets, snapshot.currencies)
+        return exchange
+
+    def async_exchange(self, exchange_name: str) -> ccxt.async_support.Exchange:
+        """markets を設定済みの ``ccxt.async_support`` インスタンス
+
+        非同期版はイベントループをまたいで使えないので、毎回新しく作る。
+        """
+        return self._new_exchange(ccxt.async_support, exchange_name)
+
+    def pro_exchange(self, exchange_name: str) -> ccxt.pro.Exchange:
+        """markets を設定済みの ``ccxt.pro`` (WebSocket) インスタンス"""
+        return self._new_exchange(ccxt.pro, exchange_name)
+
+    def _new_exchange(self, module, exchange_name: str):
+        exchange_cls = getattr(module, exchange_name, None)
+        if exchange_cls is None:
+            raise ValueError(f"Unsupported exchange: {exchange_name}")
+        snapshot = self._exchange_snapshot(exchange_name)
+        exchange = exchange_cls()
+        exchange.set_markets(snapshot.markets, snapshot.currencies)
+        return exchange
+
+    def markets(self, exchange_name: str) -> dict:
+        return self._snapshot(exchange_name).markets
+
+    def symbols(self, exchange_name: str) -> list[str]:
+        return sorted(self.markets(exchange_name).keys())
+
+    def refresh(self, exchange_name: str) -> dict:
+        """ネットワークから読み直し、メモリとディスクを差し替える"""
+        return self._fetch(exchange_name).markets
+
+    def _snapshot(self, exchange_name: str) -> _MarketSnapshot:
+        with self._lock:
+            snapshot = self._snapshots.get(exchange_name)
+        if snapshot is None:
+            snapshot = self._load(exchange_name)
+        if time.time() - snapshot.loaded_at > self._ttl:
+            self._refresh_in_background(exchange_name)
+        return snapshot
+
+    def _exchange_snapshot(self, exchange_name: str) -> _MarketSnapshot:
+        snapshot = self._snapshot(exchange_name)
+        if not snapshot.complete:
+            # 取引所によってはリクエストを組み立てるときに info を読むので、早めに揃える
+            self._refresh_in_background(exchange_name)
+        return snapshot
+
+    def _load(self, exchange_name: str) -> _MarketSnapshot:
+        # 同じ取引所を複数のリクエストから同時に読み込まない
+        with self._loading_lock(exchange_name):
+            with self._lock:
+                snapshot = self._snapshots.get(exchange_name)
+            if snapshot is not None:
+                return snapshot
+            snapshot = self._read_disk(exchange_name)
+            if snapshot is None:
+                return self._fetch(exchange_name)
+            with self._lock:
+                self._snapshots.setdefault(exchange_name, snapshot)
+            return snapshot
+
+    def _fetch(self, exchange_name: str) -> _MarketSnapshot:
+        exchange = self._exchange_factory(exchange_name)
+        markets = exchange.load_markets(reload=True)
+        snapshot = _MarketSnapshot(
+            markets=markets,
+            currencies=exchange.currencies or {},
+            loaded_at=time.time(),
+        )
+        with self._lock:
+            self._snapshots[exchange_name] = snapshot
+        self._write_disk(exchange_name, snapshot)
+        logger.info(f"Loaded {len(markets)} markets for {exchange_name}")
+        return snapshot
+
+    def _refresh_in_background(self, exchange_name: str):
+        with self._lock:
+            if exchange_name in self._refreshing:
+                return
+            self._refreshing.add(exchange_name)
+
+        def run():
+            try:
+                self._fetch(exchange_name)
+            except Exception as e:
+                logger.warning(f"Failed to refresh markets for {exchange_name}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(exchange_name)
+
+        threading.Thread(
+            target=run, name=f"markets-{exchange_name}", daemon=True
+        ).start()
+
+    def _loading_lock(self, exchange_name: str) -> threading.Lock:
+        with self._lock:
+            return self._loading.setdefault(exchange_name, threading.Lock())
+
+    def _read_disk(self, exchange_name: str) -> _MarketSnapshot | None:
+        if self._disk_dir is None:
+            return None
+        path = Path(self._disk_dir, f"{exchange_name}.json.z")
+        try:
+            data = json.loads(zlib.decompress(path.read_bytes()))
+        except FileNotFoundError:
+            return None
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Ignoring broken market cache {path}: {e}")
+            return None
+        return _MarketSnapshot(
+            markets=_with_empty_info(data["markets"]),
+            currencies=_with_empty_info(data["currencies"]),
+            loaded_at=data["loaded_at"],
+            complete=False,
+        )
+
+    def _write_disk(self, exchange_name: str, snapshot: _MarketSnapshot):
+        if self._disk_dir is None:
+            return
+        self._disk_dir.mkdir(parents=True, exist_ok=True)
+        path = Path(self._disk_dir, f"{exchange_name}.json.z")
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        data = {
+            "markets": _compact(snapshot.markets),
+            "currencies": _compact(snapshot.currencies),
+            "loaded_at": snapshot.loaded_at,
+        }
+        try:
+            tmp.write_bytes(zlib.compress(json.dumps(data).encode("utf-8")))
+            os.replace(tmp, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Failed to write market cache {path}: {e}")
+            tmp.unlink(missing_ok=True)
+
+
+def _compact(entries: dict) -> dict:
+    # 取引所の生レスポンス (info) が大半を占めるので持たない
+    return {
+        key: (
+            {k: v for k, v in value.items() if k != "info"}
+            if isinstance(value, dict)
+            else value
+        )
+        for key, value in entries.items()
+    }
+
+
+def _with_empty_info(entries: dict) -> dict:
+    # info を直接引く取引所の実装が KeyError にならないよう、空で埋めておく
+    return {
+        key: {**value, "info": {}} if isinstance(value, dict) else value
+        for key, value in entries.items()
+    }
+
+
+def _create_exchange(exchange_name: str) -> ccxt.Exchange:
+    exchange_cls = getattr(ccxt, exchange_name, None)
+    if exchange_cls is None:
+        raise ValueError(f"Unsupported exchange: {exchange_name}")
+    return exchange_cls()
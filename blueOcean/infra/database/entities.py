@@ -3,6 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 
 from peewee import (
+    BooleanField,
     CharField,
     CompositeKey,
     DatabaseProxy,
@@ -59,6 +60,20 @@ class ContextEntity(BaseModel):
         indexes = ((("source", "symbol"), False),)
 
 
+class ContextClaimEntity(BaseModel):
+    """実行器がコンテキストを取った記録。コンテキストごとに最後に取ったものだけを持つ"""
+
+    context = ForeignKeyField(ContextEntity, primary_key=True, on_delete="CASCADE")
+    executor = CharField()
+    attempts = IntegerField(default=0)
+    claimed_at = DateTimeField()
+    heartbeat_at = DateTimeField()
+
+    class Meta:
+        table_name = "context_claims"
+        indexes = ((("executor",), False),)
+
+
 class SessionContextEntity(BaseModel):
     session_id = ForeignKeyField(SessionEntity, on_delete="CASCADE")
     context_id = ForeignKeyField(ContextEntity, on_delete="CASCADE", unique=True)
@@ -68,9 +83,88 @@ class SessionContextEntity(BaseModel):
         primary_key = CompositeKey("session_id", "context_id")
 
 
+class BackfillShardEntity(BaseModel):
+    source = CharField()
+    symbol = CharField()
+    # UTC (tzinfo なし) で保存する
+    start_at = DateTimeField()
+    end_at = DateTimeField()
+    cursor_at = DateTimeField(null=True)
+    done = BooleanField(default=False)
+
+    updated_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = "backfill_shards"
+        primary_key = CompositeKey("source", "symbol", "start_at")
+
+
+class OhlcvFetchJobEntity(BaseModel):
+    id = CharField(primary_key=True)
+    exchange = CharField()
+    symbol = CharField()
+    status = IntegerField(default=0)
+    attempts = IntegerField(default=0)
+    error = TextField(null=True)
+    worker = CharField(null=True)
+
+    created_at = DateTimeField(default=datetime.now)
+    started_at = DateTimeField(null=True)
+    finished_at = DateTimeField(null=True)
+    heartbeat_at = DateTimeField(null=True)
+
+    class Meta:
+        table_name = "ohlcv_fetch_jobs"
+        indexes = (
+            (("exchange", "symbol", "status"), False),
+            (("status", "created_at"), False),
+        )
+
+
+class WatchedSymbolEntity(BaseModel):
+    exchange = CharField()
+    symbol = CharField()
+    priority = IntegerField(default=0)
+    interval_seconds = IntegerField(default=300)
+    # UTC (tzinfo なし) で保存する
+    next_run_at = DateTimeField(null=True)
+    last_synced_at = DateTimeField(null=True)
+    failures = IntegerField(default=0)
+    last_error = TextField(null=True)
+
+    class Meta:
+        table_name = "watchlist"
+        primary_key = CompositeKey("exchange", "symbol")
+        indexes = ((("next_run_at",), False),)
+
+
+class WalkForwardWindowEntity(BaseModel):
+    session = ForeignKeyField(SessionEntity, on_delete="CASCADE")
+    window_index = IntegerField()
+    rank_by = CharField()
+    # UTC (tzinfo なし) で保存する
+    in_sample_start_at = DateTimeField()
+    in_sample_end_at = DateTimeField()
+    out_of_sample_start_at = DateTimeField()
+    out_of_sample_end_at = DateTimeField()
+    in_sample_context_ids_json = TextField()
+    # 先に紐づけてからコンテキストを保存するので外部キーにはしない
+    out_of_sample_context_id = CharField(null=True)
+    skipped = BooleanField(default=False)
+
+    class Meta:
+        table_name = "walk_forward_windows"
+        primary_key = CompositeKey("session", "window_index")
+
+
 entities: list[type[Model]] = [
     SessionEntity,
     StrategySnapshotEntity,
     ContextEntity,
+    ContextClaimEntity,
     SessionContextEntity,
+    BackfillShardEntity,
+    OhlcvFetchJobEntity,
+    WatchedSymbolEntity,
+    WalkForwardWindowEntity,
 ]
@@ -2,7 +2,7 @@ import json
 from datetime import datetime
 from typing import overload
 
-from blueOcean.domain.context import Context, ContextId
+from blueOcean.domain.context import Context, ContextId, ContextStatus
 from blueOcean.domain.ohlcv import Timeframe
 from blueOcean.domain.session import Session, SessionId
 from blueOcean.domain.strategy import (
@@ -49,6 +49,7 @@ def to_domain(*args):
             timeframe=Timeframe.from_compression(args[0].timeframe),
             start_at=args[0].started_at,
             end_at=args[0].finished_at,
+            status=ContextStatus(args[0].status),
         )
     if len(args) == 1 and isinstance(args[0], StrategySnapshotEntity):
         return StrategySnapshot(
@@ -85,6 +86,7 @@ def to_entity(*args):
             timeframe=args[0].timeframe.value,
             started_at=args[0].start_at,
             finished_at=args[0].end_at,
+            status=args[0].status.value,
             parameters_json=json.dumps({"args": args[0].strategy_args}),
         )
     if len(args) == 1 and isinstance(args[0], StrategySnapshot):
@@ -1,82 +1,408 @@
-from datetime import datetime
+import json
+import shutil
+import threading
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
+from typing import Callable, Iterable
 
 import duckdb
-import pandas as pd
+import numpy as np
 import pyarrow as pa
-import pyarrow.parquet as pq
 from injector import inject
-from peewee import SqliteDatabase
+from peewee import EXCLUDED, SqliteDatabase, chunked
 
-from blueOcean.domain.context import Context, ContextId, IContextRepository
-from blueOcean.domain.ohlcv import IOhlcvRepository, Ohlcv, Timeframe
+from blueOcean.domain.backfill import BackfillShard, IBackfillCheckpointRepository
+from blueOcean.domain.context import (
+    Context,
+    ContextId,
+    ContextStatus,
+    IContextRepository,
+)
+from blueOcean.domain.job import IOhlcvFetchJobQueue, JobId, JobStatus, OhlcvFetchJob
+from blueOcean.domain.ohlcv import (
+    IOhlcvRepository,
+    Ohlcv,
+    OhlcvColumns,
+    OhlcvCompleteness,
+    Timeframe,
+)
 from blueOcean.domain.session import ISessionRepository, Session, SessionId
 from blueOcean.domain.strategy import (
     IStrategySnapshotRepository,
     StrategySnapshot,
     StrategySnapshotId,
 )
+from blueOcean.domain.walkforward import (
+    IWalkForwardRepository,
+    WalkForward,
+    WalkForwardWindow,
+)
+from blueOcean.domain.watchlist import IWatchlistRepository, WatchedSymbol
+from blueOcean.infra.caches import OhlcvQueryCache
 from blueOcean.infra.database.entities import (
+    BackfillShardEntity,
+    ContextClaimEntity,
     ContextEntity,
+    OhlcvFetchJobEntity,
     SessionContextEntity,
     SessionEntity,
     StrategySnapshotEntity,
+    WalkForwardWindowEntity,
+    WatchedSymbolEntity,
 )
 from blueOcean.infra.database.mapper import to_domain, to_entity
 from blueOcean.infra.logging import logger
+from blueOcean.infra.stores import (
+    CoverageIndex,
+    ParquetPartitionStore,
+    PartitionManifest,
+    PendingIntervals,
+    aligned,
+    as_utc,
+    merge_intervals,
+    scan_sql,
+)
 
 
 class OhlcvRepository(IOhlcvRepository):
+    COLUMNS = list(OhlcvColumns.NAMES)
+    SCHEMA = OhlcvColumns.SCHEMA
+    # 1m 以外の Timeframe はすべて集約済みパーティションとして保持する
+    ROLLUP_TIMEFRAMES = [tf for tf in Timeframe if tf != Timeframe.ONE_MINUTE]
+    # 取引所から直接取得した粗い足も、Timeframe ごとに別シリーズとして保持できる
+    NATIVE_TIMEFRAMES = ROLLUP_TIMEFRAMES
+
     @inject
-    def __init__(self, base_path: str = "./data"):
+    def __init__(self, base_path: str = "./data", cache: OhlcvQueryCache | None = None):
         self._base_dir = base_path or "./data"
-        self.__con = duckdb.connect()
+        self._cache = cache
+        self.__database = duckdb.connect()
+        self.__local = threading.local()
+
+    @property
+    def __con(self) -> duckdb.DuckDBPyConnection:
+        # DuckDB の接続はスレッドセーフではないので、スレッドごとに cursor を持つ
+        con = getattr(self.__local, "con", None)
+        if con is None:
+            con = self.__local.con = self.__database.cursor()
+            con.execute("SET TimeZone='UTC'")
+        return con
 
     def _parse_from_symbol_to_dir(self, symbol: str) -> str:
         return symbol.replace("/", "_")
 
+    def _store(self, source: str, symbol: str) -> ParquetPartitionStore:
+        symbol_dir = self._parse_from_symbol_to_dir(symbol)
+        return ParquetPartitionStore(Path(self._base_dir, source, symbol_dir))
+
+    def _rollup_store(
+        self, source: str, symbol: str, timeframe: Timeframe
+    ) -> ParquetPartitionStore:
+        base_dir = self._store(source, symbol).directory
+        return ParquetPartitionStore(Path(base_dir, "_rollups", f"{int(timeframe)}m"))
+
+    def _native_store(
+        self, source: str, symbol: str, timeframe: Timeframe
+    ) -> ParquetPartitionStore:
+        base_dir = self._store(source, symbol).directory
+        return ParquetPartitionStore(Path(base_dir, "_native", f"{int(timeframe)}m"))
+
+    def _series_store(
+        self, source: str, symbol: str, timeframe: Timeframe
+    ) -> ParquetPartitionStore:
+        if timeframe == Timeframe.ONE_MINUTE:
+            return self._store(source, symbol)
+        return self._native_store(source, symbol, timeframe)
+
     def save(self, ohlcv, source, symbol):
-        df = Ohlcv.to_dataframe(ohlcv)
-        df = df.sort_index()
-
-        df["year_month"] = df.index.strftime("%Y-%m")
-
-        for ym, chunk in df.groupby("year_month"):
-            symbol_dir = self._parse_from_symbol_to_dir(symbol)
-            out_dir = Path(self._base_dir, source, symbol_dir)
-            out_dir.mkdir(parents=True, exist_ok=True)
-            filename = Path(out_dir, f"{ym}.parquet")
-            chunk = chunk.drop(columns=["year_month"])
-            chunk["time"] = chunk.index
-            chunk = chunk[["time", "open", "high", "low", "close", "volume"]]
-            table = pa.Table.from_pandas(chunk, preserve_index=False)
-
-            if filename.exists():
-                old = pq.read_table(filename).to_pandas()
-                merged = (
-                    pd.concat([old, chunk], ignore_index=True)
-                    .drop_duplicates(subset=["time"])
-                    .sort_values("time")
-                )
-                table = pa.Table.from_pandas(merged, preserve_index=False)
+        self.save_batch(Ohlcv.to_arrow(ohlcv), source, symbol)
 
-            logger.info(f"{symbol} {ym} parquet update")
-            pq.write_table(table, filename)
+    def save_batch(self, batch, source, symbol, timeframe=Timeframe.ONE_MINUTE):
+        # 月ファイルの読み直し・書き直しはせず、バッチごとに不変のフラグメントを追加する。
+        # 重複の解消は読み込み時 (後から書いたフラグメントを優先) に行う。
+        table = batch if isinstance(batch, pa.Table) else pa.Table.from_batches([batch])
+        if table.num_rows == 0:
+            return
+        table = _sorted_unique(table.select(self.COLUMNS).cast(self.SCHEMA))
 
-    def get_latest_timestamp(self, source, symbol):
-        symbol_dir = self._parse_from_symbol_to_dir(symbol)
-        path = Path(self._base_dir, source, symbol_dir, "*.parquet")
+        entries = self._series_store(source, symbol, timeframe).append(table)
+        for entry in entries:
+            logger.info(f"{symbol} {entry.month} parquet append {entry.path}")
+        if timeframe == Timeframe.ONE_MINUTE:
+            # 集約は読み込み時か圧縮時にまとめて作り直し、ここでは対象の区間を記録するだけにする
+            self._pending_rollups(source, symbol).add(
+                _micros(table["time"][0].as_py()),
+                _micros(table["time"][-1].as_py()) + _step(1),
+            )
+        self._update_coverage(source, symbol, table["time"], timeframe)
+        if self._cache:
+            for entry in entries:
+                start_at = datetime.strptime(entry.month, "%Y-%m").replace(tzinfo=UTC)
+                end_at = (start_at + timedelta(days=31)).replace(day=1)
+                self._cache.invalidate(source, symbol, start_at, end_at)
+
+    def publish_partial(self, batch, source, symbol):
+        table = batch if isinstance(batch, pa.Table) else pa.Table.from_batches([batch])
+        table = _sorted_unique(table.select(self.COLUMNS).cast(self.SCHEMA))
+        rows = [
+            [row["time"].isoformat(), *(row[name] for name in self.COLUMNS[1:])]
+            for row in table.to_pylist()
+        ]
+        self._store(source, symbol).manifest.set_partial(rows)
+
+    def _partial(
+        self,
+        source: str,
+        symbol: str,
+        start_date: datetime | None,
+        end_date: datetime | None,
+    ) -> list[list]:
+        rows = []
+        for row in PartitionManifest(self._store(source, symbol).directory).partial():
+            time = datetime.fromisoformat(row[0])
+            if start_date and time < as_utc(start_date):
+                continue
+            if end_date and time > as_utc(end_date):
+                continue
+            rows.append(row)
+        return rows
+
+    def materialize_rollups(self, source: str, symbol: str):
+        """1m の全履歴から集約済みパーティションを作り直す"""
+        with self._pending_rollups(source, symbol).drain():
+            for timeframe in self.ROLLUP_TIMEFRAMES:
+                rollup = self._rollup_store(source, symbol, timeframe)
+                if rollup.directory.exists():
+                    shutil.rmtree(rollup.directory)
+            self._update_rollups(source, symbol, None, None)
 
-        sql = f"""
-            SELECT max(time) AS latest
-            FROM read_parquet('{path}')
-        """
+    def _pending_rollups(self, source: str, symbol: str) -> PendingIntervals:
+        base_dir = self._store(source, symbol).directory
+        return PendingIntervals(Path(base_dir, "_rollups"))
+
+    def _refresh_rollups(self, source: str, symbol: str):
+        """取り込み済みでまだ集約に反映していない区間を、まとめて再集約する"""
+        pending = self._pending_rollups(source, symbol)
+        if not pending.directory.exists():
+            return
+        # 全 Timeframe が 1 日を割り切るので、日単位に広げた範囲を読めば足りる
+        day = _step(Timeframe.ONE_DAY)
+        with pending.drain() as intervals:
+            days = merge_intervals(
+                np.column_stack(
+                    (intervals[:, 0] // day * day, -(-intervals[:, 1] // day) * day)
+                )
+            )
+            for start, end in days:
+                self._update_rollups(
+                    source, symbol, _from_micros(start), _from_micros(end)
+                )
 
+    def _update_rollups(
+        self,
+        source: str,
+        symbol: str,
+        start_at: datetime | None,
+        end_at: datetime | None,
+    ):
+        """[start_at, end_at) (日境界) のバケットを 1m から再集約し、新しいフラグメントとして追記する"""
+        store = self._store(source, symbol)
+        files = store.files(start_at, end_at)
+        if not files:
+            return
+        where = []
+        if start_at:
+            where.append(f"time >= '{start_at.isoformat()}'")
+        if end_at:
+            where.append(f"time < '{end_at.isoformat()}'")
+        where_sql = "WHERE " + " AND ".join(where) if where else ""
+        sql = scan_sql(files, where_sql)
+        minutes = self.__con.execute(sql).fetch_arrow_table()
+
+        self.__con.register("minutes", minutes)
         try:
-            row = self.__con.execute(sql).fetchone()
-            return pd.to_datetime(row[0]).to_pydatetime()
-        except:
-            return None
+            for timeframe in self.ROLLUP_TIMEFRAMES:
+                rollup = self._rollup_store(source, symbol, timeframe)
+                if start_at is not None and not rollup.manifest.exists():
+                    # 以前のデータに対する集約がまだ無いので、全履歴から作る
+                    self._materialize_rollup(store, rollup, timeframe)
+                    continue
+                sql = self._aggregate_sql("SELECT * FROM minutes", timeframe)
+                rollup.append(self.__con.execute(sql).fetch_arrow_table())
+        finally:
+            self.__con.unregister("minutes")
+
+    def _materialize_rollup(
+        self,
+        store: ParquetPartitionStore,
+        rollup: ParquetPartitionStore,
+        timeframe: Timeframe,
+    ):
+        sql = self._aggregate_sql(scan_sql(store.files()), timeframe)
+        rollup.append(self.__con.execute(sql).fetch_arrow_table())
+        logger.info(f"Materialized {int(timeframe)}m rollup {rollup.directory}")
+
+    def _resolve_store(
+        self,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe,
+        start_date: datetime | None,
+        end_date: datetime | None,
+    ) -> ParquetPartitionStore:
+        return (
+            self._resolve_native(source, symbol, timeframe, start_date, end_date)
+            or self._resolve_rollup(source, symbol, timeframe, start_date, end_date)
+            or self._store(source, symbol)
+        )
+
+    def _resolve_native(
+        self,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe,
+        start_date: datetime | None,
+        end_date: datetime | None,
+    ) -> ParquetPartitionStore | None:
+        # 1m で範囲がそろっていれば 1m 由来の集約を使い、足りないときだけ粗い足で答える
+        for level in sorted(self.NATIVE_TIMEFRAMES, reverse=True):
+            if timeframe % level != 0 or not aligned(
+                start_date, end_date, level.to_timedelta()
+            ):
+                continue
+            native = self._coverage(source, symbol, level)
+            if not native.exists():
+                continue
+            covered, _ = native.load()
+            if len(covered) == 0:
+                continue
+            start = _micros(start_date) if start_date else int(covered[0, 0])
+            end = (
+                _micros(_floor_time(end_date, timedelta(minutes=1))) + _step(1)
+                if end_date
+                else int(covered[-1, 1])
+            )
+            if start < end and len(self._coverage(source, symbol).gaps(start, end)):
+                return self._native_store(source, symbol, level)
+        return None
+
+    def _resolve_rollup(
+        self,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe,
+        start_date: datetime | None,
+        end_date: datetime | None,
+    ) -> ParquetPartitionStore | None:
+        # 範囲の端がバケット境界に揃っていれば、粗い集約から同じ結果を組み立てられる
+        levels = [
+            level
+            for level in sorted(self.ROLLUP_TIMEFRAMES, reverse=True)
+            if timeframe % level == 0
+            and aligned(start_date, end_date, level.to_timedelta())
+        ]
+        if levels:
+            self._refresh_rollups(source, symbol)
+        for level in levels:
+            rollup = self._rollup_store(source, symbol, level)
+            if PartitionManifest(rollup.directory).exists():
+                return rollup
+        return None
+
+    def _aggregate_sql(self, source_sql: str, timeframe: Timeframe) -> str:
+        # フラグメントの読み込み順は保証されないため first/last ではなく time 基準で取る
+        return f"""
+                SELECT
+                    time_bucket(INTERVAL {timeframe.to_duck()}, time) AS time,
+                    arg_min(open, time) AS open,
+                    max(high) AS high,
+                    min(low) AS low,
+                    arg_max(close, time) AS close,
+                    sum(volume) AS volume
+                FROM ({source_sql})
+                GROUP BY 1
+                ORDER BY time
+            """
+
+    def _coverage(
+        self,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ) -> CoverageIndex:
+        store = self._series_store(source, symbol, timeframe)
+        coverage = CoverageIndex(store.directory, _step(timeframe))
+        if not coverage.exists() and store.directory.exists():
+            # 既存の履歴に対する coverage がまだ無いので、全件の時刻から作る
+            files = store.files()
+            times = []
+            if files:
+                sql = f"SELECT DISTINCT time FROM read_parquet({files}) ORDER BY time"
+                times = _to_micros(self.__con.execute(sql).fetch_arrow_table()["time"])
+            coverage.rebuild(times)
+        return coverage
+
+    def _update_coverage(
+        self,
+        source: str,
+        symbol: str,
+        times: pa.ChunkedArray,
+        timeframe: Timeframe = Timeframe.ONE_MINUTE,
+    ):
+        store = self._series_store(source, symbol, timeframe)
+        coverage = CoverageIndex(store.directory, _step(timeframe))
+        if coverage.exists():
+            coverage.add(_to_micros(times))
+        else:
+            self._coverage(source, symbol, timeframe)
+
+    def get_coverage(self, source, symbol):
+        covered, _ = self._coverage(source, symbol).load()
+        return [(_from_micros(start), _from_micros(end)) for start, end in covered]
+
+    def find_gaps(
+        self, source, symbol, start_at, end_at, timeframe=Timeframe.ONE_MINUTE
+    ):
+        coverage = self._coverage(source, symbol, timeframe)
+        gaps = coverage.gaps(_micros(start_at), _micros(end_at))
+        return [(_from_micros(start), _from_micros(end)) for start, end in gaps]
+
+    def mark_unavailable(
+        self, source, symbol, start_at, end_at, timeframe=Timeframe.ONE_MINUTE
+    ):
+        if start_at >= end_at:
+            return
+        self._coverage(source, symbol, timeframe).mark_unavailable(
+            _micros(start_at), _micros(end_at)
+        )
+
+    def clear_unavailable(self, source, symbol, timeframe=Timeframe.ONE_MINUTE):
+        self._coverage(source, symbol, timeframe).clear_unavailable()
+
+    def get_completeness(self, source, symbol):
+        coverage = self._coverage(source, symbol)
+        covered, _ = coverage.load()
+        if len(covered) == 0:
+            return OhlcvCompleteness(source, symbol, None, None, 0, 0, 0, [])
+        first, last = int(covered[0, 0]), int(covered[-1, 1])
+        step = coverage.step
+        gaps = coverage.gaps(first, last)
+        expected = (last - first) // step
+        present = int(np.sum(covered[:, 1] - covered[:, 0]) // step)
+        missing = int(np.sum(gaps[:, 1] - gaps[:, 0]) // step)
+        return OhlcvCompleteness(
+            source=source,
+            symbol=symbol,
+            first_at=_from_micros(first),
+            last_at=_from_micros(last - step),
+            expected=expected,
+            present=present,
+            unavailable=expected - present - missing,
+            gaps=[(_from_micros(start), _from_micros(end)) for start, end in gaps],
+        )
+
+    def get_latest_timestamp(self, source, symbol, timeframe=Timeframe.ONE_MINUTE):
+        return self._series_store(source, symbol, timeframe).latest()
 
     def find(
         self,
@@ -86,31 +412,213 @@ class OhlcvRepository(IOhlcvRepository):
         start_date=None,
         end_date=None,
     ):
-        symbol_dir = self._parse_from_symbol_to_dir(symbol)
-        path = Path(self._base_dir, source, symbol_dir, "*.parquet")
+        table = self.find_table(symbol, source, timeframe, start_date, end_date)
+        return Ohlcv.from_arrow(table)
+
+    def find_table(
+        self,
+        symbol,
+        source,
+        timeframe=Timeframe.ONE_MINUTE,
+        start_date=None,
+        end_date=None,
+    ):
+        store = self._resolve_store(source, symbol, timeframe, start_date, end_date)
+        partial = self._partial(source, symbol, start_date, end_date)
+        if self._cache is None:
+            return self._find_table(store, timeframe, start_date, end_date, partial)
+
+        partitions = store.manifest.select(start_date, end_date)
+        query = (source, symbol, int(timeframe), start_date, end_date)
+        fingerprint = OhlcvQueryCache.fingerprint(*query, partitions, partial)
+        table = self._cache.get(*query, fingerprint)
+        if table is None:
+            table = self._find_table(store, timeframe, start_date, end_date, partial)
+            self._cache.put(*query, fingerprint, table)
+        return table
 
+    def fingerprint(
+        self,
+        symbol,
+        source,
+        timeframe=Timeframe.ONE_MINUTE,
+        start_date=None,
+        end_date=None,
+    ):
+        store = self._resolve_store(source, symbol, timeframe, start_date, end_date)
+        return OhlcvQueryCache.fingerprint(
+            source,
+            symbol,
+            int(timeframe),
+            start_date,
+            end_date,
+            store.manifest.select(start_date, end_date),
+            self._partial(source, symbol, start_date, end_date),
+        )
+
+    def _find_table(
+        self,
+        store: ParquetPartitionStore,
+        timeframe: Timeframe,
+        start_date: datetime | None,
+        end_date: datetime | None,
+        partial: list[list],
+    ) -> pa.Table:
+        where_sql = self._where_sql(start_date, end_date)
+        table = self._scan(
+            self.__con,
+            lambda: store.files(start_date, end_date),
+            timeframe,
+            where_sql,
+            partial,
+        )
+        return table if table is not None else self.SCHEMA.empty_table()
+
+    def iter_batches(
+        self,
+        symbol,
+        source,
+        timeframe=Timeframe.ONE_MINUTE,
+        start_date=None,
+        end_date=None,
+        batch_size=65536,
+    ):
+        store = self._resolve_store(source, symbol, timeframe, start_date, end_date)
+        where_sql = self._where_sql(start_date, end_date)
+        partial: dict[str, list[list]] = {}
+        for row in self._partial(source, symbol, start_date, end_date):
+            month = as_utc(datetime.fromisoformat(row[0])).strftime("%Y-%m")
+            partial.setdefault(month, []).append(row)
+        # バケットは月をまたがないので、月単位に集約して順に流せばメモリは 1 か月分で済む。
+        # 呼び出し側が途中で他のクエリを投げても結果が壊れないよう専用のカーソルを使う。
+        cursor = self.__con.cursor()
+        cursor.execute("SET TimeZone='UTC'")
+        pending: list[pa.RecordBatch] = []
+        pending_rows = 0
+        try:
+            months = set(store.files_by_month(start_date, end_date)) | set(partial)
+            for month in sorted(months):
+                table = self._scan(
+                    cursor,
+                    lambda: store.files_by_month(start_date, end_date).get(month),
+                    timeframe,
+                    where_sql,
+                    partial.get(month, []),
+                )
+                if table is None:
+                    continue
+                for batch in table.to_batches(max_chunksize=batch_size):
+                    pending.append(batch)
+                    pending_rows += batch.num_rows
+                    while pending_rows >= batch_size:
+                        head, pending = self._split_batches(pending, batch_size)
+                        pending_rows -= batch_size
+                        yield head
+            if pending_rows:
+                yield self._split_batches(pending, pending_rows)[0]
+        finally:
+            cursor.close()
+
+    def compact(self, source, symbol, row_group_size=None):
+        self._refresh_rollups(source, symbol)
+        stores = (
+            [self._store(source, symbol)]
+            + [
+                self._rollup_store(source, symbol, timeframe)
+                for timeframe in self.ROLLUP_TIMEFRAMES
+            ]
+            + [
+                self._native_store(source, symbol, timeframe)
+                for timeframe in self.NATIVE_TIMEFRAMES
+            ]
+        )
+        return sum(
+            len(store.compact(row_group_size=row_group_size)) for store in stores
+        )
+
+    def _read(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        select_files: Callable[[], list[str] | None],
+        build_sql: Callable[[list[str]], str],
+    ) -> pa.Table | None:
+        # 圧縮で古いフラグメントが消された直後だった場合は、manifest を読み直して 1 度だけやり直す
+        for attempt in range(2):
+            files = select_files()
+            if not files:
+                return None
+            try:
+                return (
+                    con.execute(build_sql(files)).fetch_arrow_table().cast(self.SCHEMA)
+                )
+            except duckdb.IOException:
+                if attempt:
+                    raise
+                logger.warning("Partition files changed while reading, retrying")
+
+    def _scan(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        select_files: Callable[[], list[str] | None],
+        timeframe: Timeframe,
+        where_sql: str,
+        partial: list[list],
+    ) -> pa.Table | None:
+        """保存済みのファイルと未保存の足をまとめて ``timeframe`` に集約する"""
+        if not partial:
+            return self._read(
+                con,
+                select_files,
+                lambda files: self._aggregate_sql(
+                    scan_sql(files, where_sql), timeframe
+                ),
+            )
+        columns = list(zip(*partial))
+        times = [datetime.fromisoformat(t) for t in columns[0]]
+        con.register(
+            "partial_bars", pa.table([times, *columns[1:]], schema=self.SCHEMA)
+        )
+        try:
+            table = self._read(
+                con,
+                select_files,
+                lambda files: self._aggregate_sql(
+                    scan_sql(files, where_sql, "partial_bars"), timeframe
+                ),
+            )
+            if table is None:
+                sql = self._aggregate_sql(
+                    f"SELECT * FROM partial_bars {where_sql}", timeframe
+                )
+                table = con.execute(sql).fetch_arrow_table().cast(self.SCHEMA)
+            return table
+        finally:
+            con.unregister("partial_bars")
+
+    def _split_batches(
+        self, batches: list[pa.RecordBatch], size: int
+    ) -> tuple[pa.RecordBatch, list[pa.RecordBatch]]:
+        table = pa.Table.from_batches(batches, schema=self.SCHEMA)
+        head = table.slice(0, size).combine_chunks().to_batches()[0]
+        return head, table.slice(size).to_batches()
+
+    def _where_sql(self, start_date: datetime | None, end_date: datetime | None):
         where = []
         if start_date:
             where.append(f"time >= '{start_date.isoformat()}'")
         if end_date:
             where.append(f"time <= '{end_date.isoformat()}'")
+        return "WHERE " + " AND ".join(where) if where else ""
 
-        where_sql = "WHERE " + " AND ".join(where) if where else ""
-        sql = f"""
-                SELECT
-                    time_bucket(INTERVAL {timeframe.to_duck()}, time) AS time,
-                    first(open) AS open,
-                    max(high) AS high,
-                    min(low) AS low,
-                    last(close) AS close,
-                    sum(volume) AS volume
-                FROM read_parquet('{path}')
-                {where_sql}
-                GROUP BY 1
-                ORDER BY time
-            """
-        df = self.__con.execute(sql).df()
-        return Ohlcv.from_dataframe(df)
+
+def _step(timeframe: int) -> int:
+    return int(timeframe) * 60_000_000
+
+
+def _floor_time(value: datetime, step: timedelta) -> datetime:
+    value = as_utc(value)
+    epoch = datetime(1970, 1, 1, tzinfo=UTC)
+    return epoch + (value - epoch) // step * step
 
 
 class SessionRepository(ISessionRepository):
@@ -153,6 +661,10 @@ class SessionRepository(ISessionRepository):
 
 
 class ContextRepository(IContextRepository):
+    # これより長くハートビートが途絶えた実行中のコンテキストは、落ちた実行器のものとみなして取り直す
+    STALE_AFTER = timedelta(minutes=5)
+    MAX_ATTEMPTS = 3
+
     @inject
     def __init__(self, connection: SqliteDatabase):
         self._con = connection
@@ -191,12 +703,113 @@ class ContextRepository(IContextRepository):
                     ContextEntity.finished_at: data["finished_at"],
                     ContextEntity.strategy_snapshot: data["strategy_snapshot"],
                     ContextEntity.parameters_json: data["parameters_json"],
+                    ContextEntity.status: data["status"],
                 },
             )
             .execute()
         )
         return context
 
+    def save_in_session(
+        self, session_id: SessionId, *contexts: Context
+    ) -> list[Context]:
+        # スイープでは数千件になるので、1 トランザクションでまとめて書く
+        with self._con.atomic():
+            _insert_in_session(session_id, contexts)
+        return list(contexts)
+
+    def claim(
+        self, limit: int | None = None, executor: str | None = None
+    ) -> list[Context]:
+        now = datetime.now()
+        # 別プロセスの実行器と取り合っても同じコンテキストを二重に取らない
+        with self._con.atomic(lock_type="IMMEDIATE"):
+            self._requeue_stale(now)
+            entities = list(
+                ContextEntity.select()
+                .where(ContextEntity.status == ContextStatus.PENDING)
+                .order_by(ContextEntity.created_at)
+                .limit(limit)
+            )
+            if not entities:
+                return []
+            ids = [e.id for e in entities]
+            ContextEntity.update(status=ContextStatus.RUNNING).where(
+                ContextEntity.id.in_(ids)
+            ).execute()
+            claims = [
+                {
+                    "context": id,
+                    "executor": executor or "",
+                    "attempts": 1,
+                    "claimed_at": now,
+                    "heartbeat_at": now,
+                }
+                for id in ids
+            ]
+            for batch in chunked(claims, 500):
+                ContextClaimEntity.insert_many(batch).on_conflict(
+                    conflict_target=[ContextClaimEntity.context],
+                    update={
+                        ContextClaimEntity.executor: EXCLUDED.executor,
+                        ContextClaimEntity.attempts: ContextClaimEntity.attempts + 1,
+                        ContextClaimEntity.claimed_at: EXCLUDED.claimed_at,
+                        ContextClaimEntity.heartbeat_at: EXCLUDED.heartbeat_at,
+                    },
+                ).execute()
+        contexts = [to_domain(entity) for entity in entities]
+        for context in contexts:
+            context.status = ContextStatus.RUNNING
+        return contexts
+
+    def _requeue_stale(self, now: datetime):
+        # 取った記録の無い実行中のコンテキスト (記録を始める前のもの) も取り直す
+        alive = ContextClaimEntity.select(ContextClaimEntity.context).where(
+            ContextClaimEntity.heartbeat_at >= now - self.STALE_AFTER
+        )
+        stale = [
+            e.id
+            for e in ContextEntity.select(ContextEntity.id).where(
+                (ContextEntity.status == ContextStatus.RUNNING)
+                & ContextEntity.id.not_in(alive)
+            )
+        ]
+        if stale:
+            logger.warning(f"Requeue {len(stale)} contexts of lost executors")
+            self._release(stale)
+
+    def heartbeat(self, executor: str):
+        running = ContextEntity.select(ContextEntity.id).where(
+            ContextEntity.status == ContextStatus.RUNNING
+        )
+        ContextClaimEntity.update(heartbeat_at=datetime.now()).where(
+            (ContextClaimEntity.executor == executor)
+            & ContextClaimEntity.context.in_(running)
+        ).execute()
+
+    def release(self, id: ContextId) -> ContextStatus:
+        with self._con.atomic():
+            self._release([id.value])
+            return ContextStatus(ContextEntity.get_by_id(id.value).status)
+
+    def _release(self, ids: list[str]):
+        # 何度取っても終わらないコンテキスト (ワーカーごと落とすものなど) は諦める
+        exhausted = ContextClaimEntity.select(ContextClaimEntity.context).where(
+            ContextClaimEntity.attempts >= self.MAX_ATTEMPTS
+        )
+        running = ContextEntity.id.in_(ids) & (
+            ContextEntity.status == ContextStatus.RUNNING
+        )
+        ContextEntity.update(status=ContextStatus.FAILED).where(
+            running & ContextEntity.id.in_(exhausted)
+        ).execute()
+        ContextEntity.update(status=ContextStatus.PENDING).where(running).execute()
+
+    def update_status(self, id: ContextId, status: ContextStatus):
+        ContextEntity.update(status=status).where(
+            ContextEntity.id == id.value
+        ).execute()
+
 
 class StrategySnapshotRepository(IStrategySnapshotRepository):
     @inject
@@ -230,3 +843,436 @@ class StrategySnapshotRepository(IStrategySnapshotRepository):
             .execute()
         )
         return snapshot
+
+
+class BackfillCheckpointRepository(IBackfillCheckpointRepository):
+    @inject
+    def __init__(self, connection: SqliteDatabase):
+        self._con = connection
+
+    def find_by_symbol(self, source: str, symbol: str) -> list[BackfillShard]:
+        query = (
+            BackfillShardEntity.select()
+            .where(
+                (BackfillShardEntity.source == source)
+                & (BackfillShardEntity.symbol == symbol)
+            )
+            .order_by(BackfillShardEntity.start_at)
+        )
+        return [
+            BackfillShard(
+                source=e.source,
+                symbol=e.symbol,
+                start_at=e.start_at.replace(tzinfo=UTC),
+                end_at=e.end_at.replace(tzinfo=UTC),
+                cursor_at=e.cursor_at.replace(tzinfo=UTC) if e.cursor_at else None,
+                done=e.done,
+            )
+            for e in query
+        ]
+
+    def save(self, *shards: BackfillShard):
+        rows = [
+            {
+                "source": s.source,
+                "symbol": s.symbol,
+                "start_at": _naive_utc(s.start_at),
+                "end_at": _naive_utc(s.end_at),
+                "cursor_at": _naive_utc(s.cursor_at) if s.cursor_at else None,
+                "done": s.done,
+                "updated_at": datetime.now(),
+            }
+            for s in shards
+        ]
+        if not rows:
+            return
+        with self._con.atomic():
+            (
+                BackfillShardEntity.insert_many(rows)
+                .on_conflict(
+                    conflict_target=[
+                        BackfillShardEntity.source,
+                        BackfillShardEntity.symbol,
+                        BackfillShardEntity.start_at,
+                    ],
+                    preserve=[
+                        BackfillShardEntity.end_at,
+                        BackfillShardEntity.cursor_at,
+                        BackfillShardEntity.done,
+                        BackfillShardEntity.updated_at,
+                    ],
+                )
+                .execute()
+            )
+
+    def delete_by_symbol(self, source: str, symbol: str):
+        BackfillShardEntity.delete().where(
+            (BackfillShardEntity.source == source)
+            & (BackfillShardEntity.symbol == symbol)
+        ).execute()
+
+
+class OhlcvFetchJobQueue(IOhlcvFetchJobQueue):
+    """SQLite のテーブルをそのままキューとして使う
+
+    enqueue と claim は ``BEGIN IMMEDIATE`` で書き込みロックを取ってから読むので、
+    別プロセスのワーカーと同時に呼ばれても重複登録・二重取得にならない。
+    """
+
+    # これより長くハートビートが途絶えた実行中ジョブは、落ちたワーカーのものとみなして積み直す
+    STALE_AFTER = timedelta(minutes=5)
+    MAX_ATTEMPTS = 3
+
+    @inject
+    def __init__(self, connection: SqliteDatabase):
+        self._con = connection
+
+    def enqueue(self, exchange: str, symbol: str) -> OhlcvFetchJob:
+        with self._con.atomic(lock_type="IMMEDIATE"):
+            entity = (
+                OhlcvFetchJobEntity.select()
+                .where(
+                    (OhlcvFetchJobEntity.exchange == exchange)
+                    & (OhlcvFetchJobEntity.symbol == symbol)
+                    & OhlcvFetchJobEntity.status.in_(_ACTIVE)
+                )
+                .order_by(OhlcvFetchJobEntity.created_at)
+                .first()
+            )
+            if entity is None:
+                entity = OhlcvFetchJobEntity.create(
+                    id=JobId().value,
+                    exchange=exchange,
+                    symbol=symbol,
+                    status=JobStatus.QUEUED,
+                )
+            return _to_job(entity)
+
+    def claim(self, worker, caps=None, default_cap=1):
+        caps = caps or {}
+        now = datetime.now()
+        with self._con.atomic(lock_type="IMMEDIATE"):
+            self._requeue_stale(now)
+            running: dict[str, int] = {}
+            for entity in OhlcvFetchJobEntity.select(
+                OhlcvFetchJobEntity.exchange
+            ).where(OhlcvFetchJobEntity.status == JobStatus.RUNNING):
+                running[entity.exchange] = running.get(entity.exchange, 0) + 1
+            queued = (
+                OhlcvFetchJobEntity.select()
+                .where(OhlcvFetchJobEntity.status == JobStatus.QUEUED)
+                .order_by(OhlcvFetchJobEntity.created_at)
+            )
+            for entity in queued:
+                if running.get(entity.exchange, 0) >= caps.get(
+                    entity.exchange, default_cap
+                ):
+                    continue
+                entity.status = JobStatus.RUNNING
+                entity.worker = worker
+                entity.attempts += 1
+                entity.started_at = now
+                entity.heartbeat_at = now
+                entity.save()
+                return _to_job(entity)
+        return None
+
+    def _requeue_stale(self, now: datetime):
+        stale = OhlcvFetchJobEntity.status == JobStatus.RUNNING
+        stale &= OhlcvFetchJobEntity.heartbeat_at < now - self.STALE_AFTER
+        OhlcvFetchJobEntity.update(
+            status=JobStatus.FAILED,
+            finished_at=now,
+            error="worker lost",
+        ).where(stale & (OhlcvFetchJobEntity.attempts >= self.MAX_ATTEMPTS)).execute()
+        OhlcvFetchJobEntity.update(status=JobStatus.QUEUED, worker=None).where(
+            stale
+        ).execute()
+
+    def heartbeat(self, id: JobId):
+        OhlcvFetchJobEntity.update(heartbeat_at=datetime.now()).where(
+            (OhlcvFetchJobEntity.id == id.value)
+            & (OhlcvFetchJobEntity.status == JobStatus.RUNNING)
+        ).execute()
+
+    def complete(self, id: JobId):
+        self._finish(id, JobStatus.SUCCEEDED, None)
+
+    def fail(self, id: JobId, error: str):
+        self._finish(id, JobStatus.FAILED, error)
+
+    def _finish(self, id: JobId, status: JobStatus, error: str | None):
+        OhlcvFetchJobEntity.update(
+            status=status, error=error, finished_at=datetime.now()
+        ).where(OhlcvFetchJobEntity.id == id.value).execute()
+
+    def find_by_id(self, id: JobId) -> OhlcvFetchJob | None:
+        entity = OhlcvFetchJobEntity.get_or_none(OhlcvFetchJobEntity.id == id.value)
+        return _to_job(entity) if entity else None
+
+    def find_recent(self, limit: int = 50) -> list[OhlcvFetchJob]:
+        query = (
+            OhlcvFetchJobEntity.select()
+            .order_by(OhlcvFetchJobEntity.created_at.desc())
+            .limit(limit)
+        )
+        return [_to_job(entity) for entity in query]
+
+
+class WatchlistRepository(IWatchlistRepository):
+    @inject
+    def __init__(self, connection: SqliteDatabase):
+        self._con = connection
+
+    def find_all(self) -> list[WatchedSymbol]:
+        query = WatchedSymbolEntity.select().order_by(
+            WatchedSymbolEntity.priority.desc(),
+            WatchedSymbolEntity.exchange,
+            WatchedSymbolEntity.symbol,
+        )
+        return [_to_watched(e) for e in query]
+
+    def find_due(self, now: datetime) -> list[WatchedSymbol]:
+        query = (
+            WatchedSymbolEntity.select()
+            .where(
+                WatchedSymbolEntity.next_run_at.is_null()
+                | (WatchedSymbolEntity.next_run_at <= _naive_utc(now))
+            )
+            .order_by(
+                WatchedSymbolEntity.priority.desc(),
+                WatchedSymbolEntity.next_run_at.asc(nulls="first"),
+            )
+        )
+        return [_to_watched(e) for e in query]
+
+    def save(self, *symbols: WatchedSymbol):
+        rows = [
+            {
+                "exchange": s.exchange,
+                "symbol": s.symbol,
+                "priority": s.priority,
+                "interval_seconds": int(s.interval.total_seconds()),
+                "next_run_at": _naive_utc(s.next_run_at) if s.next_run_at else None,
+                "last_synced_at": (
+                    _naive_utc(s.last_synced_at) if s.last_synced_at else None
+                ),
+                "failures": s.failures,
+                "last_error": s.last_error,
+            }
+            for s in symbols
+        ]
+        if not rows:
+            return
+        with self._con.atomic():
+            (
+                WatchedSymbolEntity.insert_many(rows)
+                .on_conflict(
+                    conflict_target=[
+                        WatchedSymbolEntity.exchange,
+                        WatchedSymbolEntity.symbol,
+                    ],
+                    preserve=[
+                        WatchedSymbolEntity.priority,
+                        WatchedSymbolEntity.interval_seconds,
+                        WatchedSymbolEntity.next_run_at,
+                        WatchedSymbolEntity.last_synced_at,
+                        WatchedSymbolEntity.failures,
+                        WatchedSymbolEntity.last_error,
+                    ],
+                )
+                .execute()
+            )
+
+    def delete(self, exchange: str, symbol: str):
+        WatchedSymbolEntity.delete().where(
+            (WatchedSymbolEntity.exchange == exchange)
+            & (WatchedSymbolEntity.symbol == symbol)
+        ).execute()
+
+
+class WalkForwardRepository(IWalkForwardRepository):
+    @inject
+    def __init__(self, connection: SqliteDatabase):
+        self._con = connection
+
+    def find_unsettled(self) -> list[WalkForward]:
+        query = (
+            WalkForwardWindowEntity.select(WalkForwardWindowEntity.session)
+            .where(
+                WalkForwardWindowEntity.out_of_sample_context_id.is_null()
+                & ~WalkForwardWindowEntity.skipped
+            )
+            .distinct()
+        )
+        session_ids = [SessionId(value=e.session_id) for e in query]
+        return [self.find_by_session_id(id) for id in session_ids]
+
+    def find_by_session_id(self, session_id: SessionId) -> WalkForward | None:
+        entities = list(
+            WalkForwardWindowEntity.select()
+            .where(WalkForwardWindowEntity.session == session_id.value)
+            .order_by(WalkForwardWindowEntity.window_index)
+        )
+        if not entities:
+            return None
+        return WalkForward(
+            session_id=session_id,
+            rank_by=entities[0].rank_by,
+            windows=[_to_window(e) for e in entities],
+        )
+
+    def save(self, walk_forward: WalkForward) -> WalkForward:
+        rows = [
+            {
+                "session": walk_forward.session_id.value,
+                "window_index": w.index,
+                "rank_by": walk_forward.rank_by,
+                "in_sample_start_at": _naive_utc(w.in_sample_start_at),
+                "in_sample_end_at": _naive_utc(w.in_sample_end_at),
+                "out_of_sample_start_at": _naive_utc(w.out_of_sample_start_at),
+                "out_of_sample_end_at": _naive_utc(w.out_of_sample_end_at),
+                "in_sample_context_ids_json": json.dumps(
+                    [id.value for id in w.in_sample_context_ids]
+                ),
+                "out_of_sample_context_id": (
+                    w.out_of_sample_context_id.value
+                    if w.out_of_sample_context_id
+                    else None
+                ),
+                "skipped": w.skipped,
+            }
+            for w in walk_forward.windows
+        ]
+        with self._con.atomic():
+            for batch in chunked(rows, 500):
+                WalkForwardWindowEntity.insert_many(
+                    batch
+                ).on_conflict_replace().execute()
+        return walk_forward
+
+    def assign_out_of_sample(
+        self, session_id: SessionId, index: int, context: Context
+    ) -> bool:
+        # 同じ窓を同時に進めようとしても、先に書いた方だけが通る。
+        # 紐づけだけが残ってコンテキストが無い窓を作らないよう、保存も同じトランザクションで行う
+        with self._con.atomic():
+            if not self._settle(
+                session_id, index, out_of_sample_context_id=context.id.value
+            ):
+                return False
+            _insert_in_session(session_id, [context])
+        return True
+
+    def skip(self, session_id: SessionId, index: int) -> bool:
+        return self._settle(session_id, index, skipped=True)
+
+    def _settle(self, session_id: SessionId, index: int, **values) -> bool:
+        updated = (
+            WalkForwardWindowEntity.update(**values)
+            .where(
+                (WalkForwardWindowEntity.session == session_id.value)
+                & (WalkForwardWindowEntity.window_index == index)
+                & WalkForwardWindowEntity.out_of_sample_context_id.is_null()
+                & ~WalkForwardWindowEntity.skipped
+            )
+            .execute()
+        )
+        return updated == 1
+
+
+def _insert_in_session(session_id: SessionId, contexts: Iterable[Context]):
+    contexts = list(contexts)
+    rows = [to_entity(context).__data__.copy() for context in contexts]
+    links = [
+        {"session_id": session_id.value, "context_id": context.id.value}
+        for context in contexts
+    ]
+    for batch in chunked(rows, 500):
+        ContextEntity.insert_many(batch).execute()
+    for batch in chunked(links, 500):
+        SessionContextEntity.insert_many(batch).execute()
+
+
+def _to_window(entity: WalkForwardWindowEntity) -> WalkForwardWindow:
+    return WalkForwardWindow(
+        index=entity.window_index,
+        in_sample_start_at=entity.in_sample_start_at,
+        in_sample_end_at=entity.in_sample_end_at,
+        out_of_sample_start_at=entity.out_of_sample_start_at,
+        out_of_sample_end_at=entity.out_of_sample_end_at,
+        in_sample_context_ids=[
+            ContextId(value=value)
+            for value in json.loads(entity.in_sample_context_ids_json)
+        ],
+        out_of_sample_context_id=(
+            ContextId(value=entity.out_of_sample_context_id)
+            if entity.out_of_sample_context_id
+            else None
+        ),
+        skipped=entity.skipped,
+    )
+
+
+def _to_watched(entity: WatchedSymbolEntity) -> WatchedSymbol:
+    return WatchedSymbol(
+        exchange=entity.exchange,
+        symbol=entity.symbol,
+        priority=entity.priority,
+        interval=timedelta(seconds=entity.interval_seconds),
+        next_run_at=(
+            entity.next_run_at.replace(tzinfo=UTC) if entity.next_run_at else None
+        ),
+        last_synced_at=(
+            entity.last_synced_at.replace(tzinfo=UTC) if entity.last_synced_at else None
+        ),
+        failures=entity.failures,
+        last_error=entity.last_error,
+    )
+
+
+_ACTIVE = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+def _to_job(entity: OhlcvFetchJobEntity) -> OhlcvFetchJob:
+    return OhlcvFetchJob(
+        id=JobId(value=entity.id),
+        exchange=entity.exchange,
+        symbol=entity.symbol,
+        status=JobStatus(entity.status),
+        attempts=entity.attempts,
+        error=entity.error,
+        worker=entity.worker,
+        created_at=entity.created_at,
+        started_at=entity.started_at,
+        finished_at=entity.finished_at,
+    )
+
+
+def _sorted_unique(table: pa.Table) -> pa.Table:
+    """time 順に並べ、同じ time の行は後にあるものだけを残す"""
+    times = _to_micros(table["time"])
+    if len(times) < 2 or (np.diff(times) > 0).all():
+        return table
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+    return table.take(order).filter(np.append(times[1:] != times[:-1], True))
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def _micros(value: datetime) -> int:
+    return (as_utc(value) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+def _to_micros(times: pa.ChunkedArray) -> np.ndarray:
+    return times.cast(pa.timestamp("us", tz="UTC")).cast(pa.int64()).to_numpy()
+
+
+def _naive_utc(value: datetime) -> datetime:
+    return as_utc(value).replace(tzinfo=None)
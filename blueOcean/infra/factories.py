@@ -1,14 +1,28 @@
-import ccxt
+from injector import inject
 
-from blueOcean.application.factories import IOhlcvFetcherFactory
-from blueOcean.domain.ohlcv import OhlcvFetcher
-from blueOcean.infra.fetchers import CcxtOhlcvFetcher
+from blueOcean.application.factories import IOhlcvFetcherFactory, IOhlcvStreamFactory
+from blueOcean.domain.ohlcv import AsyncOhlcvFetcher, OhlcvFetcher, OhlcvStream
+from blueOcean.infra.caches import ExchangeMarketCache
+from blueOcean.infra.fetchers import AsyncCcxtOhlcvFetcher, CcxtOhlcvFetcher
+from blueOcean.infra.streams import CcxtProOhlcvStream
 
 
 class OhlcvFetcherFactory(IOhlcvFetcherFactory):
+    @inject
+    def __init__(self, markets: ExchangeMarketCache):
+        self._markets = markets
+
     def create(self, exchange_name: str) -> OhlcvFetcher:
-        exchange_cls = getattr(ccxt, exchange_name, None)
-        if exchange_cls is None:
-            raise ValueError(f"Unsupported exchange: {exchange_name}")
-        exchange = exchange_cls()
-        return CcxtOhlcvFetcher(exchange)
+        return CcxtOhlcvFetcher(self._markets.exchange(exchange_name))
+
+    def create_async(self, exchange_name: str) -> AsyncOhlcvFetcher:
+        return AsyncCcxtOhlcvFetcher(self._markets.async_exchange(exchange_name))
+
+
+class OhlcvStreamFactory(IOhlcvStreamFactory):
+    @inject
+    def __init__(self, markets: ExchangeMarketCache):
+        self._markets = markets
+
+    def create(self, exchange_name: str) -> OhlcvStream:
+        return CcxtProOhlcvStream(self._markets.pro_exchange(exchange_name))
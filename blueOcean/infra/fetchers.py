@@ -1,14 +1,55 @@
+import asyncio
 import time
 from datetime import UTC, datetime
 
 import ccxt
+import ccxt.async_support
 from injector import inject
-import pandas as pd
-
-from blueOcean.domain.ohlcv import Ohlcv, OhlcvFetcher
+import numpy as np
+import pyarrow as pa
+
+from blueOcean.domain.ohlcv import (
+    AsyncOhlcvFetcher,
+    OhlcvColumns,
+    OhlcvFetcher,
+    Timeframe,
+)
+from blueOcean.infra.limiters import TokenBucket
 from blueOcean.infra.logging import logger
 
 
+def to_record_batch(rows: list[list], until: int | None = None) -> pa.RecordBatch:
+    """ccxt の ``fetch_ohlcv`` の結果をそのまま Arrow の列に変換する
+
+    行ごとの Python オブジェクトは作らない。``until`` (ms) 以降の足は落とす。
+    """
+    # None (出来高なしなど) は NaN になる
+    values = np.array(rows, dtype=np.float64).reshape(-1, len(OhlcvColumns.NAMES))
+    columns = np.ascontiguousarray(values.T)
+    times = columns[0].astype(np.int64)
+    if until is not None:
+        end = int(np.searchsorted(times, until))
+        times, columns = times[:end], columns[:, :end]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(times * 1000, pa.timestamp("us", tz="UTC"))]
+        + [pa.array(column) for column in columns[1:]],
+        schema=OhlcvColumns.SCHEMA,
+    )
+
+
+def _last_ms(batch: pa.RecordBatch) -> int:
+    return batch.column(0)[-1].value // 1000
+
+
+def _log_page(exchange_name: str, symbol: str, batch: pa.RecordBatch):
+    times = batch.column(0)
+    logger.info(
+        f"Fetched from {exchange_name} {symbol} "
+        f'{times[0].as_py().strftime("%Y-%m-%d %H:%M:%S")}~'
+        f'{times[-1].as_py().strftime("%Y-%m-%d %H:%M:%S")}'
+    )
+
+
 class CcxtOhlcvFetcher(OhlcvFetcher):
     TIMEFRAME = "1m"
 
@@ -29,42 +70,157 @@ class CcxtOhlcvFetcher(OhlcvFetcher):
     def _fetch_ohlcv_process(self, symbol: str, since_at: datetime):
         timeframe_ms = self.exchange.parse_timeframe(self.TIMEFRAME) * 1000
         since = int(since_at.timestamp() * 1000) + timeframe_ms
-
-        while since < self.exchange.milliseconds():
-            fetched = self._try_fetch(symbol, since)
+        yield from self._fetch_pages(symbol, since, None, self.TIMEFRAME)
+
+    def _fetch_range_process(
+        self,
+        symbol: str,
+        start_at: datetime,
+        end_at: datetime,
+        timeframe: Timeframe,
+    ):
+        yield from self._fetch_pages(
+            symbol,
+            int(start_at.timestamp() * 1000),
+            int(end_at.timestamp() * 1000),
+            timeframe.to_ccxt(),
+        )
+
+    def _fetch_pages(self, symbol: str, since: int, until: int | None, timeframe: str):
+        timeframe_ms = self.exchange.parse_timeframe(timeframe) * 1000
+
+        while since < (until or self.exchange.milliseconds()):
+            fetched = self._try_fetch(symbol, since, timeframe)
             if not fetched:
                 break
 
-            df = pd.DataFrame(
-                fetched,
-                columns=["time", "open", "high", "low", "close", "volume"],
-            )
-            df["time"] = pd.to_datetime(df["time"], unit="ms", utc=True)
+            batch = to_record_batch(fetched, until)
+            if batch.num_rows == 0:
+                # 次の足が until 以降にしか無いことを、空のバッチで知らせる
+                if until is not None:
+                    yield batch
+                break
+            _log_page(self.exchange.name, symbol, batch)
+            yield batch
+
+            since = _last_ms(batch) + timeframe_ms
+
+            time.sleep(self.exchange.rateLimit / 1000)
 
-            if not df.empty:
-                logger.info(
-                    f'Fetched from {self.exchange.name} {symbol} {df["time"].iloc[0].strftime("%Y-%m-%d %H:%M:%S")}~{df["time"].iloc[-1].strftime("%Y-%m-%d %H:%M:%S")}'
+    def _try_fetch(self, symbol: str, since: int, timeframe: str):
+        """3回リトライ"""
+        for attempt in range(3):
+            try:
+                return self.exchange.fetch_ohlcv(
+                    symbol, timeframe, since=since, limit=1000
                 )
+            except Exception as e:
+                if attempt == 2:
+                    raise
+                logger.warning(f"Retry fetch due to error: {e}")
+                time.sleep(1)
 
-            ohlcvs = Ohlcv.from_dataframe(df)
 
-            if ohlcvs:
-                yield ohlcvs
+class AsyncCcxtOhlcvFetcher(AsyncOhlcvFetcher):
+    """``ccxt.async_support`` を使う fetcher
 
-            last_time = ohlcvs[-1].time
-            since = int(last_time.timestamp() * 1000) + timeframe_ms
+    ページ間の待ちは ``time.sleep`` ではなく取引所ごとに共有するトークンバケットで
+    行うので、同じ取引所の複数シンボルを並行に取得してもレート制限を超えない。
+    """
 
-            time.sleep(self.exchange.rateLimit / 1000)
+    TIMEFRAME = "1m"
+    LIMIT = 1000
 
-    def _try_fetch(self, symbol: str, since: int):
+    def __init__(
+        self,
+        exchange: ccxt.async_support.Exchange,
+        limiter: TokenBucket | None = None,
+    ):
+        super().__init__()
+        self.exchange = exchange
+        # ccxt 自身のスロットリングはインスタンス単位なので、共有のバケットに任せる
+        self.exchange.enableRateLimit = False
+        self.limiter = limiter or TokenBucket.for_exchange(
+            exchange.id, rate=1000 / exchange.rateLimit
+        )
+        self._markets_loaded: asyncio.Future | None = None
+
+    @property
+    def source(self) -> str:
+        return self.exchange.name
+
+    @property
+    def longest_since(self):
+        return datetime(2017, 1, 1, tzinfo=UTC)
+
+    async def close(self):
+        await self.exchange.close()
+
+    async def _load_markets(self):
+        # 並行に走る各シンボルのタスクから 1 回だけ読み込む
+        if self._markets_loaded is None:
+            self._markets_loaded = asyncio.ensure_future(self._load_markets_once())
+        await self._markets_loaded
+
+    async def _load_markets_once(self):
+        # ExchangeMarketCache から markets を渡されていればネットワークには出ない
+        if not self.exchange.markets:
+            await self.limiter.acquire()
+        await self.exchange.load_markets()
+
+    async def _fetch_ohlcv_process(self, symbol: str, since_at: datetime):
+        timeframe_ms = self.exchange.parse_timeframe(self.TIMEFRAME) * 1000
+        since = int(since_at.timestamp() * 1000) + timeframe_ms
+        async for batch in self._fetch_pages(symbol, since, None, self.TIMEFRAME):
+            yield batch
+
+    async def _fetch_range_process(
+        self,
+        symbol: str,
+        start_at: datetime,
+        end_at: datetime,
+        timeframe: Timeframe,
+    ):
+        async for batch in self._fetch_pages(
+            symbol,
+            int(start_at.timestamp() * 1000),
+            int(end_at.timestamp() * 1000),
+            timeframe.to_ccxt(),
+        ):
+            yield batch
+
+    async def _fetch_pages(
+        self, symbol: str, since: int, until: int | None, timeframe: str
+    ):
+        await self._load_markets()
+        timeframe_ms = self.exchange.parse_timeframe(timeframe) * 1000
+
+        while since < (until or self.exchange.milliseconds()):
+            fetched = await self._try_fetch(symbol, since, timeframe)
+            if not fetched:
+                break
+
+            batch = to_record_batch(fetched, until)
+            if batch.num_rows == 0:
+                # 次の足が until 以降にしか無いことを、空のバッチで知らせる
+                if until is not None:
+                    yield batch
+                break
+            _log_page(self.exchange.name, symbol, batch)
+            yield batch
+
+            since = _last_ms(batch) + timeframe_ms
+
+    async def _try_fetch(self, symbol: str, since: int, timeframe: str):
         """3回リトライ"""
         for attempt in range(3):
+            await self.limiter.acquire()
             try:
-                return self.exchange.fetch_ohlcv(
-                    symbol, self.TIMEFRAME, since=since, limit=1000
+                return await self.exchange.fetch_ohlcv(
+                    symbol, timeframe, since=since, limit=self.LIMIT
                 )
             except Exception as e:
                 if attempt == 2:
                     raise
                 logger.warning(f"Retry fetch due to error: {e}")
-                time.sleep(1)
+                await asyncio.sleep(1)
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+from blueOcean.domain.ohlcv import IOhlcvRepository, OhlcvColumns
+from blueOcean.infra.logging import logger
+
+_MINUTE_US = 60_000_000
+
+
+@dataclass(frozen=True)
+class CsvLayout:
+    """取引所のヒストリカル CSV の列の並び
+
+    ``kind`` が ``"klines"`` なら ``columns`` の open/high/low/close/volume を、
+    ``"trades"`` なら price/amount を読み、約定は 1m 足に集計する。
+    ``names`` が None のファイルはヘッダー行を持つ。
+    """
+
+    kind: str
+    time: str
+    columns: dict[str, str]
+    names: tuple[str, ...] | None = field(default=None)
+    # "epoch" は ms / us を桁で判別する。それ以外は strptime の書式
+    time_format: str = field(default="epoch")
+
+
+LAYOUTS: dict[str, CsvLayout] = {
+    # https://data.binance.vision の klines (ヘッダーは先物のみ)
+    "binance-klines": CsvLayout(
+        kind="klines",
+        time="open_time",
+        columns={n: n for n in OhlcvColumns.NAMES[1:]},
+        names=(
+            "open_time",
+            "open",
+            "high",
+            "low",
+            "close",
+            "volume",
+            "close_time",
+            "quote_volume",
+            "count",
+            "taker_buy_volume",
+            "taker_buy_quote_volume",
+            "ignore",
+        ),
+    ),
+    "binance-trades": CsvLayout(
+        kind="trades",
+        time="time",
+        columns={"price": "price", "amount": "qty"},
+        names=(
+            "id",
+            "price",
+            "qty",
+            "quote_qty",
+            "time",
+            "is_buyer_maker",
+            "is_best_match",
+        ),
+    ),
+    # https://www.dukascopy.com/swiss/english/marketwatch/historical/
+    "dukascopy": CsvLayout(
+        kind="klines",
+        time="Gmt time",
+        columns={n: n.capitalize() for n in OhlcvColumns.NAMES[1:]},
+        time_format="%d.%m.%Y %H:%M:%S",
+    ),
+}
+
+
+def read_ohlcv_csv(
+    path: str | Path,
+    layout: CsvLayout,
+    block_size: int = 16 << 20,
+) -> Iterator[pa.RecordBatch]:
+    """CSV / ZIP を ``block_size`` ずつ読み、1m 足の RecordBatch を順に返す
+
+    ZIP は中の CSV を展開せずにストリームで読む。ブロックの解析は pyarrow の
+    スレッドプールで並列に行われ、ファイル全体をメモリに載せることはない。
+    """
+    for stream in _open_csv_streams(Path(path)):
+        with stream as f:
+            batches = _read_blocks(f, layout, block_size)
+            if layout.kind == "trades":
+                yield from _aggregate_trades(batches)
+            else:
+                yield from batches
+
+
+def _open_csv_streams(path: Path) -> Iterator:
+    if path.suffix.lower() != ".zip":
+        yield _reopenable(lambda: open(path, "rb"))
+        return
+    with zipfile.ZipFile(path) as archive:
+        for member in sorted(archive.namelist()):
+            if member.lower().endswith(".csv"):
+                yield _reopenable(lambda m=member: archive.open(m))
+
+
+@contextmanager
+def _reopenable(opener):
+    # 先頭行を覗いてヘッダーの有無を調べてから、開き直して頭から読む
+    with opener() as head:
+        first = head.readline()
+    with opener() as f:
+        yield _HeadedStream(f, first)
+
+
+class _HeadedStream:
+    def __init__(self, f: IO[bytes], first_line: bytes):
+        self.f = f
+        self.first_line = first_line
+
+    @property
+    def has_header(self) -> bool:
+        head = self.first_line.split(b",", 1)[0].strip().strip(b'"')
+        try:
+            float(head)
+        except ValueError:
+            return True
+        return False
+
+
+def _read_blocks(
+    stream: _HeadedStream, layout: CsvLayout, block_size: int
+) -> Iterator[pa.RecordBatch]:
+    names = list(layout.names) if layout.names else None
+    wanted = [layout.time, *layout.columns.values()]
+    types = {name: pa.float64() for name in layout.columns.values()}
+    types[layout.time] = pa.int64() if layout.time_format == "epoch" else pa.string()
+    reader = pv.open_csv(
+        stream.f,
+        read_options=pv.ReadOptions(
+            block_size=block_size,
+            column_names=names,
+            skip_rows=1 if names and stream.has_header else 0,
+            use_threads=True,
+        ),
+        convert_options=pv.ConvertOptions(
+            include_columns=wanted,
+            column_types=types,
+        ),
+    )
+    for batch in reader:
+        if batch.num_rows == 0:
+            continue
+        columns = [_to_micros(batch.column(layout.time), layout.time_format)]
+        columns += [batch.column(name) for name in layout.columns.values()]
+        yield pa.RecordBatch.from_arrays(
+            columns, names=["time", *layout.columns.keys()]
+        )
+
+
+def _to_micros(times: pa.Array, time_format: str) -> pa.Array:
+    if time_format != "epoch":
+        # 秒未満 (".000") は捨てる
+        text = pc.utf8_slice_codeunits(times, 0, 19)
+        parsed = pc.strptime(text, format=time_format, unit="us")
+        return pc.assume_timezone(parsed, "UTC")
+    values = times.to_numpy()
+    # Binance は 2025 年以降の現物だけ us で、それ以前と先物は ms
+    micros = np.where(values > 10**14, values, values * 1000)
+    return pa.array(micros, pa.timestamp("us", tz="UTC"))
+
+
+def _aggregate_trades(batches: Iterable[pa.RecordBatch]) -> Iterator[pa.RecordBatch]:
+    """時刻順の約定を 1m 足に集計する
+
+    バッチの最後の 1 分は次のバッチに続きがあり得るので持ち越す。
+    """
+    carry: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+    for batch in batches:
+        times = batch.column("time").cast(pa.int64()).to_numpy()
+        prices = batch.column("price").to_numpy(zero_copy_only=False)
+        amounts = batch.column("amount").to_numpy(zero_copy_only=False)
+        if carry is not None:
+            times = np.concatenate([carry[0], times])
+            prices = np.concatenate([carry[1], prices])
+            amounts = np.concatenate([carry[2], amounts])
+        minutes = times // _MINUTE_US
+        tail = int(np.searchsorted(minutes, minutes[-1]))
+        carry = (times[tail:], prices[tail:], amounts[tail:])
+        if tail:
+            yield _to_bars(minutes[:tail], prices[:tail], amounts[:tail])
+    if carry is not None and len(carry[0]):
+        yield _to_bars(carry[0] // _MINUTE_US, carry[1], carry[2])
+
+
+def _to_bars(
+    minutes: np.ndarray, prices: np.ndarray, amounts: np.ndarray
+) -> pa.RecordBatch:
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(minutes)) + 1])
+    ends = np.concatenate([starts[1:], [len(minutes)]])
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(minutes[starts] * _MINUTE_US, pa.timestamp("us", tz="UTC")),
+            pa.array(prices[starts]),
+            pa.array(np.maximum.reduceat(prices, starts)),
+            pa.array(np.minimum.reduceat(prices, starts)),
+            pa.array(prices[ends - 1]),
+            pa.array(np.add.reduceat(amounts, starts)),
+        ],
+        schema=OhlcvColumns.SCHEMA,
+    )
+
+
+class OhlcvCsvImporter:
+    """ダウンロード済みのヒストリカル CSV / ZIP を OHLCV ストアに取り込む
+
+    ファイルごとに別スレッドで解析し、保存はこのスレッドだけで順に行う。
+    保存は ``flush_rows`` 行ごとにまとめ、細かいフラグメントを作らない。
+    """
+
+    _DONE = object()
+
+    def __init__(
+        self,
+        repository: IOhlcvRepository,
+        workers: int | None = None,
+        flush_rows: int = 500_000,
+        block_size: int = 16 << 20,
+    ):
+        self._repository = repository
+        self._workers = workers or os.cpu_count() or 1
+        self._flush_rows = flush_rows
+        self._block_size = block_size
+
+    def execute(
+        self,
+        paths: Iterable[str | Path],
+        source: str,
+        symbol: str,
+        layout: CsvLayout,
+    ) -> int:
+        """取り込んだ足の本数を返す"""
+        paths = list(paths)
+        # 解析が保存より速くても、溜まるのは数ブロック分まで
+        batches: queue.Queue = queue.Queue(maxsize=self._workers * 2)
+        stop = threading.Event()
+        imported = 0
+        buffered: list[pa.RecordBatch] = []
+        rows = 0
+
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            for path in paths:
+                executor.submit(self._parse, path, layout, batches, stop)
+            remaining = len(paths)
+            try:
+                while remaining:
+                    item = batches.get()
+                    if item is self._DONE:
+                        remaining -= 1
+                        continue
+                    if isinstance(item, BaseException):
+                        raise item
+                    buffered.append(item)
+                    rows += item.num_rows
+                    if rows >= self._flush_rows:
+                        imported += self._flush(buffered, source, symbol)
+                        buffered, rows = [], 0
+            except BaseException:
+                # 保存の失敗や中断でも、残りの解析スレッドが put で止まらないよう
+                # 打ち切らせてから捨てながら待つ。待たないと executor の終了が返らない
+                stop.set()
+                self._drain(batches, remaining)
+                raise
+        imported += self._flush(buffered, source, symbol)
+        return imported
+
+    def _parse(
+        self, path, layout: CsvLayout, batches: queue.Queue, stop: threading.Event
+    ):
+        try:
+            if not stop.is_set():
+                logger.info(f"Importing {path}")
+                for batch in read_ohlcv_csv(path, layout, self._block_size):
+                    if stop.is_set():
+                        break
+                    batches.put(batch)
+        except BaseException as e:
+            batches.put(e)
+        # 打ち切った場合も終わりを知らせる
+        batches.put(self._DONE)
+
+    def _drain(self, batches: queue.Queue, remaining: int):
+        while remaining:
+            if batches.get() is self._DONE:
+                remaining -= 1
+
+    def _flush(self, buffered: list[pa.RecordBatch], source: str, symbol: str) -> int:
+        if not buffered:
+            return 0
+        table = pa.Table.from_batches(buffered, schema=OhlcvColumns.SCHEMA)
+        self._repository.save_batch(table, source, symbol)
+        return table.num_rows
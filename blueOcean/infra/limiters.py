@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """取引所ごとに共有するトークンバケット
+
+    ``rate`` 件/秒でトークンが補充され、最大 ``capacity`` 件まで貯まる。
+    状態はスレッドロックで守るので、別スレッド・別イベントループの fetcher からも
+    同じインスタンスを共有できる。
+    """
+
+    _buckets: dict[str, TokenBucket] = {}
+    _buckets_guard = threading.Lock()
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive: {rate}")
+        self._rate = rate
+        self._capacity = max(capacity, 1.0)
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_exchange(
+        cls, exchange_id: str, rate: float, capacity: float = 1.0
+    ) -> TokenBucket:
+        with cls._buckets_guard:
+            bucket = cls._buckets.get(exchange_id)
+            if bucket is None:
+                bucket = cls._buckets[exchange_id] = cls(rate, capacity)
+            return bucket
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """トークンを取れたら 0、取れなければ補充までの待ち秒数を返す"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._updated_at) * self._rate
+            )
+            self._updated_at = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self._rate
+
+    async def acquire(self, tokens: float = 1.0):
+        while (wait := self.try_acquire(tokens)) > 0:
+            await asyncio.sleep(wait)
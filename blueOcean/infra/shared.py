@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import gc
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator
+
+import numpy as np
+
+from blueOcean.domain.ohlcv import IOhlcvRepository, OhlcvColumns, Timeframe
+from blueOcean.infra.logging import logger
+from blueOcean.infra.stores import aligned, as_utc
+
+_DTYPES = (np.dtype("datetime64[us]"),) + (np.dtype(np.float64),) * 5
+
+
+@dataclass(frozen=True)
+class SharedOhlcvHandle:
+    """共有メモリ上の OHLCV を指す。pickle して別プロセスに渡す"""
+
+    name: str
+    length: int
+    # ブロックのうち読む足の範囲。広い期間のブロックから切り出すときに使う
+    start: int = 0
+    stop: int | None = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.length * 8 * len(OhlcvColumns.NAMES)
+
+
+@contextmanager
+def attached(handle: SharedOhlcvHandle) -> Iterator[OhlcvColumns]:
+    """共有メモリに載った列をコピーせずに ``OhlcvColumns`` として参照する
+
+    抜けるときに割り当てを外す。列への参照がまだ残っていれば、その参照が消えたときに外れる。
+    """
+    shm = SharedMemory(name=handle.name)
+    try:
+        columns = _columns(shm, handle.length)
+        if handle.start or handle.stop is not None:
+            columns = OhlcvColumns(
+                *(
+                    getattr(columns, name)[handle.start : handle.stop]
+                    for name in OhlcvColumns.NAMES
+                )
+            )
+        yield columns
+    finally:
+        # backtrader の Line は循環参照を持つので、先に回収してから閉じる
+        gc.collect()
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+def _columns(shm: SharedMemory, length: int) -> OhlcvColumns:
+    arrays = [
+        np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=i * length * 8)
+        for i, dtype in enumerate(_DTYPES)
+    ]
+    return OhlcvColumns(*arrays)
+
+
+class _Block:
+    def __init__(self, shm: SharedMemory, handle: SharedOhlcvHandle):
+        self.shm = shm
+        self.handle = handle
+        self.refs = 0
+
+
+class SharedOhlcvPlane:
+    """(source, symbol, timeframe, 期間) ごとに 1 度だけ読み込み、共有メモリに置く
+
+    期間の端が足の境界にそろっていれば、その期間を含む読み込み済みのブロックから切り出して返す。
+    ``acquire`` と ``release`` で参照を数え、誰も使っていないブロックは
+    ``capacity_bytes`` を超えた分だけ古い順に解放する。使用中のブロックは解放しない。
+    作ったプロセスからだけ呼ぶこと。
+    """
+
+    def __init__(self, repository: IOhlcvRepository, capacity_bytes: int = 4 << 30):
+        self._repository = repository
+        self._capacity_bytes = capacity_bytes
+        self._blocks: OrderedDict[tuple, _Block] = OrderedDict()
+        self._by_name: dict[str, tuple] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.handle.nbytes for block in self._blocks.values())
+
+    def acquire(
+        self,
+        source: str,
+        symbol: str,
+        timeframe: Timeframe,
+        start_at: datetime | None = None,
+        end_at: datetime | None = None,
+    ) -> SharedOhlcvHandle:
+        key = (source, symbol, timeframe, start_at, end_at)
+        block = self._blocks.get(key)
+        if block is not None:
+            handle = block.handle
+        else:
+            key, block = self._covering(key)
+            if block is not None:
+                handle = self._slice(block, start_at, end_at)
+            else:
+                block = self._load(key)
+                self._blocks[key] = block
+                self._by_name[block.handle.name] = key
+                handle = block.handle
+        self._blocks.move_to_end(key)
+        block.refs += 1
+        return handle
+
+    def release(self, handle: SharedOhlcvHandle):
+        key = self._by_name.get(handle.name)
+        if key is None:
+            return
+        block = self._blocks[key]
+        block.refs = max(block.refs - 1, 0)
+        self._evict()
+
+    def close(self):
+        for block in self._blocks.values():
+            self._unlink(block)
+        self._blocks.clear()
+        self._by_name.clear()
+
+    def __enter__(self) -> SharedOhlcvPlane:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load(self, key: tuple) -> _Block:
+        source, symbol, timeframe, start_at, end_at = key
+        columns = self._repository.find_columns(
+            symbol, source, timeframe, start_at, end_at
+        )
+        length = len(columns)
+        # サイズ 0 の共有メモリは作れない
+        shm = SharedMemory(create=True, size=max(length * 8 * len(_DTYPES), 1))
+        target = _columns(shm, length)
+        for name in OhlcvColumns.NAMES:
+            getattr(target, name)[:] = getattr(columns, name)
+        del target
+        logger.info(f"Shared {source} {symbol} {timeframe.name} ({length} bars)")
+        return _Block(shm, SharedOhlcvHandle(name=shm.name, length=length))
+
+    def _covering(self, key: tuple) -> tuple[tuple, _Block | None]:
+        source, symbol, timeframe, start_at, end_at = key
+        # 期間の指定が無いブロックは読み込んだ後に足が増えているかもしれないので使わない
+        if start_at is None or end_at is None:
+            return key, None
+        if not aligned(start_at, end_at, timeframe.to_timedelta()):
+            return key, None
+        for other, block in self._blocks.items():
+            if other[:3] != key[:3] or other[3] is None or other[4] is None:
+                continue
+            if other[3] <= start_at and end_at <= other[4]:
+                return other, block
+        return key, None
+
+    def _slice(
+        self, block: _Block, start_at: datetime, end_at: datetime
+    ) -> SharedOhlcvHandle:
+        time = _columns(block.shm, block.handle.length).time
+        # 終わりの足も含む
+        start = int(np.searchsorted(time, _datetime64(start_at), "left"))
+        stop = int(np.searchsorted(time, _datetime64(end_at), "right"))
+        del time
+        return SharedOhlcvHandle(
+            name=block.handle.name, length=block.handle.length, start=start, stop=stop
+        )
+
+    def _evict(self):
+        total = self.nbytes
+        for key, block in list(self._blocks.items()):
+            if total <= self._capacity_bytes:
+                break
+            if block.refs:
+                continue
+            total -= block.handle.nbytes
+            del self._blocks[key]
+            del self._by_name[block.handle.name]
+            self._unlink(block)
+
+    def _unlink(self, block: _Block):
+        # 子プロセスが割り当て中でも、名前を消すだけなので読み手は最後まで読める
+        block.shm.close()
+        block.shm.unlink()
+
+
+def _datetime64(value: datetime) -> np.datetime64:
+    return np.datetime64(as_utc(value).replace(tzinfo=None), "us")
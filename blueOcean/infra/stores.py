@@ -0,0 +1,701 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from cuid2 import Cuid
+
+from blueOcean.infra.logging import logger
+
+
+def scan_sql(files: list[str], where_sql: str = "", partial: str | None = None) -> str:
+    # 圧縮済みの YYYY-MM.*.parquet と YYYY-MM/ 以下のフラグメントをまとめて読む。
+    # パス順で後ろにあるもの (= 新しいフラグメント) を同一 time の正とする。
+    source = f"read_parquet({files}, filename=true)"
+    if partial:
+        # 未保存の足 (テーブル名 partial) は、保存済みの同じ time が無いときだけ使う
+        source = f"""(
+            SELECT time, open, high, low, close, volume, filename
+            FROM read_parquet({files}, filename=true)
+            UNION ALL
+            SELECT time, open, high, low, close, volume, '' AS filename
+            FROM {partial}
+        )"""
+    return f"""
+        SELECT time, open, high, low, close, volume
+        FROM {source}
+        {where_sql}
+        QUALIFY row_number() OVER (PARTITION BY time ORDER BY filename DESC) = 1
+    """
+
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+def aligned(
+    start_at: datetime | None, end_at: datetime | None, step: timedelta
+) -> bool:
+    """範囲の端が ``step`` の足の境界に揃っていて、粗い足から同じ足を組み立てられるか
+
+    ``end_at`` は範囲に含む側の端なので、それを含む 1m 足の次の分が境界かを見る。
+    """
+    epoch = datetime(1970, 1, 1, tzinfo=UTC)
+    minute = timedelta(minutes=1)
+    if start_at and (as_utc(start_at) - epoch) % step:
+        return False
+    if end_at:
+        next_minute = (as_utc(end_at) - epoch) // minute * minute + minute
+        if next_minute % step:
+            return False
+    return True
+
+
+def time_intervals(times: np.ndarray, step: int) -> np.ndarray:
+    """昇順・重複なしの時刻 (int64) を連続区間 [start, end) の (n, 2) 配列にする"""
+    times = np.asarray(times, dtype=np.int64)
+    if len(times) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(times) > step)
+    starts = np.concatenate((times[:1], times[breaks + 1]))
+    ends = np.concatenate((times[breaks], times[-1:])) + step
+    return np.column_stack((starts, ends))
+
+
+def merge_intervals(intervals: np.ndarray) -> np.ndarray:
+    """重なる・隣接する区間をまとめて、開始時刻順の (n, 2) 配列にする"""
+    intervals = np.asarray(intervals, dtype=np.int64).reshape(-1, 2)
+    if len(intervals) == 0:
+        return intervals
+    intervals = intervals[np.argsort(intervals[:, 0], kind="stable")]
+    starts, ends = intervals[:, 0], intervals[:, 1]
+    reach = np.maximum.accumulate(ends)
+    heads = np.flatnonzero(np.concatenate(([True], starts[1:] > reach[:-1])))
+    return np.column_stack((starts[heads], np.maximum.reduceat(ends, heads)))
+
+
+def subtract_intervals(start: int, end: int, covered: np.ndarray) -> np.ndarray:
+    """[start, end) から ``covered`` (merge 済み) を除いた区間を返す"""
+    covered = np.asarray(covered, dtype=np.int64).reshape(-1, 2)
+    covered = covered[(covered[:, 1] > start) & (covered[:, 0] < end)]
+    if len(covered) == 0:
+        return np.array([[start, end]] if start < end else [], np.int64).reshape(-1, 2)
+    bounds = np.clip(covered, start, end)
+    starts = np.concatenate(([start], bounds[:, 1]))
+    ends = np.concatenate((bounds[:, 0], [end]))
+    keep = starts < ends
+    return np.column_stack((starts[keep], ends[keep]))
+
+
+@dataclass(frozen=True)
+class PartitionEntry:
+    # manifest のあるディレクトリからの相対パス
+    path: str
+    month: str
+    min_time: datetime
+    max_time: datetime
+    rows: int
+    bytes: int
+
+    def overlaps(
+        self, start_at: datetime | None = None, end_at: datetime | None = None
+    ) -> bool:
+        if start_at is not None and self.max_time < as_utc(start_at):
+            return False
+        if end_at is not None and self.min_time > as_utc(end_at):
+            return False
+        return True
+
+    def to_json(self) -> dict:
+        data = asdict(self)
+        data["min_time"] = self.min_time.isoformat()
+        data["max_time"] = self.max_time.isoformat()
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> PartitionEntry:
+        return cls(
+            path=data["path"],
+            month=data["month"],
+            min_time=datetime.fromisoformat(data["min_time"]),
+            max_time=datetime.fromisoformat(data["max_time"]),
+            rows=int(data["rows"]),
+            bytes=int(data["bytes"]),
+        )
+
+
+class PartitionManifest:
+    """シリーズ (source, symbol) ごとのパーティション一覧
+
+    各パーティションの時間範囲・行数・ファイルサイズを ``_manifest.json`` に持つ。
+    追記は ``_manifest.json`` が指すログ (``_manifest.<seq>.log``) に 1 行ずつ足すだけにし、
+    一覧全体の書き直しは圧縮などのトランザクションで畳み込むときだけ行う。
+    畳み込みは新しいログに切り替えた一覧を tmp ファイル + ``os.replace`` で置き換えてから
+    古いログを消すので、読み手は常に一覧とログの組を一貫した状態で見る。
+    最新の足の時刻だけは ``_latest.json`` にも書き、一覧を読まずに引けるようにする。
+    取り込み中でまだ保存していない足 (形成中の足を含む) も ``_latest.json`` に載せる。
+    """
+
+    FILENAME = "_manifest.json"
+    LATEST_FILENAME = "_latest.json"
+    VERSION = 2
+
+    _locks: dict[Path, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, directory: Path):
+        self._dir = Path(directory)
+        self._path = Path(self._dir, self.FILENAME)
+        self._latest_path = Path(self._dir, self.LATEST_FILENAME)
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    def exists(self) -> bool:
+        return self._path.exists()
+
+    def load(self) -> list[PartitionEntry]:
+        data = self._read()
+        while True:
+            try:
+                appended = self._read_log(data.get("log"))
+                break
+            except FileNotFoundError:
+                # 畳み込みでログが切り替わった直後なら、新しい一覧から読み直す
+                current = self._read()
+                if current.get("log") == data.get("log"):
+                    appended = []
+                    break
+                data = current
+        partitions = {p["path"]: p for p in data.get("partitions", [])}
+        partitions.update((p["path"], p) for p in appended)
+        return sorted(
+            (PartitionEntry.from_json(p) for p in partitions.values()),
+            key=lambda p: p.path,
+        )
+
+    def latest(self) -> datetime | None:
+        try:
+            latest = self._read_latest()
+        except FileNotFoundError:
+            # _latest.json を書く前の manifest は、一度だけ一覧から書き出す
+            if not self.exists():
+                return None
+            self.fold()
+            latest = self._read_latest()
+        return latest
+
+    def select(
+        self, start_at: datetime | None = None, end_at: datetime | None = None
+    ) -> list[PartitionEntry]:
+        return [p for p in self.load() if p.overlaps(start_at, end_at)]
+
+    def partial(self) -> list[list]:
+        """まだ保存されていない足 ``[time, open, high, low, close, volume]`` の一覧
+
+        形成中の足を含む。保存済みの最新の足以前のもの (保存し終えた足) は返さない。
+        """
+        try:
+            data = json.loads(self._latest_path.read_text("utf-8"))
+        except FileNotFoundError:
+            return []
+        latest = data.get("latest")
+        return [
+            row
+            for row in data.get("partial", [])
+            if latest is None
+            or datetime.fromisoformat(row[0]) > datetime.fromisoformat(latest)
+        ]
+
+    def set_partial(self, rows: list[list]):
+        """取り込み中の足を ``_latest.json`` に書き、他のプロセスの読み手から見えるようにする"""
+        self._dir.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            try:
+                latest = self._read_latest()
+            except FileNotFoundError:
+                latest = max((p.max_time for p in self.load()), default=None)
+            self._write_latest(latest, rows)
+
+    def append(self, *entries: PartitionEntry):
+        if not entries:
+            return
+        self._dir.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            log = self._read().get("log")
+            if log is None:
+                # ログを持たない一覧 (未作成・旧形式) は、ここで畳み込んでログを用意する
+                partitions = self.load()
+                partitions.extend(entries)
+                self._write(partitions)
+                return
+            with open(Path(self._dir, log), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e.to_json()) + "\n" for e in entries))
+            self._advance_latest(max(e.max_time for e in entries))
+
+    def replace(self, removed: list[PartitionEntry], added: list[PartitionEntry]):
+        removed_paths = {p.path for p in removed}
+        with self.transaction() as partitions:
+            partitions[:] = [p for p in partitions if p.path not in removed_paths]
+            partitions.extend(added)
+
+    def fold(self):
+        """ログに追記されたパーティションを一覧に畳み込む"""
+        with self.transaction():
+            pass
+
+    @contextmanager
+    def transaction(self) -> Iterator[list[PartitionEntry]]:
+        """manifest を排他的に読み込み、ブロックを抜けたときにまとめて書き戻す"""
+        self._dir.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            partitions = self.load()
+            yield partitions
+            self._write(partitions)
+
+    def rebuild(self) -> list[PartitionEntry]:
+        """既存の parquet ファイルを走査して manifest を作り直す"""
+        files = sorted(self._dir.glob("*.parquet")) + sorted(
+            self._dir.glob("[0-9]*-[0-9]*/*.parquet")
+        )
+        entries = []
+        if files:
+            con = duckdb.connect()
+            con.execute("SET TimeZone='UTC'")
+            rows = con.execute(f"""
+                SELECT filename, min(time), max(time), count(*)
+                FROM read_parquet({[str(f) for f in files]}, filename=true)
+                GROUP BY filename
+                """).fetchall()
+            stats = {Path(r[0]): r[1:] for r in rows}
+            for f in files:
+                if f not in stats:
+                    continue
+                min_time, max_time, count = stats[f]
+                entries.append(
+                    PartitionEntry(
+                        path=f.relative_to(self._dir).as_posix(),
+                        month=min_time.strftime("%Y-%m"),
+                        min_time=as_utc(min_time),
+                        max_time=as_utc(max_time),
+                        rows=count,
+                        bytes=f.stat().st_size,
+                    )
+                )
+        with self.transaction() as partitions:
+            partitions[:] = entries
+        logger.info(f"Rebuilt manifest {self._path} ({len(entries)} partitions)")
+        return entries
+
+    def _read(self) -> dict:
+        try:
+            return json.loads(self._path.read_text("utf-8"))
+        except FileNotFoundError:
+            return {}
+
+    def _read_log(self, log: str | None) -> list[dict]:
+        if log is None:
+            return []
+        entries = []
+        for line in Path(self._dir, log).read_text("utf-8").splitlines():
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # 書き込み途中で止まった行は無視する (フラグメントは manifest に載る前に書き終えている)
+                logger.warning(f"Skipped broken manifest log line in {self._dir}")
+        return entries
+
+    def _read_latest(self) -> datetime | None:
+        latest = json.loads(self._latest_path.read_text("utf-8")).get("latest")
+        return datetime.fromisoformat(latest) if latest else None
+
+    def _write(self, partitions: list[PartitionEntry]):
+        partitions.sort(key=lambda p: p.path)
+        previous = self._read().get("log")
+        log = f"_manifest.{time.time_ns():020d}.log"
+        Path(self._dir, log).touch()
+        data = {
+            "version": self.VERSION,
+            "log": log,
+            "partitions": [p.to_json() for p in partitions],
+        }
+        tmp = Path(self._dir, f"{self.FILENAME}.tmp")
+        tmp.write_text(json.dumps(data), "utf-8")
+        os.replace(tmp, self._path)
+        if previous and previous != log:
+            Path(self._dir, previous).unlink(missing_ok=True)
+        # 一覧より先に進まないよう、一覧を置き換えた後に書く
+        self._write_latest(max((p.max_time for p in partitions), default=None))
+
+    def _advance_latest(self, max_time: datetime):
+        try:
+            current = self._read_latest()
+        except FileNotFoundError:
+            # 消えていたら一覧とログの全体から書き直す
+            current = None
+            max_time = max(p.max_time for p in self.load())
+        if current is None or current < max_time:
+            self._write_latest(max_time)
+
+    def _write_latest(self, max_time: datetime | None, partial: list | None = None):
+        if partial is None:
+            try:
+                partial = json.loads(self._latest_path.read_text("utf-8")).get(
+                    "partial", []
+                )
+            except FileNotFoundError:
+                partial = []
+        tmp = Path(self._dir, f"{self.LATEST_FILENAME}.tmp")
+        latest = max_time.isoformat() if max_time else None
+        tmp.write_text(json.dumps({"latest": latest, "partial": partial}), "utf-8")
+        os.replace(tmp, self._latest_path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock(), open(Path(self._dir, ".manifest.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _thread_lock(self) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(self._path.resolve(), threading.Lock())
+
+
+class CoverageIndex:
+    """シリーズ (source, symbol) に実際に存在する時間区間の一覧
+
+    ``_coverage.json`` に、足がそろっている連続区間 (covered) と、取引所に問い合わせても
+    足が無かった区間 (unavailable) を UTC のマイクロ秒 [start, end) で持つ。
+    """
+
+    FILENAME = "_coverage.json"
+    VERSION = 1
+
+    _locks: dict[Path, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, directory: Path, step: int = 60_000_000):
+        self._dir = Path(directory)
+        self._path = Path(self._dir, self.FILENAME)
+        self._step = step
+
+    @property
+    def step(self) -> int:
+        return self._step
+
+    def exists(self) -> bool:
+        return self._path.exists()
+
+    def load(self) -> tuple[np.ndarray, np.ndarray]:
+        try:
+            data = json.loads(self._path.read_text("utf-8"))
+        except FileNotFoundError:
+            data = {}
+        return (
+            np.array(data.get("covered", []), np.int64).reshape(-1, 2),
+            np.array(data.get("unavailable", []), np.int64).reshape(-1, 2),
+        )
+
+    def add(self, times: np.ndarray):
+        """取り込んだ足の時刻 (マイクロ秒) を covered に加える"""
+        intervals = time_intervals(np.unique(times), self._step)
+        if len(intervals) == 0:
+            return
+        with self.transaction() as data:
+            data["covered"] = merge_intervals(
+                np.concatenate((data["covered"], intervals))
+            )
+
+    def mark_unavailable(self, start: int, end: int):
+        with self.transaction() as data:
+            data["unavailable"] = merge_intervals(
+                np.concatenate((data["unavailable"], [[start, end]]))
+            )
+
+    def clear_unavailable(self):
+        with self.transaction() as data:
+            data["unavailable"] = np.empty((0, 2), np.int64)
+
+    def gaps(self, start: int, end: int) -> np.ndarray:
+        """[start, end) のうち covered にも unavailable にも含まれない区間"""
+        covered, unavailable = self.load()
+        known = merge_intervals(np.concatenate((covered, unavailable)))
+        return subtract_intervals(start, end, known)
+
+    def rebuild(self, times: np.ndarray):
+        intervals = time_intervals(np.unique(times), self._step)
+        with self.transaction() as data:
+            data["covered"] = intervals
+        logger.info(f"Rebuilt coverage {self._path} ({len(intervals)} intervals)")
+
+    @contextmanager
+    def transaction(self) -> Iterator[dict[str, np.ndarray]]:
+        """排他的に読み込み、ブロック内で差し替えた配列をまとめて書き戻す"""
+        self._dir.mkdir(parents=True, exist_ok=True)
+        with self._thread_lock(), open(Path(self._dir, ".coverage.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                covered, unavailable = self.load()
+                data = {"covered": covered, "unavailable": unavailable}
+                yield data
+                self._write(data["covered"], data["unavailable"])
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write(self, covered: np.ndarray, unavailable: np.ndarray):
+        data = {
+            "version": self.VERSION,
+            "step": self._step,
+            "covered": covered.tolist(),
+            "unavailable": unavailable.tolist(),
+        }
+        tmp = Path(self._dir, f"{self.FILENAME}.tmp")
+        tmp.write_text(json.dumps(data), "utf-8")
+        os.replace(tmp, self._path)
+
+    def _thread_lock(self) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(self._path.resolve(), threading.Lock())
+
+
+class PendingIntervals:
+    """取り込んだが、派生データ (集約など) にまだ反映していない時間区間
+
+    書き手は UTC のマイクロ秒 [start, end) を ``_pending.log`` に 1 行足すだけにし、
+    反映は読み手や圧縮が ``drain`` でまとめて行う。
+    """
+
+    FILENAME = "_pending.log"
+
+    _locks: dict[Path, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, directory: Path):
+        self._dir = Path(directory)
+        self._path = Path(self._dir, self.FILENAME)
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    def add(self, start: int, end: int):
+        self._dir.mkdir(parents=True, exist_ok=True)
+        with self._locked(".pending.lock"):
+            with open(self._path, "a", encoding="utf-8") as f:
+                f.write(json.dumps([int(start), int(end)]) + "\n")
+
+    @contextmanager
+    def drain(self) -> Iterator[np.ndarray]:
+        """溜まった区間を merge して取り出す。ブロック内で失敗したら次の drain に戻す
+
+        取り出しから反映が終わるまでを排他にするので、後から drain した読み手は
+        反映済みの状態を見る。
+        """
+        self._dir.mkdir(parents=True, exist_ok=True)
+        with self._locked(".drain.lock"):
+            with self._locked(".pending.lock"):
+                intervals = self._read()
+                self._path.unlink(missing_ok=True)
+            try:
+                yield merge_intervals(intervals)
+            except BaseException:
+                with self._locked(".pending.lock"):
+                    with open(self._path, "a", encoding="utf-8") as f:
+                        f.write(
+                            "".join(json.dumps(i) + "\n" for i in intervals.tolist())
+                        )
+                raise
+
+    def _read(self) -> np.ndarray:
+        try:
+            lines = self._path.read_text("utf-8").splitlines()
+        except FileNotFoundError:
+            lines = []
+        intervals = []
+        for line in lines:
+            try:
+                intervals.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipped broken pending line in {self._path}")
+        return np.array(intervals, np.int64).reshape(-1, 2)
+
+    @contextmanager
+    def _locked(self, name: str) -> Iterator[None]:
+        lock_path = Path(self._dir, name)
+        with self._thread_lock(lock_path), open(lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _thread_lock(self, path: Path) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(path.resolve(), threading.Lock())
+
+
+class ParquetPartitionStore:
+    """1 シリーズ分の月パーティション
+
+    ``YYYY-MM/<fragment>.parquet`` に追記され、圧縮すると ``YYYY-MM.<seq>.parquet``
+    の 1 ファイルにまとまる (以前の ``YYYY-MM.parquet`` もそのまま読める)。
+    """
+
+    # 1 週間分の 1m 足。時間範囲での row group の読み飛ばしが効く程度の粒度にする
+    ROW_GROUP_SIZE = 7 * 24 * 60
+
+    def __init__(self, directory: Path):
+        self._dir = Path(directory)
+        self._manifest = PartitionManifest(self._dir)
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    @property
+    def manifest(self) -> PartitionManifest:
+        if not self._manifest.exists() and self._dir.exists():
+            self._manifest.rebuild()
+        return self._manifest
+
+    def append(self, table: pa.Table) -> list[PartitionEntry]:
+        if table.num_rows == 0:
+            return []
+        manifest = self.manifest
+        months = pc.strftime(table["time"], format="%Y-%m")
+        entries = []
+        for month in pc.unique(months).to_pylist():
+            chunk = table.filter(pc.equal(months, month))
+            entries.append(self._write_fragment(chunk, month))
+        manifest.append(*entries)
+        return entries
+
+    def files(
+        self, start_at: datetime | None = None, end_at: datetime | None = None
+    ) -> list[str]:
+        return [
+            str(Path(self._dir, p.path)) for p in self.manifest.select(start_at, end_at)
+        ]
+
+    def files_by_month(
+        self, start_at: datetime | None = None, end_at: datetime | None = None
+    ) -> dict[str, list[str]]:
+        months: dict[str, list[str]] = {}
+        for p in self.manifest.select(start_at, end_at):
+            months.setdefault(p.month, []).append(str(Path(self._dir, p.path)))
+        return dict(sorted(months.items()))
+
+    def latest(self) -> datetime | None:
+        return self.manifest.latest()
+
+    def compact(
+        self, min_files: int = 2, row_group_size: int | None = None
+    ) -> list[PartitionEntry]:
+        """フラグメントが ``min_files`` 個以上ある月を 1 ファイルにまとめる
+
+        新しいファイルを書き終えてから manifest を差し替えるので、並行する読み手は
+        常に差し替え前か後のどちらかの完全なファイル集合を見る。
+        """
+        if not self._dir.exists():
+            return []
+        with open(Path(self._dir, ".compact.lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info(f"Compaction already running {self._dir}")
+                return []
+            try:
+                months: dict[str, list[PartitionEntry]] = {}
+                for p in self.manifest.load():
+                    months.setdefault(p.month, []).append(p)
+                compacted = [
+                    self._compact_month(month, entries, row_group_size)
+                    for month, entries in sorted(months.items())
+                    if len(entries) >= min_files
+                ]
+                # まとめる月が無くても、追記ログは一覧に畳み込んでおく
+                self.manifest.fold()
+                return compacted
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _compact_month(
+        self,
+        month: str,
+        entries: list[PartitionEntry],
+        row_group_size: int | None,
+    ) -> PartitionEntry:
+        files = [str(Path(self._dir, p.path)) for p in entries]
+        con = duckdb.connect()
+        con.execute("SET TimeZone='UTC'")
+        table = con.execute(f"{scan_sql(files)} ORDER BY time").fetch_arrow_table()
+
+        # "." は "/" より前にソートされるので、圧縮後に追記されたフラグメントが優先される
+        filename = Path(self._dir, f"{month}.{time.time_ns():020d}.parquet")
+        tmp = filename.with_suffix(".tmp")
+        pq.write_table(
+            table,
+            tmp,
+            row_group_size=row_group_size or self.ROW_GROUP_SIZE,
+            compression="zstd",
+            write_statistics=True,
+        )
+        os.replace(tmp, filename)
+        min_max = pc.min_max(table["time"])
+        compacted = PartitionEntry(
+            path=filename.relative_to(self._dir).as_posix(),
+            month=month,
+            min_time=as_utc(min_max["min"].as_py()),
+            max_time=as_utc(min_max["max"].as_py()),
+            rows=table.num_rows,
+            bytes=filename.stat().st_size,
+        )
+        self.manifest.replace(entries, [compacted])
+
+        for f in files:
+            Path(f).unlink(missing_ok=True)
+        month_dir = Path(self._dir, month)
+        if month_dir.exists() and not any(month_dir.iterdir()):
+            month_dir.rmdir()
+        logger.info(
+            f"Compacted {self._dir} {month}: {len(entries)} files -> {compacted.path}"
+        )
+        return compacted
+
+    def _write_fragment(self, table: pa.Table, month: str) -> PartitionEntry:
+        month_dir = Path(self._dir, month)
+        month_dir.mkdir(parents=True, exist_ok=True)
+        # ファイル名は書き込み順にソートできるようにする (重複時は新しい方を採用)
+        stem = f"{time.time_ns():020d}-{Cuid().generate()}"
+        filename = Path(month_dir, f"{stem}.parquet")
+        tmp = Path(month_dir, f"{stem}.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, filename)
+        min_max = pc.min_max(table["time"])
+        return PartitionEntry(
+            path=filename.relative_to(self._dir).as_posix(),
+            month=month,
+            min_time=as_utc(min_max["min"].as_py()),
+            max_time=as_utc(min_max["max"].as_py()),
+            rows=table.num_rows,
+            bytes=filename.stat().st_size,
+        )
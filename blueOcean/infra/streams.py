@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Mapping
+
+import ccxt.pro
+import pyarrow.parquet as pq
+
+from blueOcean.domain.ohlcv import Ohlcv, OhlcvColumns, OhlcvStream
+from blueOcean.infra.logging import logger
+
+
+class CcxtProOhlcvStream(OhlcvStream):
+    """``ccxt.pro`` の ``watch_ohlcv`` で WebSocket から足を購読する
+
+    接続が切れたら待ってから購読し直す。再接続中に確定した足は
+    ``FetchOhlcvUsecase`` の穴埋めで取り直す。
+    """
+
+    TIMEFRAME = "1m"
+    RETRY_DELAY = 5.0
+
+    def __init__(self, exchange: ccxt.pro.Exchange):
+        self.exchange = exchange
+
+    @property
+    def source(self) -> str:
+        return self.exchange.name
+
+    async def watch(self, symbol: str):
+        last_ms = 0
+        while True:
+            try:
+                rows = await self.exchange.watch_ohlcv(symbol, self.TIMEFRAME)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Resubscribe {symbol} due to error: {e}")
+                await asyncio.sleep(self.RETRY_DELAY)
+                continue
+            # 直近の足がまとめて返るので、返したことのある足より古いものは飛ばす
+            for row in rows:
+                if row[0] < last_ms:
+                    continue
+                last_ms = row[0]
+                yield Ohlcv(datetime.fromtimestamp(row[0] / 1000, UTC), *row[1:])
+
+    async def close(self):
+        await self.exchange.close()
+
+
+class ReplayOhlcvStream(OhlcvStream):
+    """parquet に保存した足を配信し直すローカルの購読元
+
+    ``speed`` 倍速 (1 なら 1 本 60 秒) で流し、None なら待たずに流す。
+    ``updates_per_bar`` が 2 以上なら 1 本を形成途中の更新に分けて返す。
+    """
+
+    def __init__(
+        self,
+        files: Mapping[str, str | Path],
+        speed: float | None = None,
+        updates_per_bar: int = 1,
+        source: str = "replay",
+    ):
+        self._files = dict(files)
+        self._speed = speed
+        self._updates_per_bar = max(updates_per_bar, 1)
+        self._source = source
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    async def watch(self, symbol: str):
+        delay = 60 / self._speed / self._updates_per_bar if self._speed else 0.0
+        parquet = pq.ParquetFile(self._files[symbol])
+        for batch in parquet.iter_batches(columns=list(OhlcvColumns.NAMES)):
+            for bar in Ohlcv.from_arrow(batch):
+                for update in self._updates(bar):
+                    yield update
+                    await asyncio.sleep(delay)
+
+    def _updates(self, bar: Ohlcv):
+        n = self._updates_per_bar
+        for i in range(1, n):
+            close = bar.open + (bar.close - bar.open) * i / n
+            yield Ohlcv(
+                bar.time,
+                bar.open,
+                max(bar.open, close),
+                min(bar.open, close),
+                close,
+                bar.volume * i / n,
+            )
+        yield bar
@@ -3,12 +3,15 @@ import datetime
 
 from injector import inject
 
+from blueOcean.application.dto import OhlcvFetchJobInfo
 from blueOcean.application.usecases import (
+    EnqueueOhlcvFetchUsecase,
     FetchFetchableExchangesUsecase,
-    FetchOhlcvUsecase,
     FetchSessionContextsUsecase,
     FetchSessionsUsecase,
     LaunchBacktestSessionUsecase,
+    LaunchParameterSweepUsecase,
+    LaunchWalkForwardUsecase,
 )
 from blueOcean.presentation.states import (
     BacktestDialogState,
@@ -20,9 +23,16 @@ from blueOcean.presentation.states import (
 
 class BacktestDialogNotifier:
     @inject
-    def __init__(self, launch_usecase: LaunchBacktestSessionUsecase):
+    def __init__(
+        self,
+        launch_usecase: LaunchBacktestSessionUsecase,
+        sweep_usecase: LaunchParameterSweepUsecase,
+        walk_forward_usecase: LaunchWalkForwardUsecase,
+    ):
         self._state = BacktestDialogState()
         self._launch_usecase = launch_usecase
+        self._sweep_usecase = sweep_usecase
+        self._walk_forward_usecase = walk_forward_usecase
 
     @property
     def state(self):
@@ -35,6 +45,42 @@ class BacktestDialogNotifier:
         start_at, end_at = self._build_time_range()
         if not self._state.strategy:
             return
+        # スイープしないパラメータはフォームの値で固定する
+        grid = {
+            name: [v] for name, v in self._state.strategy_args.items()
+        } | self._state.strategy_grid
+        if self._state.in_sample_days and self._state.out_of_sample_days:
+            # 窓を切るので期間の指定が要る
+            if not (self._state.start_date and self._state.end_date):
+                return
+            self._walk_forward_usecase.execute(
+                source=self._state.source,
+                symbol=self._state.symbol,
+                timeframe=self._state.timeframe,
+                strategy_name=self._state.strategy,
+                grid=grid,
+                start_at=start_at,
+                # 終了日の終わりまでを含める
+                end_at=datetime.datetime.combine(
+                    self._state.end_date + datetime.timedelta(days=1),
+                    datetime.time.min,
+                ),
+                in_sample=datetime.timedelta(days=self._state.in_sample_days),
+                out_of_sample=datetime.timedelta(days=self._state.out_of_sample_days),
+                anchored=self._state.anchored,
+            )
+            return
+        if self._state.strategy_grid:
+            self._sweep_usecase.execute(
+                source=self._state.source,
+                symbol=self._state.symbol,
+                timeframe=self._state.timeframe,
+                strategy_name=self._state.strategy,
+                grid=grid,
+                start_at=start_at,
+                end_at=end_at,
+            )
+            return
         self._launch_usecase.execute(
             source=self._state.source,
             symbol=self._state.symbol,
@@ -63,10 +109,10 @@ class OhlcvFetchDialogNotifier:
     @inject
     def __init__(
         self,
-        fetch_usecase: FetchOhlcvUsecase,
+        enqueue_usecase: EnqueueOhlcvFetchUsecase,
         exchanges_usecase: FetchFetchableExchangesUsecase,
     ):
-        self._fetch_usecase = fetch_usecase
+        self._enqueue_usecase = enqueue_usecase
         self._exchanges_usecase = exchanges_usecase
 
         self._state = OhlcvFetchDialogState(
@@ -80,14 +126,15 @@ class OhlcvFetchDialogNotifier:
     def update(self, **kwargs) -> None:
         self._state = dataclasses.replace(self._state, **kwargs)
 
-    def submit(self) -> None:
+    def submit(self) -> OhlcvFetchJobInfo | None:
         if not self._state.exchange:
-            return
-        self._fetch_usecase.execute(
+            return None
+        return self._enqueue_usecase.execute(
             self._state.exchange,
             self._state.symbol,
         )
 
+
 class SessionTopPageNotifier:
     @inject
     def __init__(self, fetch_usecase: FetchSessionsUsecase):
@@ -9,6 +9,15 @@ from blueOcean.application.di import (
     FetchModule,
     SessionDetailModule,
 )
+from blueOcean.application.usecases import (
+    AnalyzeRobustnessUsecase,
+    FetchBacktestResultsUsecase,
+    FetchOhlcvCompletenessUsecase,
+    FetchOhlcvFetchJobsUsecase,
+    FetchWalkForwardUsecase,
+    FetchWatchlistUsecase,
+)
+from blueOcean.infra.caches import CacheStats, OhlcvQueryCache
 from blueOcean.presentation.notifiers import (
     BacktestDialogNotifier,
     OhlcvFetchDialogNotifier,
@@ -33,6 +42,22 @@ class AppScope(Scope):
             )
         )
 
+    @property
+    def ohlcv_cache_stats(self) -> CacheStats:
+        return self._injector.get(OhlcvQueryCache).stats()
+
+    @property
+    def completeness_usecase(self) -> FetchOhlcvCompletenessUsecase:
+        return self._injector.get(FetchOhlcvCompletenessUsecase)
+
+    @property
+    def jobs_usecase(self) -> FetchOhlcvFetchJobsUsecase:
+        return self._injector.get(FetchOhlcvFetchJobsUsecase)
+
+    @property
+    def watchlist_usecase(self) -> FetchWatchlistUsecase:
+        return self._injector.get(FetchWatchlistUsecase)
+
 
 class SessionTopPageScope(Scope):
     def __init__(self, parent: Scope):
@@ -64,6 +89,18 @@ class SessionDetailPageScope(Scope):
     def notifier(self) -> SessionDetailPageNotifier:
         return self._injector.get(SessionDetailPageNotifier)
 
+    @property
+    def results_usecase(self) -> FetchBacktestResultsUsecase:
+        return self._injector.get(FetchBacktestResultsUsecase)
+
+    @property
+    def walk_forward_usecase(self) -> FetchWalkForwardUsecase:
+        return self._injector.get(FetchWalkForwardUsecase)
+
+    @property
+    def robustness_usecase(self) -> AnalyzeRobustnessUsecase:
+        return self._injector.get(AnalyzeRobustnessUsecase)
+
 
 class OhlcvFetchDialogScope(Scope):
     def __init__(self, parent: Scope):
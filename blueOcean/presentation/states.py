@@ -20,8 +20,14 @@ class BacktestDialogState:
     timeframe: Timeframe = field(default=Timeframe.ONE_MINUTE)
     strategy: str | None = field(default=None)
     strategy_args: dict[str, Any] = field(default_factory=dict)
+    # 候補値があるパラメータはスイープとして組み合わせごとに実行する
+    strategy_grid: dict[str, list[Any]] = field(default_factory=dict)
     start_date: datetime.date | None = field(default=None)
     end_date: datetime.date | None = field(default=None)
+    # 両方あればウォークフォワードとして窓ごとに最適化と検証を繰り返す
+    in_sample_days: int | None = field(default=None)
+    out_of_sample_days: int | None = field(default=None)
+    anchored: bool = field(default=False)
 
 
 @dataclass(frozen=True)
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import dataclasses
 import datetime
+import math
 from pathlib import Path
 from typing import Any
 
-from fastapi import FastAPI, Form, Request
+from fastapi import FastAPI, Form, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
+from blueOcean.application.dto import WalkForwardInfo
+from blueOcean.application.usecases import LaunchParameterSweepUsecase
 from blueOcean.domain.ohlcv import Timeframe
+from blueOcean.presentation.reporting import build_report
 from blueOcean.presentation.scopes import (
     AppScope,
     BacktestDialogScope,
@@ -21,6 +26,8 @@ from blueOcean.shared.registries import StrategyRegistry
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
+# スレッドで動くサーバーからはプロセスを fork しないよう、リクエストの中で計算する
+ROBUSTNESS_WORKERS = 1
 
 
 app = FastAPI()
@@ -96,6 +103,160 @@ def strategies(request: Request):
     return templates.TemplateResponse("pages/strategies.html", context)
 
 
+@app.get("/api/ohlcv-cache")
+def ohlcv_cache_stats(request: Request):
+    return dataclasses.asdict(request.app.state.app_scope.ohlcv_cache_stats)
+
+
+@app.get("/api/ohlcv-completeness")
+def ohlcv_completeness(request: Request, source: str, symbol: list[str] = Query(...)):
+    usecase = request.app.state.app_scope.completeness_usecase
+    return [dataclasses.asdict(info) for info in usecase.execute(source, *symbol)]
+
+
+@app.get("/api/jobs")
+def ohlcv_fetch_jobs(request: Request):
+    usecase = request.app.state.app_scope.jobs_usecase
+    return [dataclasses.asdict(info) for info in usecase.execute()]
+
+
+@app.get("/api/jobs/{job_id}")
+def ohlcv_fetch_job(request: Request, job_id: str):
+    jobs = request.app.state.app_scope.jobs_usecase.execute(job_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail=f"job not found: {job_id}")
+    return dataclasses.asdict(jobs[0])
+
+
+@app.get("/api/sessions/{session_id}/results")
+def session_results(request: Request, session_id: str, rank_by: str = "total_return"):
+    scope = SessionDetailPageScope(request.app.state.app_scope, session_id)
+    try:
+        results = scope.results_usecase.execute(session_id, rank_by)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return [dataclasses.asdict(info) for info in results]
+
+
+@app.get("/htmx/sessions/{session_id}/results", response_class=HTMLResponse)
+def session_results_table(
+    request: Request, session_id: str, rank_by: str = "total_return"
+):
+    scope = SessionDetailPageScope(request.app.state.app_scope, session_id)
+    results = scope.results_usecase.execute(session_id, rank_by)
+    context = {
+        "request": request,
+        "session_id": session_id,
+        "rank_by": rank_by,
+        "results": results,
+        # 全部終わったらポーリングをやめる
+        "running": any(r.status in ("PENDING", "RUNNING") for r in results),
+    }
+    return templates.TemplateResponse("partials/backtest_results.html", context)
+
+
+@app.get("/api/sessions/{session_id}/walkforward")
+def session_walk_forward(request: Request, session_id: str):
+    info = _walk_forward(request, session_id)
+    if info is None:
+        raise HTTPException(
+            status_code=404, detail=f"walk-forward not found: {session_id}"
+        )
+    return dataclasses.asdict(info)
+
+
+@app.get("/htmx/sessions/{session_id}/walkforward", response_class=HTMLResponse)
+def session_walk_forward_report(request: Request, session_id: str):
+    info = _walk_forward(request, session_id)
+    context = {
+        "request": request,
+        "walk_forward": info,
+        "report": build_report(info.time_returns) if info else None,
+        # 全窓の検証期間が終わったらポーリングをやめる
+        "running": info is not None
+        and any(
+            w.out_of_sample_status
+            not in ("SUCCEEDED", "FAILED", "TIMED_OUT", "SKIPPED")
+            for w in info.windows
+        ),
+    }
+    return templates.TemplateResponse("partials/walk_forward.html", context)
+
+
+def _walk_forward(request: Request, session_id: str) -> WalkForwardInfo | None:
+    scope = SessionDetailPageScope(request.app.state.app_scope, session_id)
+    return scope.walk_forward_usecase.execute(session_id)
+
+
+@app.get("/api/sessions/{session_id}/contexts/{context_id}/robustness")
+def context_robustness(
+    request: Request,
+    session_id: str,
+    context_id: str,
+    method: str = "bootstrap",
+    paths: int = 10_000,
+    confidence: float = 0.9,
+):
+    scope = SessionDetailPageScope(request.app.state.app_scope, session_id)
+    try:
+        info = scope.robustness_usecase.execute(
+            session_id,
+            context_id,
+            method=method,
+            paths=paths,
+            confidence=confidence,
+            workers=ROBUSTNESS_WORKERS,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if info is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"succeeded context not found in {session_id}: {context_id}",
+        )
+    return dataclasses.asdict(info)
+
+
+@app.get(
+    "/htmx/sessions/{session_id}/contexts/{context_id}/robustness",
+    response_class=HTMLResponse,
+)
+def context_robustness_table(
+    request: Request,
+    session_id: str,
+    context_id: str,
+    method: str = "bootstrap",
+    paths: int = 10_000,
+):
+    scope = SessionDetailPageScope(request.app.state.app_scope, session_id)
+    context = {
+        "request": request,
+        "session_id": session_id,
+        "context_id": context_id,
+        "method": method,
+        "paths": paths,
+        "robustness": None,
+        "error": None,
+    }
+    try:
+        context["robustness"] = scope.robustness_usecase.execute(
+            session_id,
+            context_id,
+            method=method,
+            paths=paths,
+            workers=ROBUSTNESS_WORKERS,
+        )
+    except ValueError as exc:
+        context["error"] = str(exc)
+    return templates.TemplateResponse("partials/robustness.html", context)
+
+
+@app.get("/api/watchlist")
+def watchlist(request: Request):
+    usecase = request.app.state.app_scope.watchlist_usecase
+    return [dataclasses.asdict(info) for info in usecase.execute()]
+
+
 @app.get("/htmx/close-modal", response_class=HTMLResponse)
 def close_modal():
     return ""
@@ -122,11 +283,12 @@ def ohlcv_submit(
     notifier = scope.notifier
     state = notifier.state
     notifier.update(exchange=exchange, symbol=symbol)
-    notifier.submit()
+    job = notifier.submit()
     context = {
         "request": request,
         "exchanges": state.exchanges,
-        "message": "Saved price data request.",
+        "message": f"Queued price data request ({job.status})." if job else None,
+        "job": job,
     }
     return templates.TemplateResponse("partials/ohlcv_modal.html", context)
 
@@ -184,21 +346,33 @@ async def backtest_submit(
     strategy: str | None = Form(None),
     start_date: str | None = Form(None),
     end_date: str | None = Form(None),
+    in_sample_days: int | None = Form(None),
+    out_of_sample_days: int | None = Form(None),
+    anchored: bool = Form(False),
 ):
     scope = BacktestDialogScope(request.app.state.app_scope)
     notifier = scope.notifier
     form = await request.form()
     params = _parse_strategy_args(form, strategy)
-    notifier.update(
-        source=exchange,
-        symbol=symbol,
-        timeframe=_parse_timeframe(timeframe),
-        strategy=strategy,
-        strategy_args=params,
-        start_date=_parse_date(start_date),
-        end_date=_parse_date(end_date),
-    )
-    notifier.on_request_backtest()
+    message, error = "Backtest started.", None
+    try:
+        notifier.update(
+            source=exchange,
+            symbol=symbol,
+            timeframe=_parse_timeframe(timeframe),
+            strategy=strategy,
+            strategy_args=params,
+            strategy_grid=_parse_strategy_grid(form, strategy),
+            start_date=_parse_date(start_date),
+            end_date=_parse_date(end_date),
+            in_sample_days=in_sample_days,
+            out_of_sample_days=out_of_sample_days,
+            anchored=anchored,
+        )
+        notifier.on_request_backtest()
+    except ValueError as exc:
+        # スイープの候補値や組み合わせの数の誤りは、フォームに出して直してもらう
+        message, error = None, str(exc)
     session_scope = SessionTopPageScope(request.app.state.app_scope)
     sessions = session_scope.notifier.state.sessions
     context = {
@@ -206,7 +380,8 @@ async def backtest_submit(
         "exchanges": scope.exchange_symbol_accessor.exchanges,
         "timeframes": [e.name for e in Timeframe],
         "strategies": [name for name, _ in StrategyRegistry],
-        "message": "Backtest started.",
+        "message": message,
+        "error": error,
         "sessions": sessions,
     }
 
@@ -246,6 +421,58 @@ def _parse_strategy_args(form: Any, strategy: str | None) -> dict[str, Any]:
     return data
 
 
+def _parse_strategy_grid(form: Any, strategy: str | None) -> dict[str, list[Any]]:
+    if not strategy or not form:
+        return {}
+    grid = {}
+    # 組み合わせの数はパラメータごとの候補数の積なので、展開する前に上限で打ち切る
+    runs = 1
+    for name, default in StrategyRegistry.params_of(strategy):
+        raw = form.get(f"strategy_sweep__{name}")
+        if raw and raw.strip():
+            values = _parse_sweep_values(
+                raw, default, LaunchParameterSweepUsecase.MAX_RUNS // runs
+            )
+            if not values:
+                raise ValueError(f"No values to sweep for {name}")
+            grid[name] = values
+            runs *= len(values)
+    return grid
+
+
+def _parse_sweep_values(raw: str, default: Any, limit: int) -> list[Any]:
+    """``5,10,20`` や ``5:50:5`` (終端を含む) を ``limit`` 個までの候補値の一覧にする"""
+    values = []
+    for token in raw.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        numeric = isinstance(default, (int, float)) and not isinstance(default, bool)
+        if ":" not in token or not numeric:
+            values.append(token)
+            continue
+        try:
+            start, stop, *rest = (float(part) for part in token.split(":"))
+        except ValueError:
+            raise ValueError(f"Invalid range: {token}") from None
+        if len(rest) > 1:
+            raise ValueError(f"Invalid range: {token}")
+        step = rest[0] if rest else 1.0
+        if not all(math.isfinite(v) for v in (start, stop, step)):
+            raise ValueError(f"Invalid range: {token}")
+        if step <= 0:
+            raise ValueError(f"Invalid step: {token}")
+        if stop < start:
+            raise ValueError(f"Empty range: {token}")
+        count = int((stop - start) / step + 1e-9) + 1
+        if len(values) + count > limit:
+            raise ValueError(f"Too many runs: {token} (max {limit})")
+        values += [round(start + i * step, 10) for i in range(count)]
+    if len(values) > limit:
+        raise ValueError(f"Too many runs: {raw} (max {limit})")
+    return values
+
+
 def _parse_value(raw: Any, default: Any) -> Any:
     if isinstance(default, bool):
         return str(raw).lower() in {"1", "true", "on", "yes"}
@@ -0,0 +1,28 @@
+import argparse
+import time
+
+from blueOcean.application.services import OhlcvCompactionService
+from blueOcean.infra.accessors import ExchangeSymbolDirectoryAccessor
+from blueOcean.infra.database.repositories import OhlcvRepository
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact OHLCV parquet fragments")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--source")
+    parser.add_argument("--symbol")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        help="Run repeatedly every N seconds instead of once",
+    )
+    args = parser.parse_args()
+
+    service = OhlcvCompactionService(
+        OhlcvRepository(base_path=args.data_dir),
+        ExchangeSymbolDirectoryAccessor(args.data_dir),
+    )
+    while True:
+        service.run_once(args.source, args.symbol)
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,24 @@
+import argparse
+import time
+
+from blueOcean.infra.database.repositories import OhlcvRepository
+from blueOcean.infra.importers import LAYOUTS, OhlcvCsvImporter
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Import downloaded historical CSV/ZIP dumps into the OHLCV store"
+    )
+    parser.add_argument("source")
+    parser.add_argument("symbol")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="binance-klines")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    importer = OhlcvCsvImporter(OhlcvRepository(base_path=args.data_dir), args.workers)
+    started = time.perf_counter()
+    imported = importer.execute(
+        args.paths, args.source, args.symbol, LAYOUTS[args.layout]
+    )
+    print(f"imported {imported} bars in {time.perf_counter() - started:.1f}s")
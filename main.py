@@ -2,6 +2,16 @@ import uvicorn
 
 import blueOcean.core.strategies
 from blueOcean.presentation.web import app
+from backtest import start_executor
+from worker import start_workers
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # OHLCV の取得はリクエストの外でワーカーが進める
+    workers = start_workers(processes=2)
+    # 起動したバックテストも同様に別プロセスで実行する
+    workers.append(start_executor())
+    try:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
+    finally:
+        for process in workers:
+            process.terminate()
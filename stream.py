@@ -0,0 +1,22 @@
+import argparse
+import asyncio
+
+from injector import Injector
+
+from blueOcean.application.di import AppModule
+from blueOcean.application.services import OhlcvStreamIngester
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Stream live 1m candles into the OHLCV store"
+    )
+    parser.add_argument("exchange")
+    parser.add_argument("symbols", nargs="+")
+    args = parser.parse_args()
+
+    ingester = Injector([AppModule()]).get(OhlcvStreamIngester)
+    try:
+        # 中断されても溜まっている確定足は保存してから終わる
+        asyncio.run(ingester.run(args.exchange, args.symbols))
+    except KeyboardInterrupt:
+        pass
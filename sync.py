@@ -0,0 +1,50 @@
+import argparse
+from datetime import timedelta
+
+from injector import Injector
+
+from blueOcean.application.di import AppModule
+from blueOcean.application.usecases import (
+    FetchWatchlistUsecase,
+    UnwatchSymbolsUsecase,
+    WatchSymbolsUsecase,
+)
+from blueOcean.application.workers import WatchlistSyncDaemon
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep watched symbols' OHLCV in sync")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="watch symbols")
+    add.add_argument("exchange")
+    add.add_argument("symbols", nargs="+")
+    add.add_argument("--priority", type=int, default=0)
+    add.add_argument("--interval", type=float, default=300, help="seconds")
+    remove = commands.add_parser("remove", help="stop watching symbols")
+    remove.add_argument("exchange")
+    remove.add_argument("symbols", nargs="+")
+    commands.add_parser("status", help="show lag per symbol")
+    commands.add_parser("run", help="run the sync daemon")
+    args = parser.parse_args()
+
+    injector = Injector([AppModule()])
+    if args.command == "add":
+        injector.get(WatchSymbolsUsecase).execute(
+            args.exchange,
+            *args.symbols,
+            priority=args.priority,
+            interval=timedelta(seconds=args.interval),
+        )
+    elif args.command == "remove":
+        injector.get(UnwatchSymbolsUsecase).execute(args.exchange, *args.symbols)
+    elif args.command == "status":
+        for info in injector.get(FetchWatchlistUsecase).execute():
+            lag = "-" if info.lag_seconds is None else f"{info.lag_seconds:.0f}s"
+            print(
+                f"{info.exchange:<12} {info.symbol:<16} p={info.priority:<3} "
+                f"lag={lag:<10} failures={info.failures} {info.last_error or ''}"
+            )
+    else:
+        try:
+            injector.get(WatchlistSyncDaemon).run_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from blueOcean.application.usecases import BackfillOhlcvUsecase
+from blueOcean.domain.backfill import plan_shards
+from blueOcean.domain.ohlcv import Ohlcv
+from blueOcean.infra.database.repositories import (
+    BackfillCheckpointRepository,
+    OhlcvRepository,
+)
+
+
+def _ms(value) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def test_plan_shards_aligns_to_pages(fake_exchange):
+    start = fake_exchange.listed_at
+
+    shards = plan_shards("fake", "BTC/USDT", start, start + timedelta(minutes=2500), 2)
+
+    assert [(s.start_at - start, s.end_at - start) for s in shards] == [
+        (timedelta(0), timedelta(minutes=2000)),
+        (timedelta(minutes=2000), timedelta(minutes=2500)),
+    ]
+
+
+def test_execute_fetches_shards_in_parallel(
+    tmp_path, database, fake_exchange, fake_fetcher_factory
+):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    checkpoints = BackfillCheckpointRepository(database)
+    start = fake_exchange.listed_at
+    repo.save([Ohlcv(start, 1.0, 2.0, 0.5, 1.5, 1.0)], "fake", "BTC/USDT")
+
+    shards = BackfillOhlcvUsecase(fake_fetcher_factory, repo, checkpoints).execute(
+        "fake", "BTC/USDT", shards=3, concurrency=3, until_at=fake_exchange.now
+    )
+
+    # 上場前の区間と、保存済みの足より後の区間がそれぞれ分割される
+    assert len(shards) == 4
+    assert all(s.done for s in shards)
+    assert fake_exchange.max_in_flight > 1
+    assert repo.find_table("BTC/USDT", "fake").num_rows == 2500
+    assert checkpoints.find_by_symbol("fake", "BTC/USDT") == []
+    # 足が無かった上場前の区間は次回以降の取得対象から外れる
+    assert repo.find_gaps("fake", "BTC/USDT", shards[0].start_at, start) == []
+
+
+def test_execute_resumes_from_checkpoints(
+    tmp_path, database, fake_exchange, fake_fetcher_factory
+):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    checkpoints = BackfillCheckpointRepository(database)
+    start = fake_exchange.listed_at
+    first, second, third = plan_shards("fake", "BTC/USDT", start, fake_exchange.now, 3)
+    # 1 つ目は途中まで、2 つ目は保存済みの状態で落ちたことにする
+    checkpoints.save(
+        first.advance(start + timedelta(minutes=499)), second.complete(), third
+    )
+
+    shards = BackfillOhlcvUsecase(fake_fetcher_factory, repo, checkpoints).execute(
+        "fake", "BTC/USDT", until_at=fake_exchange.now
+    )
+
+    assert all(s.done for s in shards)
+    since = {s for _, s in fake_exchange.calls}
+    assert _ms(start + timedelta(minutes=500)) in since
+    assert _ms(start) not in since
+    assert _ms(second.start_at) not in since
+    assert repo.find_table("BTC/USDT", "fake").num_rows == 500 + 500
@@ -0,0 +1,139 @@
+import os
+import time
+from datetime import UTC, datetime, timedelta
+
+import backtrader as bt
+import pandas as pd
+
+from blueOcean.application.backtests import BacktestExecutor
+from blueOcean.domain.context import Context, ContextStatus
+from blueOcean.domain.ohlcv import Ohlcv, Timeframe
+from blueOcean.domain.strategy import StrategySnapshot
+from blueOcean.infra.database.repositories import (
+    ContextRepository,
+    OhlcvRepository,
+    StrategySnapshotRepository,
+)
+from blueOcean.shared.registries import StrategyRegistry
+
+
+@StrategyRegistry.register("ExecutorTestBuyOnce")
+class _BuyOnce(bt.Strategy):
+    params = (("size", 1.0),)
+
+    def next(self):
+        if not self.position:
+            self.buy(size=self.p.size)
+
+
+@StrategyRegistry.register("ExecutorTestCrash")
+class _Crash(bt.Strategy):
+    def next(self):
+        # ワーカーごと落ちる実行 (メモリ不足で殺されるなど) の代わり
+        os._exit(1)
+
+
+@StrategyRegistry.register("ExecutorTestSlow")
+class _Slow(bt.Strategy):
+    def next(self):
+        time.sleep(10)
+
+
+def _launch(database, strategy_name: str, **kwargs) -> Context:
+    snapshot = StrategySnapshotRepository(database).save(
+        StrategySnapshot(name=strategy_name)
+    )
+    context = Context(
+        strategy_snapshot_id=snapshot.id,
+        source="binance",
+        symbol="BTC/USDT",
+        timeframe=Timeframe.FIVE_MINUTE,
+        **kwargs,
+    )
+    return ContextRepository(database).save(context)
+
+
+def _seed(data_dir):
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    OhlcvRepository(base_path=str(data_dir)).save(
+        [
+            Ohlcv(start + timedelta(minutes=i), 100 + i, 101 + i, 99 + i, 100 + i, 1.0)
+            for i in range(300)
+        ],
+        "binance",
+        "BTC/USDT",
+    )
+
+
+def test_run_once_runs_pending_contexts_and_records_status(
+    database, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    _seed(tmp_path / "data")
+    ok = _launch(database, "ExecutorTestBuyOnce", strategy_args={"size": 2.0})
+    ranged = _launch(
+        database,
+        "ExecutorTestBuyOnce",
+        start_at=datetime(2024, 1, 1, 1),
+        end_at=datetime(2024, 1, 1, 1, 59),
+    )
+    missing = _launch(database, "NotRegistered")
+    repository = ContextRepository(database)
+
+    results = BacktestExecutor(
+        repository,
+        StrategySnapshotRepository(database),
+        OhlcvRepository(base_path=str(tmp_path / "data")),
+    ).run_once(workers=2)
+
+    assert results == {
+        ok.id.value: ContextStatus.SUCCEEDED,
+        ranged.id.value: ContextStatus.SUCCEEDED,
+        missing.id.value: ContextStatus.FAILED,
+    }
+    assert repository.find_by_id(ok.id).status == ContextStatus.SUCCEEDED
+    assert repository.find_by_id(missing.id).status == ContextStatus.FAILED
+    assert repository.claim() == []
+    metrics = pd.read_csv(tmp_path / "out" / ranged.id.value / "metrics.csv")
+    # 1 時間分の 5m 足
+    assert metrics["timestamp"].nunique() == 12
+
+
+def test_run_once_stops_contexts_that_exceed_timeout(database, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _seed(tmp_path / "data")
+    slow = _launch(database, "ExecutorTestSlow")
+
+    started = time.monotonic()
+    results = BacktestExecutor(
+        ContextRepository(database),
+        StrategySnapshotRepository(database),
+        OhlcvRepository(base_path=str(tmp_path / "data")),
+    ).run_once(workers=1, timeout=0.5)
+
+    assert results == {slow.id.value: ContextStatus.TIMED_OUT}
+    assert time.monotonic() - started < 10
+
+
+def test_run_once_restarts_a_broken_pool_and_fails_only_the_crashing_context(
+    database, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    _seed(tmp_path / "data")
+    first = _launch(database, "ExecutorTestBuyOnce")
+    crash = _launch(database, "ExecutorTestCrash")
+    last = _launch(database, "ExecutorTestBuyOnce")
+    repository = ContextRepository(database)
+
+    results = BacktestExecutor(
+        repository,
+        StrategySnapshotRepository(database),
+        OhlcvRepository(base_path=str(tmp_path / "data")),
+    ).run_once(workers=2)
+
+    assert results == {
+        first.id.value: ContextStatus.SUCCEEDED,
+        crash.id.value: ContextStatus.FAILED,
+        last.id.value: ContextStatus.SUCCEEDED,
+    }
+    assert repository.claim() == []
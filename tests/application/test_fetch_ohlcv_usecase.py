@@ -0,0 +1,135 @@
+from datetime import UTC, datetime, timedelta
+
+from blueOcean.application.usecases import FetchOhlcvUsecase
+from blueOcean.domain.ohlcv import Ohlcv, Timeframe
+from blueOcean.infra.database.repositories import OhlcvRepository
+
+
+def test_execute_many_fetches_symbols_concurrently(
+    tmp_path, fake_exchange, fake_fetcher_factory
+):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = fake_exchange.listed_at
+    repo.save([Ohlcv(start, 1.0, 2.0, 0.5, 1.5, 1.0)], "fake", "BTC/USDT")
+    symbols = ["BTC/USDT", "ETH/USDT", "XRP/USDT", "SOL/USDT"]
+
+    failed = FetchOhlcvUsecase(fake_fetcher_factory, repo).execute_many(
+        "fake", symbols, concurrency=4
+    )
+
+    assert failed == []
+    assert fake_exchange.closed
+    assert fake_exchange.max_in_flight > 1
+    assert repo.get_latest_timestamp("fake", "ETH/USDT") == (
+        fake_exchange.now - timedelta(minutes=1)
+    )
+    # 既存データがあるシンボルは続きから取得する
+    assert repo.find_table("BTC/USDT", "fake").num_rows == 2500
+    resumed_since = int((start + timedelta(minutes=1)).timestamp() * 1000)
+    assert ("BTC/USDT", resumed_since) in fake_exchange.calls
+
+
+def test_execute_many_reports_failed_symbols_and_keeps_the_rest(
+    tmp_path, fake_exchange, fake_fetcher_factory
+):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    fake_exchange.broken = {"ETH/USDT"}
+
+    failed = FetchOhlcvUsecase(fake_fetcher_factory, repo).execute_many(
+        "fake", ["BTC/USDT", "ETH/USDT"]
+    )
+
+    assert failed == ["ETH/USDT"]
+    assert repo.get_latest_timestamp("fake", "ETH/USDT") is None
+    assert repo.get_latest_timestamp("fake", "BTC/USDT") is not None
+
+
+def test_execute_many_refills_holes_and_skips_known_empty_ranges(
+    tmp_path, fake_exchange, fake_fetcher_factory
+):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = fake_exchange.listed_at
+    # 5h 目からの 1 時間が抜けた状態にする
+    for offset, count in ((0, 300), (360, 2140)):
+        repo.save(
+            [
+                Ohlcv(start + timedelta(minutes=offset + i), 1.0, 2.0, 0.5, 1.5, 1.0)
+                for i in range(count)
+            ],
+            "fake",
+            "BTC/USDT",
+        )
+    usecase = FetchOhlcvUsecase(fake_fetcher_factory, repo)
+
+    usecase.execute_many("fake", ["BTC/USDT"])
+    first_calls = [since for _, since in fake_exchange.calls]
+    fake_exchange.calls.clear()
+    usecase.execute_many("fake", ["BTC/USDT"])
+
+    assert repo.find_table("BTC/USDT", "fake").num_rows == 2500
+    assert repo.get_completeness("fake", "BTC/USDT").missing == 0
+    assert _ms(start + timedelta(minutes=300)) in first_calls
+    # 上場前の区間は 1 回目で足が無いと分かったので、2 回目は末尾だけを問い合わせる
+    assert _ms(datetime(2017, 1, 1, tzinfo=UTC)) in first_calls
+    assert [since for _, since in fake_exchange.calls] == [_ms(fake_exchange.now)]
+
+
+def test_execute_many_does_not_mark_ranges_from_empty_pages(
+    tmp_path, fake_exchange, fake_fetcher_factory
+):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    listed_at = fake_exchange.listed_at
+    usecase = FetchOhlcvUsecase(fake_fetcher_factory, repo)
+
+    # 一時的に何も返さない取引所からは、足が無いとは判断しない
+    fake_exchange.listed_at = fake_exchange.now
+    usecase.execute_many("fake", ["BTC/USDT"])
+    fake_exchange.listed_at = listed_at
+    usecase.execute_many("fake", ["BTC/USDT"])
+
+    assert repo.find_table("BTC/USDT", "fake").num_rows == 2500
+
+
+def test_clear_unavailable_lets_known_empty_ranges_be_fetched_again(
+    tmp_path, fake_exchange, fake_fetcher_factory
+):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    usecase = FetchOhlcvUsecase(fake_fetcher_factory, repo)
+    usecase.execute_many("fake", ["BTC/USDT"])
+    since = datetime(2017, 1, 1, tzinfo=UTC)
+    assert repo.find_gaps("fake", "BTC/USDT", since, fake_exchange.listed_at) == []
+
+    repo.clear_unavailable("fake", "BTC/USDT")
+
+    assert repo.find_gaps("fake", "BTC/USDT", since, fake_exchange.listed_at) == [
+        (since, fake_exchange.listed_at)
+    ]
+
+
+def _ms(value) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def test_execute_many_fetches_native_daily_bars(
+    tmp_path, fake_exchange, fake_fetcher_factory
+):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = fake_exchange.listed_at
+    fake_exchange.now = start + timedelta(days=400, hours=5)
+
+    failed = FetchOhlcvUsecase(fake_fetcher_factory, repo).execute_many(
+        "fake", ["BTC/USDT"], timeframe=Timeframe.ONE_DAY
+    )
+
+    assert failed == []
+    # 1m なら 577 ページ要る期間が、取得 1 ページと終端確認の 1 回で済む
+    assert len(fake_exchange.calls) == 2
+    table = repo.find_table("BTC/USDT", "fake", Timeframe.ONE_DAY)
+    assert table.num_rows == 401
+    assert repo.get_latest_timestamp("fake", "BTC/USDT") is None
+    assert (
+        repo.find_gaps(
+            "fake", "BTC/USDT", start, start + timedelta(days=400), Timeframe.ONE_DAY
+        )
+        == []
+    )
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from blueOcean.application.feeds import OhlcvColumnsFeed
+from blueOcean.domain.ohlcv import OhlcvColumns, Timeframe
+
+
+class _Record(bt.Strategy):
+    def start(self):
+        self.rows = []
+
+    def next(self):
+        d = self.data
+        self.rows.append(
+            (d.datetime.datetime(0), d.open[0], d.high[0], d.low[0], d.close[0])
+        )
+
+
+def _columns(n: int) -> OhlcvColumns:
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    time = np.datetime64("2024-01-01T00:00", "us") + np.arange(n) * np.timedelta64(
+        15, "m"
+    )
+    return OhlcvColumns(time, close - 0.5, close + 1, close - 1, close, rng.random(n))
+
+
+def _rows(data, **kwargs) -> tuple[bt.Cerebro, list]:
+    cerebro = bt.Cerebro(stdstats=False, **kwargs)
+    cerebro.adddata(data)
+    cerebro.addstrategy(_Record)
+    return cerebro, cerebro.run()[0].rows
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"fromdate": datetime(2024, 1, 2), "todate": datetime(2024, 1, 3, 12)},
+    ],
+)
+def test_bulk_preload_matches_row_by_row_and_pandas(kwargs):
+    columns = _columns(500)
+    frame = pd.DataFrame(
+        {name: getattr(columns, name) for name in OhlcvColumns.NAMES[1:]},
+        index=pd.DatetimeIndex(columns.time),
+    )
+
+    _, bulk = _rows(OhlcvColumnsFeed.of(columns, Timeframe.FIFTEEN_MINUTE, **kwargs))
+    _, row_by_row = _rows(
+        OhlcvColumnsFeed.of(columns, Timeframe.FIFTEEN_MINUTE, **kwargs),
+        preload=False,
+    )
+    _, pandas = _rows(
+        bt.feeds.PandasData(
+            dataname=frame,
+            timeframe=bt.TimeFrame.Minutes,
+            compression=15,
+            openinterest=None,
+            **kwargs,
+        )
+    )
+
+    assert bulk == row_by_row == pandas
+    # 15 分足で 1/2 00:00 から 1/3 12:00 まで (両端を含む)
+    assert len(bulk) == (36 * 4 + 1 if kwargs else 500)
+
+
+def test_of_maps_the_timeframe():
+    daily = OhlcvColumnsFeed.of(_columns(1), Timeframe.ONE_DAY)
+    hourly = OhlcvColumnsFeed.of(_columns(1), Timeframe.FOUR_HOUR)
+
+    assert (daily.p.timeframe, daily.p.compression) == (bt.TimeFrame.Days, 1)
+    assert (hourly.p.timeframe, hourly.p.compression) == (bt.TimeFrame.Minutes, 240)
@@ -0,0 +1,30 @@
+from datetime import UTC, datetime, timedelta
+
+from blueOcean.application.services import OhlcvCompactionService
+from blueOcean.domain.ohlcv import Ohlcv, Timeframe
+from blueOcean.infra.accessors import ExchangeSymbolDirectoryAccessor
+from blueOcean.infra.database.repositories import OhlcvRepository
+
+
+def test_run_once_compacts_every_symbol_without_changing_results(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    for page in range(3):
+        repo.save(
+            [
+                Ohlcv(start + timedelta(minutes=page * 10 + i), 1.0, 2.0, 0.5, 1.5, 1.0)
+                for i in range(10)
+            ],
+            "binance",
+            "BTC/USDT",
+        )
+    before = repo.find_table("BTC/USDT", "binance", Timeframe.FIVE_MINUTE)
+    service = OhlcvCompactionService(repo, ExchangeSymbolDirectoryAccessor(tmp_path))
+
+    compacted = service.run_once()
+
+    # 集約は読み込み時に 1 度で作られるので、まとめるのは 1m の月だけ
+    assert compacted == 1
+    assert service.run_once() == 0
+    assert repo.find_table("BTC/USDT", "binance", Timeframe.FIVE_MINUTE).equals(before)
+    assert len(repo._store("binance", "BTC/USDT").files()) == 1
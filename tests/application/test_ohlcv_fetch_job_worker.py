@@ -0,0 +1,31 @@
+from blueOcean.application.usecases import FetchOhlcvUsecase
+from blueOcean.application.workers import OhlcvFetchJobWorker
+from blueOcean.domain.job import JobStatus
+from blueOcean.infra.database.repositories import OhlcvFetchJobQueue
+
+
+class _FakeFetchUsecase(FetchOhlcvUsecase):
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, exchange_name, symbol):
+        self.calls.append((exchange_name, symbol))
+        if symbol == "BROKEN/USDT":
+            raise ConnectionError("boom")
+
+
+def test_worker_runs_queued_jobs_and_records_failures(database):
+    queue = OhlcvFetchJobQueue(connection=database)
+    usecase = _FakeFetchUsecase()
+    worker = OhlcvFetchJobWorker(queue, usecase)
+    ok = queue.enqueue("binance", "BTC/USDT")
+    broken = queue.enqueue("binance", "BROKEN/USDT")
+
+    first = worker.run_once("w1")
+    second = worker.run_once("w1")
+
+    assert worker.run_once("w1") is None
+    assert usecase.calls == [("binance", "BTC/USDT"), ("binance", "BROKEN/USDT")]
+    assert (first.id, first.status) == (ok.id, JobStatus.SUCCEEDED)
+    assert (second.id, second.status) == (broken.id, JobStatus.FAILED)
+    assert second.error == "boom"
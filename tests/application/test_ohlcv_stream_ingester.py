@@ -0,0 +1,97 @@
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+
+import pyarrow.parquet as pq
+
+from blueOcean.application.factories import IOhlcvStreamFactory
+from blueOcean.application.services import OhlcvStreamIngester
+from blueOcean.domain.ohlcv import Ohlcv
+from blueOcean.infra.database.repositories import OhlcvRepository
+from blueOcean.infra.streams import ReplayOhlcvStream
+
+START = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+class _ReplayFactory(IOhlcvStreamFactory):
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def create(self, exchange_name):
+        return ReplayOhlcvStream(**self.kwargs)
+
+
+def _write_bars(path, count: int):
+    bars = [
+        Ohlcv(START + timedelta(minutes=i), 10.0 + i, 12.0 + i, 9.0 + i, 11.0 + i, 3.0)
+        for i in range(count)
+    ]
+    pq.write_table(Ohlcv.to_arrow(bars), path)
+    return path
+
+
+def test_ingester_flushes_closed_bars_in_micro_batches(tmp_path):
+    files = {"BTC/USDT": _write_bars(tmp_path / "btc.parquet", 30)}
+    repo = OhlcvRepository(base_path=str(tmp_path / "data"))
+    ingester = OhlcvStreamIngester(_ReplayFactory(files=files, updates_per_bar=3), repo)
+    ingester.FLUSH_ROWS = 10
+    ingester.FLUSH_INTERVAL = 0.01
+
+    asyncio.run(ingester.run("replay", ["BTC/USDT"]))
+
+    # 最後の足はまだ形成中なので保存しない
+    stored = repo.find_table("BTC/USDT", "replay")
+    assert stored.num_rows == 29
+    assert stored.column("close").to_pylist()[-1] == 39.0
+    assert ingester.latest("replay", "BTC/USDT") == Ohlcv(
+        START + timedelta(minutes=29), 39.0, 41.0, 38.0, 40.0, 3.0
+    )
+    assert ingester.tail("replay", "BTC/USDT").num_rows == 1
+
+
+def test_ingester_serves_partial_bar_while_streaming(tmp_path):
+    files = {"BTC/USDT": _write_bars(tmp_path / "btc.parquet", 5)}
+    repo = OhlcvRepository(base_path=str(tmp_path / "data"))
+    # 1 本 0.6 秒、更新 3 回
+    stream = _ReplayFactory(files=files, speed=100, updates_per_bar=3)
+    ingester = OhlcvStreamIngester(stream, repo)
+
+    ingester.start("replay", ["BTC/USDT"])
+    try:
+        deadline = time.monotonic() + 5
+        while ingester.latest("replay", "BTC/USDT") is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        partial = ingester.latest("replay", "BTC/USDT")
+    finally:
+        ingester.stop(timeout=5)
+
+    assert partial.time == START
+    assert partial.close < 11.0
+    assert partial.volume == 1.0
+    assert ingester.tail("replay", "BTC/USDT").num_rows >= 1
+
+
+def test_ingester_publishes_partial_bar_to_other_readers(tmp_path):
+    files = {"BTC/USDT": _write_bars(tmp_path / "btc.parquet", 5)}
+    repo = OhlcvRepository(base_path=str(tmp_path / "data"))
+    reader = OhlcvRepository(base_path=str(tmp_path / "data"))
+    stream = _ReplayFactory(files=files, speed=100, updates_per_bar=3)
+    ingester = OhlcvStreamIngester(stream, repo)
+    ingester.PUBLISH_INTERVAL = 0.05
+
+    ingester.start("replay", ["BTC/USDT"])
+    try:
+        deadline = time.monotonic() + 5
+        while reader.find_table("BTC/USDT", "replay").num_rows == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        seen = reader.find_table("BTC/USDT", "replay")
+    finally:
+        ingester.stop(timeout=5)
+
+    assert seen.column("time").to_pylist()[0] == START
+    # 止めた後は形成中だった足は見えず、保存した確定足だけが残る
+    forming = ingester.latest("replay", "BTC/USDT").time
+    stored = reader.find_table("BTC/USDT", "replay").column("time").to_pylist()
+    assert forming not in stored
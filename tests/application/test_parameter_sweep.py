@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from blueOcean.application import backtests
+from blueOcean.application.backtests import BacktestExecutor
+from blueOcean.application.usecases import (
+    FetchBacktestResultsUsecase,
+    LaunchParameterSweepUsecase,
+)
+from blueOcean.domain.context import IContextRepository
+from blueOcean.domain.ohlcv import Timeframe
+from blueOcean.domain.session import SessionId
+
+
+def _fail(*args):
+    raise AssertionError("should not run")
+
+
+def _rising(bars: int = 120) -> list[int]:
+    return [100 + i for i in range(bars)]
+
+
+def test_sweep_runs_every_combination_and_ranks_results(backtest_injector, seed_ohlcv):
+    seed_ohlcv(_rising())
+    injector = backtest_injector
+
+    session_id = injector.get(LaunchParameterSweepUsecase).execute(
+        source="binance",
+        symbol="BTC/USDT",
+        timeframe=Timeframe.ONE_MINUTE,
+        strategy_name="TestHold",
+        grid={"size": [1, 2, 2.0, 3], "hold": [10, 20]},
+        start_at=datetime.min,
+        end_at=datetime.max,
+    )
+    contexts = injector.get(IContextRepository).find_by_session_id(
+        SessionId(value=session_id)
+    )
+    pending = injector.get(FetchBacktestResultsUsecase).execute(session_id)
+
+    injector.get(BacktestExecutor).run_once(workers=2)
+    results = injector.get(FetchBacktestResultsUsecase).execute(session_id)
+
+    assert len(contexts) == 6
+    assert all(r.status == "PENDING" and r.final_value is None for r in pending)
+    assert [r.status for r in results] == ["SUCCEEDED"] * 6
+    # 上昇し続ける相場なので、大きく持つほど上位に来る
+    assert [r.strategy_args["size"] for r in results[:2]] == [3, 3]
+    assert results[0].total_return >= results[-1].total_return
+
+
+def test_resubmitted_sweep_reuses_results_until_data_changes(
+    backtest_injector, seed_ohlcv, monkeypatch
+):
+    seed_ohlcv(_rising())
+    injector = backtest_injector
+
+    def sweep() -> dict[int, float]:
+        session_id = injector.get(LaunchParameterSweepUsecase).execute(
+            source="binance",
+            symbol="BTC/USDT",
+            timeframe=Timeframe.ONE_MINUTE,
+            strategy_name="TestHold",
+            grid={"size": [1, 2]},
+            start_at=datetime.min,
+            end_at=datetime.max,
+        )
+        injector.get(BacktestExecutor).run_once(workers=1)
+        return {
+            r.strategy_args["size"]: r.final_value
+            for r in injector.get(FetchBacktestResultsUsecase).execute(session_id)
+        }
+
+    first = sweep()
+    # 以後ワーカーで実行されたコンテキストは失敗する
+    monkeypatch.setattr(backtests, "run_backtest", _fail)
+    second = sweep()
+    seed_ohlcv(_rising(bars=121))
+    third = sweep()
+
+    assert first == second
+    assert all(value is not None for value in first.values())
+    # 足が変わったので実行し直そうとして失敗する
+    assert all(value is None for value in third.values())
@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from blueOcean.application.backtests import BacktestExecutor
+from blueOcean.application.robustness import (
+    confidence_band,
+    path_metrics,
+    resample,
+    simulate,
+)
+from blueOcean.application.usecases import (
+    AnalyzeRobustnessUsecase,
+    FetchBacktestResultsUsecase,
+    LaunchParameterSweepUsecase,
+)
+from blueOcean.domain.ohlcv import Timeframe
+
+
+def test_path_metrics_matches_hand_computed_values():
+    returns = np.array([0.1, -0.5, 0.2, 0.1])
+
+    metrics = path_metrics(returns, periods_per_year=4)
+
+    equity = np.cumprod(1 + returns)
+    assert metrics["max_drawdown"][0] == pytest.approx(0.5)
+    assert metrics["cagr"][0] == pytest.approx(equity[-1] - 1)
+    assert metrics["sharpe"][0] == pytest.approx(
+        returns.mean() / returns.std(ddof=1) * 2
+    )
+    assert np.isnan(path_metrics(np.zeros((1, 3)), 365)["sharpe"][0])
+
+
+def test_resample_keeps_length_and_draws_from_the_series():
+    rng = np.random.default_rng(0)
+    values = np.arange(10, dtype=float)
+
+    shuffled = resample(values, 50, rng, "shuffle")
+    blocks = resample(values, 50, rng, "bootstrap", block_size=3)
+
+    assert shuffled.shape == blocks.shape == (50, 10)
+    assert (np.sort(shuffled, axis=1) == values).all()
+    # ブロックの中は元の並びのまま続く
+    assert (np.diff(blocks[:, :3], axis=1) == 1).all()
+    with pytest.raises(ValueError):
+        resample(values, 1, rng, "jackknife")
+
+
+def test_simulate_is_reproducible_across_workers_and_shuffle_keeps_totals():
+    values = np.random.default_rng(1).normal(0.001, 0.02, 300)
+
+    single = simulate(values, 365, paths=5_000, seed=7, workers=1)
+    parallel = simulate(values, 365, paths=5_000, seed=7, workers=2)
+    shuffled = simulate(values, 365, paths=1_000, method="shuffle", seed=7)
+
+    for name in single:
+        assert len(single[name]) == 5_000
+        np.testing.assert_array_equal(single[name], parallel[name])
+    # 並べ替えでは最終的な資産は変わらない
+    np.testing.assert_allclose(shuffled["cagr"], shuffled["cagr"][0])
+    low, median, high = confidence_band(single["sharpe"], 0.9)
+    assert low < median < high
+
+
+def test_analyze_robustness_bands_a_completed_context(backtest_injector, seed_ohlcv):
+    seed_ohlcv(100 + 10 * np.sin(np.arange(3 * 1440) / 90))
+    injector = backtest_injector
+    session_id = injector.get(LaunchParameterSweepUsecase).execute(
+        source="binance",
+        symbol="BTC/USDT",
+        timeframe=Timeframe.ONE_MINUTE,
+        strategy_name="TestHold",
+        grid={"hold": [30]},
+        start_at=datetime.min,
+        end_at=datetime.max,
+    )
+    usecase = injector.get(AnalyzeRobustnessUsecase)
+    context_id = (
+        injector.get(FetchBacktestResultsUsecase).execute(session_id)[0].context_id
+    )
+
+    assert usecase.execute(session_id, context_id) is None
+    injector.get(BacktestExecutor).run_once(workers=1)
+    daily = usecase.execute(session_id, context_id, paths=2_000, seed=1, workers=1)
+    trades = usecase.execute(
+        session_id, context_id, method="shuffle", paths=2_000, seed=1
+    )
+
+    assert (daily.series, daily.samples) == ("daily", 3)
+    assert [b.metric for b in daily.bands] == ["sharpe", "max_drawdown", "cagr"]
+    assert trades.series == "trades"
+    assert trades.samples > 100
+    for band in daily.bands + trades.bands:
+        assert band.low <= band.median <= band.high
+    drawdown = trades.bands[1]
+    assert drawdown.low < drawdown.high
+    # 別のセッションのコンテキストは見せない
+    assert usecase.execute("other-session", context_id) is None
+    with pytest.raises(ValueError):
+        usecase.execute(session_id, context_id, paths=0)
@@ -0,0 +1,116 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from blueOcean.application.analyzers import StreamingAnalyzer
+from blueOcean.application.backtests import BacktestRun, run_backtest
+from blueOcean.application.feeds import OhlcvColumnsFeed
+from blueOcean.application.vectorized import SignalStrategy, Signals, run_vectorized
+from blueOcean.domain.ohlcv import OhlcvColumns, Timeframe
+from blueOcean.shared.registries import StrategyRegistry
+
+
+@StrategyRegistry.register("VectorizedTestSmaCross")
+class _SmaCross(SignalStrategy):
+    params = (("fast", 5), ("slow", 20), ("size", 1.0))
+
+    @classmethod
+    def signals(cls, columns, params):
+        fast = _sma(columns.close, params.fast)
+        slow = _sma(columns.close, params.slow)
+        return Signals(fast > slow, fast < slow, params.size)
+
+
+class _Random(SignalStrategy):
+    """同じ足での売り買い両方のシグナルや、足ごとに違う数量も含む"""
+
+    params = (("seed", 0),)
+
+    @classmethod
+    def signals(cls, columns, params):
+        rng = np.random.default_rng(params.seed)
+        n = len(columns)
+        return Signals(rng.random(n) < 0.2, rng.random(n) < 0.2, rng.integers(1, 5, n))
+
+
+def _sma(values: np.ndarray, period: int) -> np.ndarray:
+    sums = np.cumsum(np.concatenate([[0.0], values]))
+    sma = np.full(len(values), np.nan)
+    sma[period - 1 :] = (sums[period:] - sums[:-period]) / period
+    return sma
+
+
+def _columns(n: int, seed: int = 1) -> OhlcvColumns:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    open_ = close + rng.normal(scale=0.2, size=n)
+    time = np.datetime64("2024-01-01T00:00", "us") + np.arange(n) * np.timedelta64(
+        5, "m"
+    )
+    return OhlcvColumns(
+        time,
+        open_,
+        np.maximum(open_, close) + 0.1,
+        np.minimum(open_, close) - 0.1,
+        close,
+        np.ones(n),
+    )
+
+
+def _run_cerebro(strategy_cls, columns, args, commission, path=None):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(OhlcvColumnsFeed.of(columns, Timeframe.FIVE_MINUTE))
+    cerebro.addstrategy(strategy_cls, **args)
+    cerebro.broker.setcommission(commission=commission)
+    cerebro.addanalyzer(bt.analyzers.TimeReturn, _name="time_return")
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
+    if path:
+        cerebro.addanalyzer(StreamingAnalyzer, path=str(path))
+    return cerebro, cerebro.run()[0]
+
+
+@pytest.mark.parametrize(
+    "strategy_cls, args, commission",
+    [
+        (_SmaCross, {}, 0.0),
+        (_SmaCross, {"fast": 3, "slow": 50, "size": 2.5}, 0.001),
+        (_Random, {"seed": 7}, 0.0005),
+    ],
+)
+def test_vectorized_engine_matches_cerebro(strategy_cls, args, commission):
+    columns = _columns(3000)
+
+    cerebro, strategy = _run_cerebro(strategy_cls, columns, args, commission)
+    result = run_vectorized(strategy_cls, columns, args, commission=commission)
+
+    expected = np.array(list(strategy.analyzers.time_return.get_analysis().values()))
+    np.testing.assert_allclose(result.returns, expected, rtol=0, atol=1e-12)
+    assert result.final_value == pytest.approx(cerebro.broker.getvalue())
+    assert result.max_drawdown == pytest.approx(
+        strategy.analyzers.drawdown.get_analysis().max.drawdown
+    )
+    assert result.trades == strategy.analyzers.trades.get_analysis().total.closed
+
+
+def test_run_backtest_writes_the_same_time_returns_as_cerebro(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    columns = _columns(500)
+    run = BacktestRun(
+        context_id="vectorized",
+        strategy_name="VectorizedTestSmaCross",
+        timeframe=Timeframe.FIVE_MINUTE,
+    )
+
+    run_backtest(run, columns)
+    _run_cerebro(_SmaCross, columns, {}, 0.0, tmp_path / "cerebro")
+
+    def time_returns(path):
+        metrics = pd.read_csv(path / "metrics.csv")
+        return metrics[metrics["analyzer"] == "time_return"].reset_index(drop=True)
+
+    actual = time_returns(tmp_path / "out" / "vectorized")
+    expected = time_returns(tmp_path / "cerebro")
+    assert actual["timestamp"].tolist() == expected["timestamp"].tolist()
+    np.testing.assert_allclose(actual["value"], expected["value"], atol=1e-12)
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import backtrader as bt
+
+from blueOcean.application.backtests import BacktestExecutor
+from blueOcean.application.usecases import (
+    AdvanceWalkForwardUsecase,
+    FetchWalkForwardUsecase,
+    LaunchWalkForwardUsecase,
+)
+from blueOcean.domain.context import IContextRepository
+from blueOcean.domain.ohlcv import Timeframe
+from blueOcean.domain.session import SessionId
+from blueOcean.domain.walkforward import IWalkForwardRepository
+from blueOcean.presentation.reporting import build_report
+from blueOcean.shared.registries import StrategyRegistry
+
+# 画面からの期間と同じく UTC の naive な日時で渡す
+START = datetime(2024, 1, 1)
+
+
+@StrategyRegistry.register("WalkForwardTestBroken")
+class _Broken(bt.Strategy):
+    params = (("size", 1),)
+
+    def next(self):
+        raise RuntimeError("broken")
+
+
+def test_walk_forward_optimizes_each_window_and_stitches_out_of_sample(
+    backtest_injector, seed_ohlcv
+):
+    seed_ohlcv(100 + i for i in range(8 * 60))
+    injector = backtest_injector
+    session_id = injector.get(LaunchWalkForwardUsecase).execute(
+        source="binance",
+        symbol="BTC/USDT",
+        timeframe=Timeframe.ONE_MINUTE,
+        strategy_name="TestHold",
+        grid={"size": [1, 3], "hold": [10, 20]},
+        start_at=START,
+        end_at=START + timedelta(hours=8),
+        in_sample=timedelta(hours=2),
+        out_of_sample=timedelta(hours=2),
+    )
+    advance = injector.get(AdvanceWalkForwardUsecase)
+    contexts = injector.get(IContextRepository)
+
+    # 学習期間が終わるまでは検証期間を追加しない
+    assert advance.execute(session_id) == 0
+    assert len(contexts.find_by_session_id(SessionId(value=session_id))) == 12
+
+    # 学習期間が終わった窓の検証期間は、実行器が追加して続けて回す
+    injector.get(BacktestExecutor).run_once(workers=2)
+    info = injector.get(FetchWalkForwardUsecase).execute(session_id)
+
+    assert len(contexts.find_by_session_id(SessionId(value=session_id))) == 15
+    assert advance.execute(session_id) == 0
+    assert [w.in_sample_finished for w in info.windows] == [4, 4, 4]
+    assert [w.out_of_sample_status for w in info.windows] == ["SUCCEEDED"] * 3
+    # 上昇し続ける相場なので、大きく持つ組み合わせが選ばれる
+    assert all(w.best_args["size"] == 3 for w in info.windows)
+    timestamps = [p.timestamp for p in info.time_returns]
+    assert timestamps == sorted(timestamps)
+    assert len(set(timestamps)) == len(timestamps)
+    assert START + timedelta(hours=2) <= timestamps[0]
+    assert timestamps[-1] < START + timedelta(hours=8)
+    assert build_report(info.time_returns) is not None
+
+
+def test_walk_forward_skips_windows_whose_in_sample_runs_all_failed(
+    backtest_injector, seed_ohlcv
+):
+    seed_ohlcv(100 + i for i in range(4 * 60))
+    injector = backtest_injector
+    session_id = injector.get(LaunchWalkForwardUsecase).execute(
+        source="binance",
+        symbol="BTC/USDT",
+        timeframe=Timeframe.ONE_MINUTE,
+        strategy_name="WalkForwardTestBroken",
+        grid={"size": [1, 2]},
+        start_at=START,
+        end_at=START + timedelta(hours=4),
+        in_sample=timedelta(hours=2),
+        out_of_sample=timedelta(hours=2),
+    )
+
+    injector.get(BacktestExecutor).run_once(workers=1)
+    info = injector.get(FetchWalkForwardUsecase).execute(session_id)
+
+    assert [w.out_of_sample_status for w in info.windows] == ["SKIPPED"]
+    assert injector.get(IWalkForwardRepository).find_unsettled() == []
+    assert injector.get(AdvanceWalkForwardUsecase).execute(session_id) == 0
+
+
+def test_fetch_walk_forward_returns_none_for_plain_sessions(backtest_injector):
+    injector = backtest_injector
+
+    assert injector.get(FetchWalkForwardUsecase).execute("missing") is None
+    assert injector.get(AdvanceWalkForwardUsecase).execute("missing") == 0
@@ -0,0 +1,41 @@
+from datetime import UTC, datetime, timedelta
+
+from blueOcean.application.usecases import FetchOhlcvUsecase, FetchWatchlistUsecase
+from blueOcean.application.workers import WatchlistSyncDaemon
+from blueOcean.domain.watchlist import WatchedSymbol
+from blueOcean.infra.database.repositories import OhlcvRepository, WatchlistRepository
+
+
+def test_sync_once_syncs_due_symbols_and_backs_off_failures(
+    tmp_path, database, fake_exchange, fake_fetcher_factory
+):
+    ohlcv = OhlcvRepository(base_path=str(tmp_path))
+    watchlist = WatchlistRepository(connection=database)
+    watchlist.save(
+        WatchedSymbol("fake", "BTC/USDT", priority=1),
+        WatchedSymbol("fake", "ETH/USDT"),
+        WatchedSymbol("other", "XRP/USDT"),
+    )
+    fake_exchange.broken = {"ETH/USDT"}
+    daemon = WatchlistSyncDaemon(
+        watchlist, FetchOhlcvUsecase(fake_fetcher_factory, ohlcv), ohlcv
+    )
+
+    started = datetime.now(UTC)
+    updated = daemon.sync_once()
+
+    by_symbol = {w.symbol: w for w in updated}
+    assert set(by_symbol) == {"BTC/USDT", "ETH/USDT", "XRP/USDT"}
+    assert by_symbol["BTC/USDT"].failures == 0
+    assert by_symbol["ETH/USDT"].failures == 1
+    assert by_symbol["ETH/USDT"].next_run_at > by_symbol["BTC/USDT"].next_run_at
+    # 次の時刻までは同期しない
+    assert watchlist.find_due(datetime.now(UTC)) == []
+    assert daemon.sync_once() == []
+
+    lags = {i.symbol: i for i in FetchWatchlistUsecase(watchlist, ohlcv).execute()}
+    btc = lags["BTC/USDT"]
+    assert btc.latest_at == fake_exchange.now - timedelta(minutes=1)
+    assert btc.lag_seconds >= (started - btc.latest_at).total_seconds()
+    assert lags["ETH/USDT"].lag_seconds is None
+    assert lags["ETH/USDT"].last_error == "fetch failed"
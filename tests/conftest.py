@@ -1,7 +1,32 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from typing import Iterable
+
+import backtrader as bt
 import pytest
+from injector import Injector
 from peewee import SqliteDatabase
 
+from blueOcean.application.accessors import IContextRuntimeDirectoryAccessor
+from blueOcean.application.factories import IOhlcvFetcherFactory
+from blueOcean.domain.context import IContextRepository
+from blueOcean.domain.ohlcv import IOhlcvRepository, Ohlcv
+from blueOcean.domain.session import ISessionRepository
+from blueOcean.domain.strategy import IStrategySnapshotRepository
+from blueOcean.domain.walkforward import IWalkForwardRepository
+from blueOcean.infra.accessors import LocalContextRuntimeDirectoryAccessor
+from blueOcean.infra.caches import BacktestResultCache
 from blueOcean.infra.database.entities import entities, proxy
+from blueOcean.infra.database.repositories import (
+    ContextRepository,
+    OhlcvRepository,
+    SessionRepository,
+    StrategySnapshotRepository,
+    WalkForwardRepository,
+)
+from blueOcean.infra.fetchers import AsyncCcxtOhlcvFetcher
+from blueOcean.infra.limiters import TokenBucket
+from blueOcean.shared.registries import StrategyRegistry
 
 
 @pytest.fixture
@@ -14,3 +39,142 @@ def database():
     finally:
         db.drop_tables(entities)
         db.close()
+
+
+class FakeExchange:
+    """ローカルで完結する ``ccxt.async_support`` 取引所の代わり
+
+    ``listed_at`` から ``now`` の直前までの 1m 足を持つ。
+    """
+
+    id = "fake"
+    name = "Fake"
+    rateLimit = 1
+    enableRateLimit = True
+    markets = None
+
+    def __init__(
+        self,
+        listed_at: datetime = datetime(2024, 1, 1, tzinfo=UTC),
+        now: datetime = datetime(2024, 1, 1, tzinfo=UTC) + timedelta(minutes=2500),
+    ):
+        self.listed_at = listed_at
+        self.now = now
+        self.broken: set[str] = set()
+        self.calls: list[tuple[str, int]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+
+    async def load_markets(self):
+        return {}
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        units = {"m": 60, "h": 3600, "d": 86400}
+        return int(timeframe[:-1]) * units[timeframe[-1]]
+
+    def milliseconds(self) -> int:
+        return int(self.now.timestamp() * 1000)
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append((symbol, since))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if symbol in self.broken:
+                raise ConnectionError("boom")
+            step = self.parse_timeframe(timeframe) * 1000
+            # 上場前の since には上場時点からの足を返す
+            since = max(since, int(self.listed_at.timestamp() * 1000))
+            since = -(-since // step) * step
+            # 取引所と同じく形成中の足も返す
+            end = min(since + limit * step, -(-self.milliseconds() // step) * step)
+            return [[t, 1.0, 2.0, 0.5, 1.5, 1.0] for t in range(since, end, step)]
+        finally:
+            self.in_flight -= 1
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeFetcherFactory(IOhlcvFetcherFactory):
+    def __init__(self, exchange: FakeExchange):
+        self.exchange = exchange
+
+    def create(self, exchange_name):
+        raise NotImplementedError()
+
+    def create_async(self, exchange_name):
+        return AsyncCcxtOhlcvFetcher(self.exchange, TokenBucket(rate=1000, capacity=10))
+
+
+@pytest.fixture
+def fake_exchange():
+    return FakeExchange()
+
+
+@pytest.fixture
+def fake_fetcher_factory(fake_exchange):
+    return FakeFetcherFactory(fake_exchange)
+
+
+@StrategyRegistry.register("TestHold")
+class HoldStrategy(bt.Strategy):
+    """``size`` だけ買い、``hold`` 本ごとに手仕舞う"""
+
+    params = (("size", 1), ("hold", 10))
+
+    def next(self):
+        if not self.position:
+            self.buy(size=self.p.size)
+        elif len(self) % self.p.hold == 0:
+            self.close()
+
+
+@pytest.fixture
+def backtest_data_dir(tmp_path, monkeypatch):
+    # 実行器は結果を ./out に書くので、テストごとの一時ディレクトリで動かす
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "data"
+
+
+@pytest.fixture
+def seed_ohlcv(backtest_data_dir):
+    """binance BTC/USDT の 1m 足を 2024-01-01 (UTC) から終値の順に保存する"""
+
+    def seed(closes: Iterable[float]):
+        start = datetime(2024, 1, 1, tzinfo=UTC)
+        OhlcvRepository(base_path=str(backtest_data_dir)).save(
+            [
+                Ohlcv(start + timedelta(minutes=i), c, c + 1, c - 1, c, 1)
+                for i, c in enumerate(closes)
+            ],
+            "binance",
+            "BTC/USDT",
+        )
+
+    return seed
+
+
+@pytest.fixture
+def backtest_injector(database, backtest_data_dir) -> Injector:
+    def configure(binder):
+        binder.bind(
+            IOhlcvRepository, to=OhlcvRepository(base_path=str(backtest_data_dir))
+        )
+        binder.bind(ISessionRepository, to=SessionRepository(database))
+        binder.bind(IContextRepository, to=ContextRepository(database))
+        binder.bind(
+            IStrategySnapshotRepository, to=StrategySnapshotRepository(database)
+        )
+        binder.bind(IWalkForwardRepository, to=WalkForwardRepository(database))
+        binder.bind(
+            IContextRuntimeDirectoryAccessor, to=LocalContextRuntimeDirectoryAccessor
+        )
+        binder.bind(
+            BacktestResultCache,
+            to=BacktestResultCache(backtest_data_dir.parent / "cache"),
+        )
+
+    return Injector([configure])
@@ -0,0 +1,39 @@
+import pytest
+
+from blueOcean.domain.strategy import expand_grid
+
+DEFAULTS = [("fast", 5), ("slow", 20), ("ratio", 0.5), ("short", False)]
+
+
+def test_expand_grid_crosses_candidates_and_keeps_defaults():
+    grid = expand_grid(DEFAULTS, {"fast": [5, 10], "ratio": [0.1, 0.2]})
+
+    assert grid == [
+        {"fast": 5, "slow": 20, "ratio": 0.1, "short": False},
+        {"fast": 5, "slow": 20, "ratio": 0.2, "short": False},
+        {"fast": 10, "slow": 20, "ratio": 0.1, "short": False},
+        {"fast": 10, "slow": 20, "ratio": 0.2, "short": False},
+    ]
+
+
+def test_expand_grid_prunes_values_that_coerce_to_the_same_argument():
+    grid = expand_grid(
+        DEFAULTS, {"fast": ["5", 5.0, 5], "short": ["true", "on", False]}
+    )
+
+    assert grid == [
+        {"fast": 5, "slow": 20, "ratio": 0.5, "short": True},
+        {"fast": 5, "slow": 20, "ratio": 0.5, "short": False},
+    ]
+
+
+def test_expand_grid_rejects_unknown_or_mistyped_parameters():
+    with pytest.raises(ValueError):
+        expand_grid(DEFAULTS, {"missing": [1]})
+    with pytest.raises(ValueError):
+        expand_grid(DEFAULTS, {"fast": [1.5]})
+
+
+def test_expand_grid_rejects_parameters_without_candidates():
+    with pytest.raises(ValueError):
+        expand_grid(DEFAULTS, {"fast": []})
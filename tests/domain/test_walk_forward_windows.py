@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from blueOcean.domain.walkforward import split_windows
+
+START = datetime(2024, 1, 1)
+DAY = timedelta(days=1)
+
+
+def _ranges(windows):
+    return [
+        (
+            (w.in_sample_start_at - START).days,
+            (w.in_sample_end_at - START).days,
+            (w.out_of_sample_end_at - START).days,
+        )
+        for w in windows
+    ]
+
+
+def test_split_windows_rolls_in_sample_and_truncates_last_out_of_sample():
+    windows = split_windows(START, START + 10 * DAY, 4 * DAY, 2 * DAY)
+
+    assert [w.index for w in windows] == [0, 1, 2]
+    assert _ranges(windows) == [(0, 4, 6), (2, 6, 8), (4, 8, 10)]
+    assert all(w.in_sample_end_at == w.out_of_sample_start_at for w in windows)
+
+    truncated = split_windows(START, START + 9 * DAY, 4 * DAY, 2 * DAY)
+    assert _ranges(truncated)[-1] == (4, 8, 9)
+
+
+def test_split_windows_anchored_grows_in_sample_from_start():
+    windows = split_windows(START, START + 10 * DAY, 4 * DAY, 3 * DAY, anchored=True)
+
+    assert _ranges(windows) == [(0, 4, 7), (0, 7, 10)]
+
+
+@pytest.mark.parametrize(
+    "end_days, in_sample, out_of_sample",
+    [(10, 0, 2), (10, 4, -1), (4, 4, 2)],
+)
+def test_split_windows_rejects_empty_or_invalid_windows(
+    end_days, in_sample, out_of_sample
+):
+    with pytest.raises(ValueError):
+        split_windows(
+            START, START + end_days * DAY, in_sample * DAY, out_of_sample * DAY
+        )
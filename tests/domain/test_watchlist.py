@@ -0,0 +1,42 @@
+from datetime import UTC, datetime, timedelta
+
+from blueOcean.domain.watchlist import WatchedSymbol
+
+NOW = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+def test_succeeded_schedules_next_run_with_jitter():
+    watched = WatchedSymbol("binance", "BTC/USDT", interval=timedelta(minutes=10))
+
+    runs = {watched.succeeded(NOW).next_run_at for _ in range(20)}
+
+    assert len(runs) > 1
+    assert all(
+        NOW + timedelta(minutes=9) <= run <= NOW + timedelta(minutes=11) for run in runs
+    )
+
+
+def test_failed_backs_off_exponentially_up_to_max():
+    watched = WatchedSymbol("binance", "BTC/USDT", interval=timedelta(minutes=10))
+
+    delays = []
+    for _ in range(8):
+        watched = watched.failed(NOW, "boom")
+        delays.append(watched.next_run_at - NOW)
+
+    assert watched.failures == 8
+    assert timedelta(minutes=20) <= delays[0] <= timedelta(minutes=22)
+    assert timedelta(minutes=40) <= delays[1] <= timedelta(minutes=44)
+    assert all(d <= WatchedSymbol.MAX_BACKOFF * 1.1 for d in delays)
+    assert watched.succeeded(NOW).failures == 0
+
+
+def test_failed_keeps_backing_off_after_many_failures():
+    watched = WatchedSymbol("binance", "BTC/USDT", interval=timedelta(minutes=5))
+
+    for _ in range(200):
+        watched = watched.failed(NOW, "delisted")
+
+    assert watched.failures == 200
+    assert WatchedSymbol.MAX_BACKOFF <= watched.next_run_at - NOW
+    assert watched.next_run_at - NOW <= WatchedSymbol.MAX_BACKOFF * 1.1
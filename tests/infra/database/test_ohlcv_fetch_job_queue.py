@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from blueOcean.domain.job import JobStatus
+from blueOcean.infra.database.entities import OhlcvFetchJobEntity
+from blueOcean.infra.database.repositories import OhlcvFetchJobQueue
+
+
+def test_enqueue_returns_active_job_for_same_symbol(database):
+    queue = OhlcvFetchJobQueue(connection=database)
+
+    first = queue.enqueue("binance", "BTC/USDT")
+    second = queue.enqueue("binance", "BTC/USDT")
+    other = queue.enqueue("binance", "ETH/USDT")
+
+    assert second.id == first.id
+    assert other.id != first.id
+
+    claimed = queue.claim("w1", default_cap=2)
+    assert claimed.id == first.id
+    assert queue.enqueue("binance", "BTC/USDT").id == first.id
+
+    queue.complete(first.id)
+    again = queue.enqueue("binance", "BTC/USDT")
+    assert again.id != first.id
+    assert queue.find_by_id(first.id).status == JobStatus.SUCCEEDED
+
+
+def test_claim_respects_per_exchange_caps(database):
+    queue = OhlcvFetchJobQueue(connection=database)
+    for symbol in ("A/USDT", "B/USDT", "C/USDT"):
+        queue.enqueue("binance", symbol)
+    queue.enqueue("bybit", "A/USDT")
+
+    claimed = [queue.claim("w", caps={"binance": 2}) for _ in range(4)]
+
+    assert [(j.exchange, j.symbol) for j in claimed[:3]] == [
+        ("binance", "A/USDT"),
+        ("binance", "B/USDT"),
+        ("bybit", "A/USDT"),
+    ]
+    assert claimed[3] is None
+
+    queue.fail(claimed[0].id, "boom")
+    job = queue.claim("w", caps={"binance": 2})
+    assert (job.exchange, job.symbol) == ("binance", "C/USDT")
+    assert queue.find_by_id(claimed[0].id).error == "boom"
+
+
+def test_claim_requeues_jobs_from_lost_workers(database):
+    queue = OhlcvFetchJobQueue(connection=database)
+    job = queue.enqueue("binance", "BTC/USDT")
+    queue.claim("w1")
+    OhlcvFetchJobEntity.update(
+        heartbeat_at=datetime.now() - queue.STALE_AFTER - timedelta(seconds=1)
+    ).execute()
+
+    reclaimed = queue.claim("w2")
+
+    assert reclaimed.id == job.id
+    assert reclaimed.worker == "w2"
+    assert reclaimed.attempts == 2
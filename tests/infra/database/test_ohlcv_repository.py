@@ -0,0 +1,368 @@
+import shutil
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from blueOcean.domain.ohlcv import Ohlcv, Timeframe
+from blueOcean.infra.caches import OhlcvQueryCache
+from blueOcean.infra.database.repositories import OhlcvRepository
+
+
+def _candles(start: datetime, count: int, price: float = 1.0) -> list[Ohlcv]:
+    return [
+        Ohlcv(
+            time=start + timedelta(minutes=i),
+            open=price + i,
+            high=price + i + 0.5,
+            low=price + i - 0.5,
+            close=price + i + 0.25,
+            volume=1.0,
+        )
+        for i in range(count)
+    ]
+
+
+def test_save_appends_fragments_without_rewriting(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+
+    repo.save(_candles(start, 10), "binance", "BTC/USDT")
+    first = sorted(Path(tmp_path, "binance", "BTC_USDT", "2024-01").iterdir())
+    repo.save(_candles(start + timedelta(minutes=10), 10), "binance", "BTC/USDT")
+    second = sorted(Path(tmp_path, "binance", "BTC_USDT", "2024-01").iterdir())
+
+    assert len(first) == 1
+    assert len(second) == 2
+    assert first[0] in second
+    assert len(repo.find("BTC/USDT", "binance")) == 20
+
+
+def test_find_deduplicates_with_latest_fragment(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+
+    repo.save(_candles(start, 5, price=1.0), "binance", "BTC/USDT")
+    repo.save(
+        _candles(start + timedelta(minutes=3), 5, price=100.0), "binance", "BTC/USDT"
+    )
+
+    ohlcvs = repo.find("BTC/USDT", "binance")
+    assert len(ohlcvs) == 8
+    assert ohlcvs[3].open == 100.0
+    assert ohlcvs[2].open == 3.0
+
+
+def test_find_aggregates_across_month_boundary(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 31, 23, 55, tzinfo=UTC)
+
+    repo.save(_candles(start, 10), "binance", "BTC/USDT")
+
+    latest = repo.get_latest_timestamp("binance", "BTC/USDT")
+    bars = repo.find("BTC/USDT", "binance", Timeframe.FIVE_MINUTE)
+
+    assert latest == start + timedelta(minutes=9)
+    assert [b.open for b in bars] == [1.0, 6.0]
+    assert [b.close for b in bars] == [5.25, 10.25]
+    symbol_dir = Path(tmp_path, "binance", "BTC_USDT")
+    assert sorted(p.name for p in symbol_dir.iterdir() if p.is_dir()) == [
+        "2024-01",
+        "2024-02",
+        "_rollups",
+    ]
+
+
+def test_find_reads_coarsest_rollup_with_same_result(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    for day in range(3):
+        repo.save(_candles(start + timedelta(days=day), 24 * 60), "binance", "BTC/USDT")
+
+    aligned = repo._resolve_rollup(
+        "binance",
+        "BTC/USDT",
+        Timeframe.ONE_DAY,
+        start,
+        start + timedelta(days=2) - timedelta(microseconds=1),
+    )
+    unaligned = repo._resolve_rollup(
+        "binance", "BTC/USDT", Timeframe.ONE_DAY, start + timedelta(minutes=1), None
+    )
+    hourly = repo._resolve_rollup(
+        "binance", "BTC/USDT", Timeframe.FOUR_HOUR, None, None
+    )
+
+    assert aligned.directory.name == "1440m"
+    assert unaligned is None
+    assert hourly.directory.name == "240m"
+
+    bars = repo.find("BTC/USDT", "binance", Timeframe.ONE_DAY)
+    assert [b.open for b in bars] == [1.0, 1.0, 1.0]
+    assert [b.close for b in bars] == [1440.25] * 3
+    assert [b.volume for b in bars] == [1440.0] * 3
+
+
+def test_rollups_follow_incremental_saves(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+
+    repo.save(_candles(start, 30), "binance", "BTC/USDT")
+    repo.save(
+        _candles(start + timedelta(minutes=30), 30, price=31.0), "binance", "BTC/USDT"
+    )
+
+    [bar] = repo.find("BTC/USDT", "binance", Timeframe.ONE_HOUR)
+    assert bar.open == 1.0
+    assert bar.close == 60.25
+    assert bar.high == 60.5
+    assert bar.volume == 60.0
+
+
+def test_rollups_are_refreshed_on_read_instead_of_on_save(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    rollups = Path(tmp_path, "binance", "BTC_USDT", "_rollups")
+
+    repo.save(_candles(start, 60), "binance", "BTC/USDT")
+    repo.save(
+        _candles(start + timedelta(minutes=60), 60, price=61.0), "binance", "BTC/USDT"
+    )
+
+    assert not Path(rollups, "60m").exists()
+    bars = repo.find("BTC/USDT", "binance", Timeframe.ONE_HOUR)
+    assert [b.open for b in bars] == [1.0, 61.0]
+    assert Path(rollups, "60m").exists()
+
+    repo.save(
+        _candles(start + timedelta(minutes=120), 60, price=121.0), "binance", "BTC/USDT"
+    )
+    repo.compact("binance", "BTC/USDT")
+
+    assert (
+        len(repo._rollup_store("binance", "BTC/USDT", Timeframe.ONE_HOUR).files()) == 1
+    )
+    bars = repo.find("BTC/USDT", "binance", Timeframe.ONE_HOUR)
+    assert [b.open for b in bars] == [1.0, 61.0, 121.0]
+
+
+def test_rollups_are_materialized_for_existing_history(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    repo.save(_candles(start, 120), "binance", "BTC/USDT")
+    shutil.rmtree(Path(tmp_path, "binance", "BTC_USDT", "_rollups"))
+
+    repo.save(
+        _candles(start + timedelta(minutes=120), 60, price=121.0), "binance", "BTC/USDT"
+    )
+
+    bars = repo.find("BTC/USDT", "binance", Timeframe.ONE_HOUR)
+    assert [b.open for b in bars] == [1.0, 61.0, 121.0]
+
+
+def test_published_partial_bars_are_merged_until_saved(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path), cache=OhlcvQueryCache())
+    reader = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    repo.save(_candles(start, 30), "binance", "BTC/USDT")
+    before = repo.fingerprint("BTC/USDT", "binance", Timeframe.ONE_HOUR)
+
+    partial = _candles(start + timedelta(minutes=30), 2, price=31.0)
+    repo.publish_partial(Ohlcv.to_arrow(partial), "binance", "BTC/USDT")
+
+    assert repo.fingerprint("BTC/USDT", "binance", Timeframe.ONE_HOUR) != before
+    assert len(reader.find("BTC/USDT", "binance")) == 32
+    [bar] = repo.find("BTC/USDT", "binance", Timeframe.ONE_HOUR)
+    assert bar.open == 1.0
+    assert bar.close == 32.25
+    assert bar.volume == 32.0
+    batches = list(reader.iter_batches("BTC/USDT", "binance", batch_size=100))
+    assert sum(b.num_rows for b in batches) == 32
+
+    # 保存し終えた足は二重に数えない
+    repo.save(partial[:1], "binance", "BTC/USDT")
+    [bar] = reader.find("BTC/USDT", "binance", Timeframe.ONE_HOUR)
+    assert bar.volume == 32.0
+
+    repo.publish_partial(Ohlcv.to_arrow([]), "binance", "BTC/USDT")
+    assert len(reader.find("BTC/USDT", "binance")) == 31
+
+
+def test_find_columns_returns_contiguous_arrays(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    repo.save(_candles(start, 10), "binance", "BTC/USDT")
+
+    table = repo.find_table("BTC/USDT", "binance", Timeframe.FIVE_MINUTE)
+    columns = repo.find_columns("BTC/USDT", "binance", Timeframe.FIVE_MINUTE)
+
+    assert table.column_names == OhlcvRepository.COLUMNS
+    assert len(columns) == 2
+    assert columns.open.dtype == np.float64
+    assert columns.close.flags["C_CONTIGUOUS"]
+    assert columns.time[1] == np.datetime64("2024-01-01T00:05:00")
+    assert columns.to_dataframe()["volume"].tolist() == [5.0, 5.0]
+
+
+def test_find_table_is_empty_for_unknown_symbol(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+
+    assert repo.find_table("ETH/USDT", "binance").num_rows == 0
+    assert repo.find("ETH/USDT", "binance") == []
+
+
+def test_iter_batches_streams_fixed_size_batches_in_order(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 31, 23, 0, tzinfo=UTC)
+    repo.save(_candles(start, 150), "binance", "BTC/USDT")
+
+    batches = list(repo.iter_batches("BTC/USDT", "binance", batch_size=40))
+
+    assert [b.num_rows for b in batches] == [40, 40, 40, 30]
+    streamed = pa.Table.from_batches(batches)
+    assert streamed.equals(repo.find_table("BTC/USDT", "binance"))
+
+
+def test_find_table_is_cached_until_save_touches_the_range(tmp_path):
+    cache = OhlcvQueryCache()
+    repo = OhlcvRepository(base_path=str(tmp_path), cache=cache)
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    repo.save(_candles(start, 10), "binance", "BTC/USDT")
+
+    first = repo.find_table("BTC/USDT", "binance")
+    second = repo.find_table("BTC/USDT", "binance")
+    repo.save(_candles(start + timedelta(minutes=10), 5), "binance", "BTC/USDT")
+    third = repo.find_table("BTC/USDT", "binance")
+
+    assert second is first
+    assert third.num_rows == 15
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.invalidations) == (1, 2, 1)
+
+
+def test_fingerprint_changes_only_when_the_range_changes(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    end = start + timedelta(hours=1)
+    repo.save(_candles(start, 10), "binance", "BTC/USDT")
+
+    before = repo.fingerprint("BTC/USDT", "binance", Timeframe.ONE_MINUTE, start, end)
+    repo.save(_candles(datetime(2024, 3, 1, tzinfo=UTC), 5), "binance", "BTC/USDT")
+    elsewhere = repo.fingerprint(
+        "BTC/USDT", "binance", Timeframe.ONE_MINUTE, start, end
+    )
+    repo.save(_candles(start + timedelta(minutes=10), 5), "binance", "BTC/USDT")
+    touched = repo.fingerprint("BTC/USDT", "binance", Timeframe.ONE_MINUTE, start, end)
+
+    assert elsewhere == before
+    assert touched != before
+
+
+def test_coverage_and_completeness_track_holes(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    repo.save(_candles(start, 10), "binance", "BTC/USDT")
+    repo.save(_candles(start + timedelta(minutes=20), 10), "binance", "BTC/USDT")
+    minutes = lambda n: start + timedelta(minutes=n)
+
+    repo.mark_unavailable("binance", "BTC/USDT", minutes(10), minutes(15))
+    completeness = repo.get_completeness("binance", "BTC/USDT")
+
+    assert repo.get_coverage("binance", "BTC/USDT") == [
+        (minutes(0), minutes(10)),
+        (minutes(20), minutes(30)),
+    ]
+    assert repo.find_gaps("binance", "BTC/USDT", minutes(-5), minutes(40)) == [
+        (minutes(-5), minutes(0)),
+        (minutes(15), minutes(20)),
+        (minutes(30), minutes(40)),
+    ]
+    assert (completeness.first_at, completeness.last_at) == (minutes(0), minutes(29))
+    assert (completeness.expected, completeness.present) == (30, 20)
+    assert (completeness.unavailable, completeness.missing) == (5, 5)
+    assert completeness.gaps == [(minutes(15), minutes(20))]
+
+
+def test_coverage_is_rebuilt_for_existing_history(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    repo.save(_candles(start, 10), "binance", "BTC/USDT")
+    Path(repo._store("binance", "BTC/USDT").directory, "_coverage.json").unlink()
+
+    repo.save(_candles(start + timedelta(minutes=15), 5), "binance", "BTC/USDT")
+
+    assert repo.get_coverage("binance", "BTC/USDT") == [
+        (start, start + timedelta(minutes=10)),
+        (start + timedelta(minutes=15), start + timedelta(minutes=20)),
+    ]
+
+
+def test_save_batch_sorts_and_keeps_last_duplicate(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    times = [start + timedelta(minutes=m) for m in (2, 0, 1, 0)]
+    batch = pa.RecordBatch.from_arrays(
+        [pa.array(times, pa.timestamp("us", tz="UTC"))]
+        + [pa.array([1.0, 2.0, 3.0, 4.0])] * 5,
+        names=["time", "open", "high", "low", "close", "volume"],
+    )
+
+    repo.save_batch(batch, "binance", "BTC/USDT")
+
+    table = repo.find_table("BTC/USDT", "binance")
+    assert table.column("time").to_pylist() == sorted(set(times))
+    assert table.column("close").to_pylist() == [4.0, 3.0, 1.0]
+
+
+def test_native_series_serves_coarse_queries_without_minutes(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    days = [
+        Ohlcv(start + timedelta(days=i), 10.0 + i, 20.0, 5.0, 11.0 + i, 100.0)
+        for i in range(30)
+    ]
+    repo.save_batch(Ohlcv.to_arrow(days), "binance", "BTC/USDT", Timeframe.ONE_DAY)
+
+    daily = repo.find_table("BTC/USDT", "binance", Timeframe.ONE_DAY)
+    weekly_range = repo.find_table(
+        "BTC/USDT",
+        "binance",
+        Timeframe.ONE_DAY,
+        start + timedelta(days=7),
+        start + timedelta(days=14) - timedelta(minutes=1),
+    )
+
+    assert daily.num_rows == 30
+    assert daily.column("open").to_pylist()[:2] == [10.0, 11.0]
+    assert weekly_range.num_rows == 7
+    # 1m のシリーズとは別に保存する
+    assert repo.get_latest_timestamp("binance", "BTC/USDT") is None
+    assert repo.get_latest_timestamp(
+        "binance", "BTC/USDT", Timeframe.ONE_DAY
+    ) == start + timedelta(days=29)
+    assert repo.find_gaps(
+        "binance", "BTC/USDT", start, start + timedelta(days=31), Timeframe.ONE_DAY
+    ) == [(start + timedelta(days=30), start + timedelta(days=31))]
+
+
+def test_coarse_queries_prefer_minutes_when_they_cover_the_range(tmp_path):
+    repo = OhlcvRepository(base_path=str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    days = [
+        Ohlcv(start + timedelta(days=i), 99.0, 99.0, 99.0, 99.0, 1.0) for i in range(3)
+    ]
+    repo.save_batch(Ohlcv.to_arrow(days), "binance", "BTC/USDT", Timeframe.ONE_DAY)
+    repo.save(_candles(start + timedelta(days=1), 1440), "binance", "BTC/USDT")
+
+    covered = repo.find_table(
+        "BTC/USDT",
+        "binance",
+        Timeframe.ONE_DAY,
+        start + timedelta(days=1),
+        start + timedelta(days=2) - timedelta(minutes=1),
+    )
+    uncovered = repo.find_table("BTC/USDT", "binance", Timeframe.ONE_DAY)
+
+    assert covered.column("open").to_pylist() == [1.0]
+    assert uncovered.column("open").to_pylist() == [99.0, 99.0, 99.0]
@@ -1,17 +1,26 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
+import peewee
 import pytest
 
-from blueOcean.domain.context import Context, ContextId
+from blueOcean.domain.context import Context, ContextId, ContextStatus
 from blueOcean.domain.ohlcv import Timeframe
 from blueOcean.domain.session import Session, SessionId
 from blueOcean.domain.strategy import StrategySnapshot, StrategySnapshotId
-from blueOcean.infra.database.entities import SessionContextEntity
+from blueOcean.domain.walkforward import WalkForward, split_windows
+from blueOcean.infra.database.entities import (
+    ContextClaimEntity,
+    ContextEntity,
+    SessionContextEntity,
+)
 from blueOcean.infra.database.repositories import (
     ContextRepository,
     SessionRepository,
     StrategySnapshotRepository,
+    WalkForwardRepository,
 )
+
+
 def test_strategy_snapshot_repository_roundtrip(database):
     repo = StrategySnapshotRepository(connection=database)
     snapshot = StrategySnapshot(id=StrategySnapshotId("snap-1"), name="S1")
@@ -84,3 +93,87 @@ def test_session_repository_roundtrip(database):
 
     assert fetched.id.value == "sess-2"
     assert fetched.name == "s2"
+
+
+def test_walk_forward_assigns_out_of_sample_with_its_context_atomically(database):
+    SessionRepository(connection=database).save(Session(id=SessionId("sess-3")))
+    StrategySnapshotRepository(connection=database).save(
+        StrategySnapshot(id=StrategySnapshotId("snap-1"), name="S1")
+    )
+    context_repo = ContextRepository(connection=database)
+    repo = WalkForwardRepository(connection=database)
+    session_id = SessionId("sess-3")
+    start = datetime(2024, 1, 1)
+    windows = split_windows(
+        start, start + timedelta(days=3), timedelta(days=1), timedelta(days=1)
+    )
+    repo.save(WalkForward(session_id=session_id, windows=windows))
+
+    def context(id: str) -> Context:
+        return Context(
+            id=ContextId(id),
+            strategy_snapshot_id=StrategySnapshotId("snap-1"),
+            source="binance",
+            symbol="BTC/USDT",
+            start_at=start,
+            end_at=start + timedelta(days=1),
+        )
+
+    context_repo.save(context("ctx-1"))
+    # 保存に失敗したら紐づけも残さない
+    with pytest.raises(peewee.IntegrityError):
+        repo.assign_out_of_sample(session_id, 0, context("ctx-1"))
+    assert (
+        repo.find_by_session_id(session_id).windows[0].out_of_sample_context_id is None
+    )
+
+    assert repo.assign_out_of_sample(session_id, 0, context("ctx-2"))
+    assert not repo.assign_out_of_sample(session_id, 0, context("ctx-3"))
+    assert repo.skip(session_id, 1)
+    assert not repo.skip(session_id, 1)
+
+    assert [c.id.value for c in context_repo.find_by_session_id(session_id)] == [
+        "ctx-2"
+    ]
+    assert [w.settled for w in repo.find_by_session_id(session_id).windows] == [
+        True,
+        True,
+    ]
+    assert repo.find_unsettled() == []
+
+
+def test_context_claim_requeues_contexts_of_lost_executors(database):
+    StrategySnapshotRepository(connection=database).save(
+        StrategySnapshot(id=StrategySnapshotId("snap-1"), name="S1")
+    )
+    repo = ContextRepository(connection=database)
+    lost = repo.save(
+        Context(
+            id=ContextId("ctx-1"), strategy_snapshot_id=StrategySnapshotId("snap-1")
+        )
+    )
+    # 取った記録を残す前から実行中のままのもの
+    legacy = repo.save(
+        Context(
+            id=ContextId("ctx-2"),
+            strategy_snapshot_id=StrategySnapshotId("snap-1"),
+            status=ContextStatus.RUNNING,
+        )
+    )
+
+    assert [c.id for c in repo.claim(1, "e1")] == [lost.id]
+    # ハートビートが続いている間は取り直さない
+    repo.heartbeat("e1")
+    assert [c.id for c in repo.claim(executor="e2")] == [legacy.id]
+
+    for _ in range(repo.MAX_ATTEMPTS - 1):
+        ContextClaimEntity.update(
+            heartbeat_at=datetime.now() - repo.STALE_AFTER - timedelta(seconds=1)
+        ).where(ContextClaimEntity.context == lost.id.value).execute()
+        assert [c.id for c in repo.claim(1, "e2")] == [lost.id]
+    assert ContextClaimEntity.get_by_id(lost.id.value).executor == "e2"
+
+    # 上限まで取り直しても終わらなければ失敗にする
+    assert repo.release(lost.id) == ContextStatus.FAILED
+    assert repo.release(legacy.id) == ContextStatus.PENDING
+    assert ContextEntity.get_by_id(lost.id.value).status == ContextStatus.FAILED
@@ -0,0 +1,38 @@
+from datetime import UTC, datetime, timedelta
+
+from blueOcean.domain.watchlist import WatchedSymbol
+from blueOcean.infra.database.repositories import WatchlistRepository
+
+NOW = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+def test_find_due_orders_by_priority_then_schedule(database):
+    repo = WatchlistRepository(connection=database)
+    repo.save(
+        WatchedSymbol("binance", "LOW/USDT", priority=0),
+        WatchedSymbol("binance", "HIGH/USDT", priority=5, next_run_at=NOW),
+        WatchedSymbol(
+            "bybit", "LATER/USDT", priority=9, next_run_at=NOW + timedelta(minutes=1)
+        ),
+        WatchedSymbol(
+            "bybit", "EARLY/USDT", priority=5, next_run_at=NOW - timedelta(minutes=1)
+        ),
+    )
+
+    due = repo.find_due(NOW)
+
+    assert [w.symbol for w in due] == ["EARLY/USDT", "HIGH/USDT", "LOW/USDT"]
+    assert due[0].next_run_at == NOW - timedelta(minutes=1)
+
+
+def test_save_updates_existing_symbol(database):
+    repo = WatchlistRepository(connection=database)
+    watched = WatchedSymbol("binance", "BTC/USDT", interval=timedelta(minutes=1))
+    repo.save(watched)
+
+    repo.save(watched.failed(NOW, "boom"))
+
+    (stored,) = repo.find_all()
+    assert stored.failures == 1
+    assert stored.last_error == "boom"
+    assert stored.interval == timedelta(minutes=1)
@@ -0,0 +1,143 @@
+import time
+from datetime import UTC, datetime
+
+import pyarrow as pa
+
+from blueOcean.infra.caches import (
+    BacktestResultCache,
+    ExchangeMarketCache,
+    OhlcvQueryCache,
+)
+
+
+def _table(rows: int) -> pa.Table:
+    return pa.table({"close": pa.array([1.0] * rows, pa.float64())})
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = OhlcvQueryCache(max_bytes=_table(100).nbytes * 2)
+    cache.put("binance", "BTC/USDT", 1, None, None, "a", _table(100))
+    cache.put("binance", "ETH/USDT", 1, None, None, "b", _table(100))
+    assert cache.get("binance", "BTC/USDT", 1, None, None, "a") is not None
+
+    cache.put("binance", "XRP/USDT", 1, None, None, "c", _table(100))
+
+    assert cache.get("binance", "ETH/USDT", 1, None, None, "b") is None
+    assert cache.get("binance", "BTC/USDT", 1, None, None, "a") is not None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (2, 1, 1, 2)
+
+
+def test_invalidate_only_drops_overlapping_ranges():
+    cache = OhlcvQueryCache()
+    jan = (datetime(2024, 1, 1, tzinfo=UTC), datetime(2024, 1, 31, tzinfo=UTC))
+    mar = (datetime(2024, 3, 1, tzinfo=UTC), datetime(2024, 3, 31, tzinfo=UTC))
+    cache.put("binance", "BTC/USDT", 1, *jan, "jan", _table(1))
+    cache.put("binance", "BTC/USDT", 1, *mar, "mar", _table(1))
+    cache.put("binance", "BTC/USDT", 1, None, None, "all", _table(1))
+
+    cache.invalidate(
+        "binance",
+        "BTC/USDT",
+        datetime(2024, 3, 1, tzinfo=UTC),
+        datetime(2024, 4, 1, tzinfo=UTC),
+    )
+
+    assert cache.get("binance", "BTC/USDT", 1, *jan, "jan") is not None
+    assert cache.get("binance", "BTC/USDT", 1, *mar, "mar") is None
+    assert cache.get("binance", "BTC/USDT", 1, None, None, "all") is None
+    assert cache.stats().invalidations == 2
+
+
+def test_disk_tier_survives_restart_and_checks_fingerprint(tmp_path):
+    OhlcvQueryCache(disk_dir=tmp_path).put(
+        "binance", "BTC/USDT", 1, None, None, "abc", _table(3)
+    )
+
+    restarted = OhlcvQueryCache(disk_dir=tmp_path)
+
+    assert restarted.get("binance", "BTC/USDT", 1, None, None, "other") is None
+    table = restarted.get("binance", "BTC/USDT", 1, None, None, "abc")
+    assert table.equals(_table(3))
+    assert restarted.stats().disk_hits == 1
+
+
+def test_backtest_result_cache_restores_finished_runs_and_prunes_old_entries(
+    tmp_path,
+):
+    cache = BacktestResultCache(tmp_path / "cache", max_disk_bytes=25)
+    for name in ("unfinished", "old", "new"):
+        run_dir = tmp_path / name
+        run_dir.mkdir()
+        (run_dir / "metrics.csv").write_text("x" * 10)
+        if name != "unfinished":
+            (run_dir / "summary.json").write_text(f'"{name}"')
+        cache.store(name, run_dir)
+        time.sleep(0.01)
+
+    restored = tmp_path / "restored"
+    restored.mkdir()
+
+    assert not cache.restore("unfinished", restored)
+    # 2 件で上限を超えたので、古い方が消える
+    assert not cache.restore("old", restored)
+    assert cache.restore("new", restored)
+    assert (restored / "summary.json").read_text() == '"new"'
+    assert (restored / "metrics.csv").read_text() == "x" * 10
+
+
+class _FakeExchange:
+    loads = 0
+
+    def __init__(self):
+        self.markets = None
+        self.currencies = None
+
+    def load_markets(self, reload=False):
+        _FakeExchange.loads += 1
+        self.markets = {"BTC/USDT": {"id": "BTCUSDT", "info": {"raw": "..."}}}
+        self.currencies = {"BTC": {"id": "BTC", "info": {}}}
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+        self.currencies = currencies
+
+
+def _market_cache(**kwargs) -> ExchangeMarketCache:
+    _FakeExchange.loads = 0
+    return ExchangeMarketCache(exchange_factory=lambda name: _FakeExchange(), **kwargs)
+
+
+def test_market_cache_loads_each_exchange_once(tmp_path):
+    cache = _market_cache(disk_dir=tmp_path)
+
+    assert cache.symbols("fake") == ["BTC/USDT"]
+    exchange = cache.exchange("fake")
+
+    # スレッドごとに使えるよう毎回別のインスタンスを返す
+    assert cache.exchange("fake") is not exchange
+    assert exchange.markets["BTC/USDT"]["info"] == {"raw": "..."}
+    assert _FakeExchange.loads == 1
+    # 起動し直しても一覧はディスクから読める
+    restarted = _market_cache(disk_dir=tmp_path)
+    assert restarted.symbols("fake") == ["BTC/USDT"]
+    assert _FakeExchange.loads == 0
+    # ディスクの markets (info は空) で待たずにインスタンスを作り、info はバックグラウンドで読み直す
+    assert restarted.exchange("fake").markets["BTC/USDT"]["id"] == "BTCUSDT"
+    deadline = time.monotonic() + 5
+    while not restarted.exchange("fake").markets["BTC/USDT"]["info"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert _FakeExchange.loads == 1
+
+
+def test_market_cache_refreshes_expired_markets_in_background():
+    cache = _market_cache(ttl_seconds=0)
+    cache.symbols("fake")
+
+    assert cache.symbols("fake") == ["BTC/USDT"]
+    deadline = time.monotonic() + 5
+    while _FakeExchange.loads < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _FakeExchange.loads >= 2
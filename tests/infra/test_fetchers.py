@@ -0,0 +1,25 @@
+import math
+from datetime import UTC, datetime
+
+from blueOcean.domain.ohlcv import OhlcvColumns
+from blueOcean.infra.fetchers import to_record_batch
+
+
+def test_to_record_batch_converts_ccxt_rows_to_typed_columns():
+    start = int(datetime(2024, 1, 1, tzinfo=UTC).timestamp() * 1000)
+    rows = [
+        [start, 1.0, 2.0, 0.5, 1.5, 10],
+        [start + 60_000, 1.5, 2.5, 1.0, 2.0, None],
+        [start + 120_000, 2.0, 3.0, 1.5, 2.5, 30.0],
+    ]
+
+    batch = to_record_batch(rows, until=start + 120_000)
+
+    assert batch.schema == OhlcvColumns.SCHEMA
+    assert batch.column("time").to_pylist() == [
+        datetime(2024, 1, 1, 0, 0, tzinfo=UTC),
+        datetime(2024, 1, 1, 0, 1, tzinfo=UTC),
+    ]
+    assert batch.column("close").to_pylist() == [1.5, 2.0]
+    assert batch.column("volume")[0].as_py() == 10.0
+    assert math.isnan(batch.column("volume")[1].as_py())
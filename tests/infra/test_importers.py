@@ -0,0 +1,122 @@
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from blueOcean.infra.database.repositories import OhlcvRepository
+from blueOcean.infra.importers import LAYOUTS, OhlcvCsvImporter, read_ohlcv_csv
+
+START = datetime(2024, 1, 31, 23, 0, tzinfo=UTC)
+
+
+def _kline_lines(start: datetime, count: int, unit: int = 1000) -> list[str]:
+    first = int(start.timestamp()) * unit
+    return [
+        f"{first + i * 60 * unit},{i},{i + 1},{i - 1},{i + 0.5},2,0,0,0,0,0,0"
+        for i in range(count)
+    ]
+
+
+def test_read_ohlcv_csv_reads_zipped_klines_in_blocks(tmp_path):
+    path = tmp_path / "BTCUSDT-1m.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        header = "open_time,open,high,low,close,volume,close_time,quote_volume,count,taker_buy_volume,taker_buy_quote_volume,ignore"
+        archive.writestr("a.csv", "\n".join([header, *_kline_lines(START, 60)]))
+        # 2025 年以降の現物は us
+        later = START + timedelta(hours=1)
+        archive.writestr("b.csv", "\n".join(_kline_lines(later, 60, unit=10**6)))
+
+    batches = list(read_ohlcv_csv(path, LAYOUTS["binance-klines"], block_size=1024))
+
+    assert len(batches) > 2
+    times = [t for b in batches for t in b.column("time").to_pylist()]
+    assert times == [START + timedelta(minutes=i) for i in range(120)]
+    assert batches[0].column("close")[1].as_py() == 1.5
+
+
+def test_read_ohlcv_csv_aggregates_trades_across_blocks(tmp_path):
+    path = tmp_path / "trades.csv"
+    first = int(START.timestamp() * 1000)
+    # 1 分に 3 約定ずつ、5 分間
+    lines = [
+        f"{i},{100 + i},{1.0},{100 + i},{first + (i // 3) * 60_000 + i % 3 * 1000},true,true"
+        for i in range(15)
+    ]
+    path.write_text("\n".join(lines))
+
+    batches = list(read_ohlcv_csv(path, LAYOUTS["binance-trades"], block_size=64))
+
+    rows = [row for b in batches for row in b.to_pylist()]
+    assert [r["time"] for r in rows] == [START + timedelta(minutes=i) for i in range(5)]
+    assert rows[1] == {
+        "time": START + timedelta(minutes=1),
+        "open": 103.0,
+        "high": 105.0,
+        "low": 103.0,
+        "close": 105.0,
+        "volume": 3.0,
+    }
+
+
+def test_read_ohlcv_csv_parses_dukascopy_time(tmp_path):
+    path = tmp_path / "USDJPY.csv"
+    path.write_text(
+        "Gmt time,Open,High,Low,Close,Volume\n"
+        "31.01.2024 23:00:00.000,147.1,147.2,147.0,147.15,10.5\n"
+        "31.01.2024 23:01:00.000,147.15,147.3,147.1,147.2,8\n"
+    )
+
+    (batch,) = read_ohlcv_csv(path, LAYOUTS["dukascopy"])
+
+    assert batch.column("time").to_pylist() == [START, START + timedelta(minutes=1)]
+    assert batch.column("volume").to_pylist() == [10.5, 8.0]
+
+
+def test_importer_writes_files_in_parallel_into_month_partitions(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"part-{i}.csv"
+        path.write_text("\n".join(_kline_lines(START + timedelta(hours=i), 60)))
+        paths.append(path)
+    repo = OhlcvRepository(base_path=str(tmp_path / "data"))
+
+    imported = OhlcvCsvImporter(repo, workers=3, flush_rows=50).execute(
+        paths, "binance", "BTC/USDT", LAYOUTS["binance-klines"]
+    )
+
+    assert imported == 180
+    table = repo.find_table("BTC/USDT", "binance")
+    assert table.num_rows == 180
+    months = sorted(p.name for p in (tmp_path / "data/binance/BTC_USDT").iterdir())
+    assert [m for m in months if not m.startswith(("_", "."))] == ["2024-01", "2024-02"]
+    assert (
+        repo.find_gaps("binance", "BTC/USDT", START, START + timedelta(hours=3)) == []
+    )
+
+
+class _BrokenRepository(OhlcvRepository):
+    def save_batch(self, *args, **kwargs):
+        raise RuntimeError("disk full")
+
+
+def test_importer_raises_save_errors_without_blocking_parsers(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"part-{i}.csv"
+        path.write_text("\n".join(_kline_lines(START + timedelta(hours=i), 600)))
+        paths.append(path)
+    # 小さいブロックで解析させ、キューが詰まった状態で保存を失敗させる
+    importer = OhlcvCsvImporter(
+        _BrokenRepository(base_path=str(tmp_path / "data")),
+        workers=2,
+        flush_rows=10,
+        block_size=1 << 10,
+    )
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(
+            importer.execute, paths, "binance", "BTC/USDT", LAYOUTS["binance-klines"]
+        )
+        with pytest.raises(RuntimeError, match="disk full"):
+            future.result(timeout=30)
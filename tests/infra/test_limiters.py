@@ -0,0 +1,25 @@
+import asyncio
+import time
+
+from blueOcean.infra.limiters import TokenBucket
+
+
+def test_acquire_is_limited_across_concurrent_tasks():
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    async def run():
+        await asyncio.gather(*(bucket.acquire() for _ in range(11)))
+
+    started = time.monotonic()
+    asyncio.run(run())
+
+    assert time.monotonic() - started >= 10 / 50 * 0.9
+
+
+def test_for_exchange_shares_one_bucket_per_exchange():
+    a = TokenBucket.for_exchange("test-exchange", rate=1)
+    b = TokenBucket.for_exchange("test-exchange", rate=100)
+
+    assert a is b
+    assert a.try_acquire() == 0
+    assert b.try_acquire() > 0
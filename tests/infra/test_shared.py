@@ -0,0 +1,108 @@
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from blueOcean.domain.ohlcv import Ohlcv, Timeframe
+from blueOcean.infra.database.repositories import OhlcvRepository
+from blueOcean.infra.shared import SharedOhlcvPlane, attached
+
+
+class _CountingRepository(OhlcvRepository):
+    def __init__(self, base_path):
+        super().__init__(base_path=base_path)
+        self.loads = 0
+
+    def find_table(self, *args, **kwargs):
+        self.loads += 1
+        return super().find_table(*args, **kwargs)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = _CountingRepository(str(tmp_path))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    repository.save(
+        [
+            Ohlcv(start + timedelta(minutes=i), i, i + 1, i - 1, i + 0.5, 2.0)
+            for i in range(100)
+        ],
+        "binance",
+        "BTC/USDT",
+    )
+    return repository
+
+
+def test_acquire_loads_each_range_once_and_attaches_without_copy(repository):
+    with SharedOhlcvPlane(repository) as plane:
+        first = plane.acquire("binance", "BTC/USDT", Timeframe.ONE_MINUTE)
+        second = plane.acquire("binance", "BTC/USDT", Timeframe.ONE_MINUTE)
+        expected = repository.find_columns("BTC/USDT", "binance")
+
+        with attached(first) as columns:
+            assert len(columns) == 100
+            np.testing.assert_array_equal(columns.time, expected.time)
+            np.testing.assert_array_equal(columns.close, expected.close)
+            # 別々に割り当てても同じ共有メモリを指す
+            with attached(second) as again:
+                again.close[0] = -1.0
+            assert columns.close[0] == -1.0
+            del columns
+
+    assert first == second
+    assert repository.loads == 2
+    assert plane.nbytes == 0
+
+
+def test_release_evicts_only_unreferenced_blocks_over_capacity(repository):
+    plane = SharedOhlcvPlane(repository, capacity_bytes=0)
+    start = datetime(2024, 1, 1, 0, 50, tzinfo=UTC)
+    held = plane.acquire("binance", "BTC/USDT", Timeframe.ONE_MINUTE)
+    released = plane.acquire("binance", "BTC/USDT", Timeframe.ONE_MINUTE, start)
+
+    plane.release(released)
+
+    with attached(held) as columns:
+        assert len(columns) == 100
+        del columns
+    with pytest.raises(FileNotFoundError):
+        with attached(released):
+            pass
+    plane.release(held)
+    assert plane.nbytes == 0
+
+
+def test_acquire_slices_aligned_ranges_from_a_covering_block(repository):
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    with SharedOhlcvPlane(repository) as plane:
+        span = plane.acquire(
+            "binance",
+            "BTC/USDT",
+            Timeframe.ONE_MINUTE,
+            start,
+            start + timedelta(hours=2),
+        )
+        loads = repository.loads
+        window = plane.acquire(
+            "binance",
+            "BTC/USDT",
+            Timeframe.ONE_MINUTE,
+            start + timedelta(minutes=30),
+            start + timedelta(minutes=60) - timedelta(microseconds=1),
+        )
+        # 足の途中で切れる範囲は切り出すと足が変わるので読み込み直す
+        unaligned = plane.acquire(
+            "binance",
+            "BTC/USDT",
+            Timeframe.ONE_MINUTE,
+            start + timedelta(seconds=30),
+            start + timedelta(minutes=60),
+        )
+
+        with attached(window) as columns:
+            assert window.name == span.name
+            assert len(columns) == 30
+            assert columns.close[0] == 30.5
+            del columns
+        assert unaligned.name != span.name
+        assert repository.loads == loads + 1
@@ -0,0 +1,184 @@
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from blueOcean.infra.stores import (
+    CoverageIndex,
+    ParquetPartitionStore,
+    PartitionManifest,
+    PendingIntervals,
+    merge_intervals,
+    subtract_intervals,
+    time_intervals,
+)
+
+
+def _table(start: datetime, count: int) -> pa.Table:
+    return pa.table(
+        {
+            "time": pd.date_range(start, periods=count, freq="1min"),
+            "open": [1.0] * count,
+            "high": [1.0] * count,
+            "low": [1.0] * count,
+            "close": [1.0] * count,
+            "volume": [1.0] * count,
+        }
+    )
+
+
+def test_append_records_partitions_in_manifest(tmp_path):
+    store = ParquetPartitionStore(tmp_path)
+    start = datetime(2024, 1, 31, 23, 58, tzinfo=UTC)
+
+    entries = store.append(_table(start, 4))
+
+    assert [e.month for e in entries] == ["2024-01", "2024-02"]
+    assert [e.rows for e in entries] == [2, 2]
+    assert store.latest() == start + timedelta(minutes=3)
+    assert PartitionManifest(tmp_path).load() == sorted(entries, key=lambda e: e.path)
+
+
+def test_latest_reads_only_the_latest_file(tmp_path):
+    store = ParquetPartitionStore(tmp_path)
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    store.append(_table(start, 3))
+    store.append(_table(start + timedelta(days=40), 2))
+    manifest = PartitionManifest(tmp_path)
+    # 書き出し済みなら一覧が壊れていても読まない
+    (tmp_path / PartitionManifest.FILENAME).write_text("{", "utf-8")
+
+    assert manifest.latest() == start + timedelta(days=40, minutes=1)
+
+
+def test_latest_is_written_for_manifests_without_it(tmp_path):
+    store = ParquetPartitionStore(tmp_path)
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    store.append(_table(start, 3))
+    (tmp_path / PartitionManifest.LATEST_FILENAME).unlink()
+
+    assert PartitionManifest(tmp_path).latest() == start + timedelta(minutes=2)
+    assert (tmp_path / PartitionManifest.LATEST_FILENAME).exists()
+
+
+def test_append_only_adds_to_the_log_until_folded(tmp_path):
+    store = ParquetPartitionStore(tmp_path)
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    [first] = store.append(_table(start, 3))
+    folded = (tmp_path / PartitionManifest.FILENAME).read_text("utf-8")
+
+    [second] = store.append(_table(start + timedelta(minutes=3), 3))
+
+    assert (tmp_path / PartitionManifest.FILENAME).read_text("utf-8") == folded
+    assert store.manifest.load() == sorted([first, second], key=lambda e: e.path)
+    assert store.latest() == start + timedelta(minutes=5)
+
+    store.manifest.fold()
+
+    assert len(list(tmp_path.glob("_manifest.*.log"))) == 1
+    assert "".join(p.read_text("utf-8") for p in tmp_path.glob("*.log")) == ""
+    assert PartitionManifest(tmp_path).load() == store.manifest.load()
+
+
+def test_pending_intervals_are_merged_and_kept_on_failure(tmp_path):
+    pending = PendingIntervals(tmp_path)
+    pending.add(5, 7)
+    pending.add(0, 3)
+    pending.add(2, 4)
+
+    try:
+        with pending.drain():
+            raise RuntimeError("aggregation failed")
+    except RuntimeError:
+        pass
+    with pending.drain() as intervals:
+        assert intervals.tolist() == [[0, 4], [5, 7]]
+    with pending.drain() as intervals:
+        assert intervals.tolist() == []
+
+
+def test_files_only_returns_overlapping_partitions(tmp_path):
+    store = ParquetPartitionStore(tmp_path)
+    store.append(_table(datetime(2024, 1, 1, tzinfo=UTC), 10))
+    store.append(_table(datetime(2024, 3, 1, tzinfo=UTC), 10))
+
+    files = store.files(start_at=datetime(2024, 2, 1), end_at=datetime(2024, 4, 1))
+
+    assert len(files) == 1
+    assert Path(files[0]).parent.name == "2024-03"
+
+
+def test_manifest_is_rebuilt_from_legacy_monthly_files(tmp_path):
+    pq.write_table(
+        _table(datetime(2023, 5, 1, tzinfo=UTC), 3), tmp_path / "2023-05.parquet"
+    )
+
+    store = ParquetPartitionStore(tmp_path)
+
+    assert store.latest() == datetime(2023, 5, 1, 0, 2, tzinfo=UTC)
+    assert [e.path for e in store.manifest.load()] == ["2023-05.parquet"]
+
+
+def test_compact_merges_month_fragments_and_keeps_newest_rows(tmp_path):
+    store = ParquetPartitionStore(tmp_path)
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    store.append(_table(start, 10))
+    newer = _table(start + timedelta(minutes=5), 10)
+    newer = newer.set_column(1, "open", pa.array([2.0] * 10))
+    store.append(newer)
+
+    [compacted] = store.compact()
+
+    assert compacted.rows == 15
+    assert store.manifest.load() == [compacted]
+    assert not Path(tmp_path, "2024-01").exists()
+    table = pq.read_table(Path(tmp_path, compacted.path))
+    assert table.column("open").to_pylist() == [1.0] * 5 + [2.0] * 10
+
+
+def test_fragments_written_after_compaction_take_precedence(tmp_path):
+    store = ParquetPartitionStore(tmp_path)
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    store.append(_table(start, 5))
+    store.append(_table(start + timedelta(minutes=5), 5))
+    [compacted] = store.compact()
+
+    [fragment] = store.append(_table(start, 1))
+
+    assert sorted(store.files()) == [
+        str(Path(tmp_path, compacted.path)),
+        str(Path(tmp_path, fragment.path)),
+    ]
+
+
+def test_interval_helpers():
+    intervals = time_intervals(np.array([0, 1, 2, 5, 6, 9]), step=1)
+
+    assert intervals.tolist() == [[0, 3], [5, 7], [9, 10]]
+    assert merge_intervals([[5, 7], [0, 3], [2, 4], [7, 8]]).tolist() == [
+        [0, 4],
+        [5, 8],
+    ]
+    assert subtract_intervals(-1, 12, intervals).tolist() == [
+        [-1, 0],
+        [3, 5],
+        [7, 9],
+        [10, 12],
+    ]
+    assert subtract_intervals(1, 2, intervals).tolist() == []
+
+
+def test_coverage_gaps_skip_covered_and_unavailable_ranges(tmp_path):
+    coverage = CoverageIndex(tmp_path, step=1)
+    coverage.add(np.array([3, 0, 1, 2, 1]))
+    coverage.add(np.array([8, 9]))
+    coverage.mark_unavailable(4, 6)
+
+    covered, unavailable = CoverageIndex(tmp_path, step=1).load()
+
+    assert covered.tolist() == [[0, 4], [8, 10]]
+    assert unavailable.tolist() == [[4, 6]]
+    assert coverage.gaps(0, 12).tolist() == [[6, 8], [10, 12]]
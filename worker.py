@@ -0,0 +1,64 @@
+import argparse
+import multiprocessing
+import os
+
+from injector import Injector
+
+from blueOcean.application.di import AppModule
+from blueOcean.application.workers import OhlcvFetchJobWorker
+
+
+def _work(name: str, caps: dict[str, int], default_cap: int):
+    worker = Injector([AppModule()]).get(OhlcvFetchJobWorker)
+    try:
+        worker.run_forever(name, caps, default_cap)
+    except KeyboardInterrupt:
+        pass
+
+
+def start_workers(
+    processes: int,
+    caps: dict[str, int] | None = None,
+    default_cap: int = 1,
+) -> list[multiprocessing.Process]:
+    """OHLCV 取得ジョブのワーカープロセスを起動する
+
+    取引所ごとの同時実行数の上限はキューの claim で全プロセス共通にかかる。
+    """
+    workers = []
+    for i in range(processes):
+        process = multiprocessing.Process(
+            target=_work,
+            args=(f"{os.getpid()}-{i}", caps or {}, default_cap),
+            daemon=True,
+        )
+        process.start()
+        workers.append(process)
+    return workers
+
+
+def _parse_cap(value: str) -> tuple[str, int]:
+    exchange, _, cap = value.partition("=")
+    return exchange, int(cap)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run OHLCV fetch job workers")
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument(
+        "--cap",
+        type=_parse_cap,
+        action="append",
+        default=[],
+        help="per-exchange concurrency, e.g. --cap binance=2",
+    )
+    parser.add_argument("--default-cap", type=int, default=1)
+    args = parser.parse_args()
+
+    workers = start_workers(args.processes, dict(args.cap), args.default_cap)
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.terminate()